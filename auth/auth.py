@@ -1,20 +1,98 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, FrozenSet, Optional
+import asyncio
+import hashlib
+import hmac
+import secrets
+import time
+import weakref
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, Request, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
 from dotenv import load_dotenv
 
+from auth.hashing import pwd_context
+from models.cache import TTLCache
+from models.storage import REVOKED_ACCESS_TOKENS_SCOPE
+
 load_dotenv()
 
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-this")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 2
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+# Seconds between checks of a school database for access tokens other workers revoked
+REVOCATION_POLL_SECONDS = float(os.getenv("REVOCATION_POLL_SECONDS", "5"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# Verified payloads keyed by token digest, so repeat requests skip the
+# signature check; tokens this process revoked are remembered until they
+# expire, and revocation_lists learns about the rest
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+revoked_tokens = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_HOURS * 3600)
+
+class RevocationList:
+    """This process's copy of one database's ``revoked_access_tokens``.
+
+    At most every ``interval`` seconds a request polls the table's data
+    version and reloads the hashes only when another worker has revoked a
+    token since; every other request is a set lookup. A token revoked
+    elsewhere is therefore honoured here within ``interval`` seconds.
+    """
+
+    def __init__(self, interval: float = REVOCATION_POLL_SECONDS):
+        self.interval = interval
+        self.hashes: FrozenSet[str] = frozenset()
+        self.version: Optional[int] = None
+        self.checked_at = float("-inf")
+        self.polls = 0
+        self.reloads = 0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def contains(self, db: Any, token_hash: str) -> bool:
+        if time.monotonic() - self.checked_at >= self.interval:
+            await self.refresh(db)
+        return token_hash in self.hashes
+
+    async def refresh(self, db: Any) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another request may have polled while this one waited
+            if time.monotonic() - self.checked_at < self.interval:
+                return
+            self.polls += 1
+            versions = await db.get_data_versions([REVOKED_ACCESS_TOKENS_SCOPE])
+            version = versions.get(REVOKED_ACCESS_TOKENS_SCOPE, {}).get("version", 0)
+            if version != self.version:
+                self.hashes = frozenset(await db.get_revoked_access_tokens())
+                self.version = version
+                self.reloads += 1
+            self.checked_at = time.monotonic()
+
+# One list per school database, dropped with the database
+revocation_lists: "weakref.WeakKeyDictionary[Any, RevocationList]" = weakref.WeakKeyDictionary()
+
+def revocation_list(db: Any) -> RevocationList:
+    revocations = revocation_lists.get(db)
+    if revocations is None:
+        revocations = revocation_lists[db] = RevocationList()
+    return revocations
+
+def revocation_stats() -> dict:
+    lists = list(revocation_lists.values())
+    return {
+        "databases": len(lists),
+        "revoked": sum(len(revocations.hashes) for revocations in lists),
+        "polls": sum(revocations.polls for revocations in lists),
+        "reloads": sum(revocations.reloads for revocations in lists),
+        "interval": REVOCATION_POLL_SECONDS,
+    }
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -32,30 +110,105 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
     
-    to_encode.update({"exp": expire})
+    # Unique per issue, so revoking one login never revokes another made in the same second
+    to_encode.update({"exp": expire, "jti": secrets.token_urlsafe(12)})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> dict:
-    """Verify and decode JWT token."""
+def create_refresh_token(prefix: Optional[str] = None) -> str:
+    """Create an opaque refresh token, optionally prefixed with a routing key."""
+    token = secrets.token_urlsafe(32)
+    return f"{prefix}.{token}" if prefix else token
+
+def hash_refresh_token(token: str) -> str:
+    """Keyed hash stored in place of the refresh token itself."""
+    return hmac.new(SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+def refresh_token_expiry() -> int:
+    """Unix time at which a refresh token issued now expires."""
+    return int(time.time()) + REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def decode_token(token: str) -> dict:
+    """Verify and decode JWT token without consulting the cache."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+            raise _credentials_exception()
         return payload
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
-    """Get current authenticated user from token."""
+        raise _credentials_exception()
+
+def verify_token(token: str) -> dict:
+    """Verify and decode JWT token, reusing the payload of a recently verified token."""
+    digest = _token_digest(token)
+    if revoked_tokens.get(digest):
+        raise _credentials_exception()
+    
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
+    
+    payload = decode_token(token)
+    # Never keep a payload past the token's own expiry
+    remaining = payload.get("exp", 0) - time.time()
+    if remaining > 0:
+        token_cache.set(digest, payload, ttl=remaining)
+    return payload
+
+def access_token_hash(token: str) -> str:
+    """Key of an access token in the shared ``revoked_access_tokens`` table."""
+    return _token_digest(token).hex()
+
+def revoke_token(token: str) -> None:
+    """Reject an access token for the rest of its life in this process."""
+    digest = _token_digest(token)
+    token_cache.invalidate(digest)
+    revoked_tokens.set(digest, True)
+
+async def revoke_access_token(shards: Any, token: str) -> None:
+    """Reject an access token in every process sharing its school's database.
+
+    Raises ``KeyError`` if the token names a school with no shard.
+    """
+    revoke_token(token)
+    try:
+        payload = decode_token(token)
+    except HTTPException:
+        # Invalid or already expired: nothing left to deny
+        return
+    await shards.for_claims(payload).revoke_access_token(access_token_hash(token), int(payload["exp"]))
+
+def clear_token_cache() -> None:
+    """Drop every cached payload, e.g. after rotating ``JWT_SECRET_KEY``."""
+    token_cache.invalidate()
+
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Get current authenticated user from token.
+    
+    The cached payload is only trusted if the token is absent from this
+    process's copy of its school database's revocation list.
+    """
     token = credentials.credentials
-    return verify_token(token)
\ No newline at end of file
+    payload = verify_token(token)
+    
+    shards = getattr(request.app.state, "shards", None)
+    if shards is not None:
+        try:
+            db = shards.for_claims(payload)
+        except KeyError:
+            raise _credentials_exception()
+        if await revocation_list(db).contains(db, access_token_hash(token)):
+            revoke_token(token)
+            raise _credentials_exception()
+    return payload
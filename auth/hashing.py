@@ -0,0 +1,135 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "64"))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "process")
+
+# Hashes below or above the configured cost are flagged for rehash on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+def verify_and_update(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """Return ``(valid, new_hash)``; ``new_hash`` is set when the stored cost is stale."""
+    return pwd_context.verify_and_update(password, password_hash)
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+class PasswordHasher:
+    """Bounded worker pool for bcrypt hashing and verification.
+
+    bcrypt deliberately burns CPU for hundreds of milliseconds, so it runs in
+    a process pool (``PASSWORD_HASH_EXECUTOR=thread`` for a thread pool)
+    instead of the event loop or the database executor. At most ``workers``
+    hashes run at once and at most ``max_queue`` wait; further calls raise
+    :class:`PasswordHasherBusy` instead of piling up behind them.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_QUEUE,
+                 executor: str = PASSWORD_HASH_EXECUTOR):
+        self.workers = max(workers, 1)
+        self.max_queue = max_queue
+        self.executor_kind = executor
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+        self._waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._busy_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        # Created on first use so importing the app never forks
+        with self._lock:
+            if self._executor is None:
+                if self.executor_kind == 'thread':
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+                else:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    async def run(self, func: Any, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.workers)
+            self._loop = loop
+
+        if self._waiting >= self.max_queue and self._semaphore.locked():
+            self.rejected += 1
+            raise PasswordHasherBusy()
+
+        semaphore = self._semaphore
+        self._waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._busy_seconds += time.perf_counter() - start
+            self._in_flight -= 1
+            self.completed += 1
+            semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        valid, new_hash = await self.run(verify_and_update, password, password_hash)
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'executor': self.executor_kind,
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'in_flight': self._in_flight,
+            'queued': self._waiting,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'rehashed': self.rehashed,
+            'avg_ms': round(self._busy_seconds / self.completed * 1000, 1) if self.completed else 0.0,
+            'bcrypt_rounds': BCRYPT_ROUNDS,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+_default_hasher: Optional[PasswordHasher] = None
+_default_lock = threading.Lock()
+
+def get_password_hasher() -> PasswordHasher:
+    """Process-wide hasher shared by every database shard."""
+    global _default_hasher
+    with _default_lock:
+        if _default_hasher is None:
+            _default_hasher = PasswordHasher()
+        return _default_hasher
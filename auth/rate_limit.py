@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request
+
+from auth.auth import get_current_user
+
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", "data/rate_limits.db")
+# Seconds a check may wait for another worker's write; checks run off the event loop
+RATE_LIMIT_BUSY_TIMEOUT = float(os.getenv("RATE_LIMIT_BUSY_TIMEOUT", "1"))
+# What a request gets when the limiter store fails: "closed" answers 503, "open" lets it through
+RATE_LIMIT_ON_ERROR = os.getenv("RATE_LIMIT_ON_ERROR", "closed")
+# Threads per worker running checks against the limiter store
+RATE_LIMIT_WORKERS = int(os.getenv("RATE_LIMIT_WORKERS", "2"))
+# Drop buckets that have refilled completely once every this many checks
+RATE_LIMIT_PRUNE_EVERY = 10000
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+logger = logging.getLogger(__name__)
+
+# One statement refills the bucket for the time since its last update,
+# takes a token if a whole one is available and reports the outcome, so a
+# check is a single primary-key upsert whatever the number of buckets
+_HIT = """
+    INSERT INTO rate_limits (key, tokens, updated_at, full_at, allowed)
+    VALUES (:key, :capacity - 1, :now, :now + :period, 1)
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = MIN(:capacity, tokens + MAX(:now - updated_at, 0) * :rate)
+                 - (MIN(:capacity, tokens + MAX(:now - updated_at, 0) * :rate) >= 1),
+        allowed = MIN(:capacity, tokens + MAX(:now - updated_at, 0) * :rate) >= 1,
+        updated_at = :now,
+        full_at = :now + :period
+    RETURNING tokens, allowed
+"""
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """``"5/minute"`` -> ``(5, 60)``: bucket capacity and the seconds it takes to refill."""
+    count, _, period = rate.partition("/")
+    return int(count), PERIODS[period.strip()]
+
+class RateLimiterUnavailable(Exception):
+    """The limiter store could not be read or written."""
+
+class TokenBucketLimiter:
+    """Token buckets shared by every worker process through one SQLite file.
+
+    Each bucket is a row holding its token count and last update time.
+    Checks from different workers only contend for SQLite's write lock for
+    the duration of one upsert. ``check`` runs it on the limiter's own
+    threads, so waiting up to ``busy_timeout`` for that lock never stalls
+    the event loop. A check that still fails is counted in ``errors`` and
+    raises :class:`RateLimiterUnavailable`, unless ``fail_open`` lets the
+    request through (counted in ``failed_open``).
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_DB, busy_timeout: float = RATE_LIMIT_BUSY_TIMEOUT,
+                 fail_open: bool = RATE_LIMIT_ON_ERROR == "open", max_workers: int = RATE_LIMIT_WORKERS):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.fail_open = fail_open
+        self.max_workers = max_workers
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.checked = 0
+        self.limited = 0
+        self.errors = 0
+        self.failed_open = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened lazily per thread, so a preloaded master never shares one with its workers
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            # Limiter state is disposable; losing the last writes on power loss is fine
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limits (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    full_at REAL NOT NULL,
+                    allowed INTEGER NOT NULL
+                ) WITHOUT ROWID
+            """)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def hit(self, key: str, capacity: int, period: float) -> Tuple[bool, float]:
+        """Take one token from ``key``'s bucket; returns ``(allowed, retry_after_seconds)``."""
+        now = time.time()
+        rate = capacity / period
+        self.checked += 1
+
+        try:
+            conn = self._connection()
+            tokens, allowed = conn.execute(_HIT, {
+                'key': key, 'capacity': capacity, 'period': period, 'rate': rate, 'now': now
+            }).fetchone()
+            if self.checked % RATE_LIMIT_PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM rate_limits WHERE full_at < ?", (now,))
+        except sqlite3.Error as e:
+            with self._lock:
+                self.errors += 1
+                if self.fail_open:
+                    self.failed_open += 1
+            logger.error(f"Rate limit check for {key} failed: {e}")
+            if self.fail_open:
+                return True, 0.0
+            raise RateLimiterUnavailable(str(e)) from e
+
+        if allowed:
+            return True, 0.0
+        self.limited += 1
+        return False, (1 - tokens) / rate
+
+    async def check(self, key: str, capacity: int, period: float) -> Tuple[bool, float]:
+        """``hit`` on the limiter's threads instead of the event loop."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='rate-limit')
+            executor = self._executor
+        return await asyncio.get_running_loop().run_in_executor(executor, self.hit, key, capacity, period)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'checked': self.checked,
+            'limited': self.limited,
+            'errors': self.errors,
+            'failed_open': self.failed_open,
+            'on_error': 'open' if self.fail_open else 'closed',
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            connections, self._connections = self._connections, []
+        if executor is not None:
+            executor.shutdown(wait=True)
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+_default_limiter: Optional[TokenBucketLimiter] = None
+_default_lock = threading.Lock()
+
+def get_rate_limiter() -> TokenBucketLimiter:
+    """Process-wide limiter; every worker opens the same ``RATE_LIMIT_DB``."""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = TokenBucketLimiter()
+        return _default_limiter
+
+def client_ip(request: Request) -> str:
+    # uvicorn has already applied X-Forwarded-For from FORWARDED_ALLOW_IPS proxies
+    return request.client.host if request.client else "unknown"
+
+async def _check(key: str, capacity: int, period: int) -> None:
+    try:
+        allowed, retry_after = await get_rate_limiter().check(key, capacity, period)
+    except RateLimiterUnavailable:
+        raise HTTPException(
+            status_code=503,
+            detail="Rate limiter unavailable, please retry",
+            headers={"Retry-After": "1"}
+        )
+    if not allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded, please slow down",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+def rate_limit(scope: str, rate: str, per_user: bool = True) -> Callable:
+    """Dependency enforcing ``rate`` (e.g. ``"30/minute"``) per JWT subject, or per client IP.
+
+    Per-user limits reuse the request's ``get_current_user`` result, so
+    they add no extra token verification.
+    """
+    capacity, period = parse_rate(rate)
+
+    if per_user:
+        async def limit_user(current_user: dict = Depends(get_current_user)) -> None:
+            await _check(f"{scope}:user:{current_user['sub']}", capacity, period)
+        return limit_user
+
+    async def limit_ip(request: Request) -> None:
+        await _check(f"{scope}:ip:{client_ip(request)}", capacity, period)
+    return limit_ip
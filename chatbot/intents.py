@@ -0,0 +1,105 @@
+import re
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+GREETING = 'greeting'
+ATTENDANCE = 'attendance'
+GRADES = 'grades'
+SCHEDULE = 'schedule'
+TEACHER = 'teacher'
+GENERAL = 'general'
+HELP = 'help'
+
+# Keywords per intent, in the order ties are broken. Each keyword only
+# matches as a whole word, so "hi" no longer fires on "history" nor "class"
+# on "classmate"; plurals are listed explicitly for the same reason
+INTENTS: List[Tuple[str, Sequence[str]]] = [
+    (ATTENDANCE, ['attendance', 'absent', 'absence', 'absences', 'present', 'late', 'tardy', 'missed']),
+    (GRADES, ['grade', 'grades', 'score', 'scores', 'mark', 'marks', 'test', 'tests', 'exam', 'exams',
+              'quiz', 'quizzes', 'result', 'results', 'report card', 'performance']),
+    (SCHEDULE, ['schedule', 'schedules', 'timetable', 'class', 'classes', 'period', 'periods', 'time', 'when']),
+    (TEACHER, ['teacher', 'teachers', 'instructor', 'instructors', 'contact', 'email']),
+    (GENERAL, ['policy', 'policies', 'rule', 'rules', 'fee', 'fees', 'payment', 'payments',
+               'event', 'events', 'program', 'programs', 'school']),
+    (GREETING, ['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening', 'start', 'begin']),
+]
+
+# Intents that only win when nothing else matched: "hi, how are his
+# grades?" is a grade query
+SMALL_TALK = (GREETING,)
+
+def _trie_pattern(node: Dict[str, Any]) -> str:
+    branches = []
+    for char, child in sorted((char, child) for char, child in node.items() if char):
+        branches.append((r'\s+' if char == ' ' else re.escape(char)) + _trie_pattern(child))
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    # The empty key marks a keyword ending here, which makes the rest optional
+    return '(?:' + pattern + ')?' if '' in node else pattern
+
+def compile_keywords(keywords: Iterable[str]) -> re.Pattern:
+    """One word-boundary regex matching any of ``keywords`` in lowercase text.
+
+    The alternatives are laid out as a prefix trie ("class(?:es)?",
+    "te(?:acher|st)"), so each position in the message is tried against
+    every keyword in a single walk instead of one alternative at a time.
+    """
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in ' '.join(keyword.lower().split()):
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return re.compile(r'\b(?:' + _trie_pattern(trie) + r')\b')
+
+class IntentClassifier:
+    """Scores every intent in a single scan of the message.
+
+    The intent with the most keyword hits wins and ties go to the one
+    listed first. ``small_talk`` intents only count when no other intent
+    matched; messages matching nothing get ``fallback``.
+    """
+
+    def __init__(self, intents: Sequence[Tuple[str, Sequence[str]]] = INTENTS,
+                 small_talk: Sequence[str] = SMALL_TALK, fallback: str = HELP):
+        self.names = [name for name, _ in intents]
+        self.fallback = fallback
+        self._keyword_index = {
+            ' '.join(keyword.lower().split()): index
+            for index, (_, keywords) in enumerate(intents) for keyword in keywords
+        }
+        self._pattern = compile_keywords(self._keyword_index)
+        self._small_talk = {index for index, name in enumerate(self.names) if name in small_talk}
+
+    def _hits(self, message: str) -> List[int]:
+        """Index of the intent behind every keyword found in ``message``."""
+        keyword_index = self._keyword_index
+        hits = []
+        for keyword in self._pattern.findall(message.lower()):
+            index = keyword_index.get(keyword)
+            if index is None:
+                # Multi-word keyword matched across several spaces or a newline
+                index = keyword_index[' '.join(keyword.split())]
+            hits.append(index)
+        return hits
+
+    def scores(self, message: str) -> Dict[str, int]:
+        hits = self._hits(message)
+        return {self.names[index]: hits.count(index) for index in sorted(set(hits))}
+
+    def classify(self, message: str) -> str:
+        hits = self._hits(message)
+        if not hits:
+            return self.fallback
+        topical = [index for index in hits if index not in self._small_talk]
+        if topical:
+            hits = topical
+        candidates = set(hits)
+        if len(candidates) == 1:
+            return self.names[hits[0]]
+        return self.names[max(candidates, key=lambda index: (hits.count(index), -index))]
+
+default_classifier = IntentClassifier()
+
+def classify_intent(message: str) -> str:
+    return default_classifier.classify(message)
@@ -1,40 +1,73 @@
 import re
 import json
+import asyncio
+import os
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-from models.database import Database
+from typing import Callable, Dict, List, Any, Optional
+from models.async_database import AsyncDatabase
+from models.cache import TTLCache
+from models.storage import schedule_scopes, version_scope
+from chatbot.intents import ATTENDANCE, GENERAL, GRADES, GREETING, SCHEDULE, TEACHER, classify_intent
+from chatbot.sessions import (EMAIL_PATTERN, SESSION_STUDENT_RECHECK, STUDENT_ID_PATTERN, SessionStore,
+                              replay_authentication)
+from chatbot.transcripts import TranscriptWriter
+
+# Rendered attendance/grade/schedule/teacher replies kept per process
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "2048"))
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", "3600"))
+
+REPORT_INTENTS = (ATTENDANCE, GRADES, SCHEDULE, TEACHER)
+SUBJECT_PATTERN = re.compile(
+    r'\b(math|science|english|history|geography|physics|chemistry|biology|computer|art|music|pe|physical education)\b',
+    re.IGNORECASE
+)
 
 class SchoolBot:
-    def __init__(self):
-        self.db = Database()
-        self.conversation_context = {}
+    def __init__(self, db: Optional[AsyncDatabase] = None, sessions: Optional[SessionStore] = None,
+                 transcripts: Optional[TranscriptWriter] = None):
+        # The app passes each session's shard to process_message; the
+        # fallback database is only opened for standalone use
+        self.db = db
+        self.sessions = sessions if sessions is not None else SessionStore()
+        self.transcripts = transcripts if transcripts is not None else TranscriptWriter()
+        # Rendered reports keyed by their inputs and data versions
+        self.reports = TTLCache(maxsize=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_TTL)
     
-    def process_message(self, session_id: str, parent_email: str, message: str) -> str:
+    async def process_message(self, session_id: str, parent_email: str, message: str,
+                              db: Optional[AsyncDatabase] = None,
+                              route: Optional[Callable[[str], AsyncDatabase]] = None) -> str:
+        """Answer one chat message.
+        
+        ``db`` is the database holding the session and its transcript.
+        ``route`` maps the student id a parent signs in with to the
+        database holding that student, raising ``KeyError`` for a school
+        the parent may not access; by default everything is in ``db``.
+        """
         try:
-            if session_id not in self.conversation_context:
-                self.conversation_context[session_id] = {
-                    'parent_email': parent_email,
-                    'is_authenticated': False,
-                    'current_student': None,
-                    'conversation_history': []
-                }
-            
-            context = self.conversation_context[session_id]
-            context['conversation_history'].append({
+            db = db if db is not None else self._default_db()
+            route = route if route is not None else (lambda student_id: db)
+            context = await self.sessions.get(
+                session_id,
+                load=lambda: self._load_context(session_id, parent_email, db, route),
+                create=lambda: self._new_context(parent_email, db)
+            )
+            
+            user_message = {
                 'role': 'user',
                 'content': message,
                 'timestamp': datetime.now().isoformat()
-            })
-            
-            response = self._generate_response(context, message)
+            }
+            response = await self._generate_response(context, message, route)
             
-            context['conversation_history'].append({
+            assistant_message = {
                 'role': 'assistant',
                 'content': response,
                 'timestamp': datetime.now().isoformat()
-            })
+            }
             
-            self.db.update_chat_session(session_id, context['conversation_history'])
+            await self.transcripts.append(db, session_id, [user_message, assistant_message])
+            self.sessions.record(session_id, [user_message, assistant_message])
             
             return response
             
@@ -42,38 +75,154 @@ class SchoolBot:
             print(f"Error processing message: {str(e)}")
             return "I apologize, but I encountered an error processing your request. Please try again or contact the school office for assistance."
     
-    def _generate_response(self, context: Dict[str, Any], message: str) -> str:
-        lower_message = message.lower()
+    def _default_db(self) -> AsyncDatabase:
+        if self.db is None:
+            self.db = AsyncDatabase()
+        return self.db
+    
+    def _new_context(self, parent_email: str, db: AsyncDatabase) -> Dict[str, Any]:
+        return {
+            'db': db,
+            'parent_email': parent_email,
+            'is_authenticated': False,
+            'current_student': None,
+            'conversation_history': []
+        }
+    
+    async def _load_context(self, session_id: str, parent_email: str, db: AsyncDatabase,
+                            route: Callable[[str], AsyncDatabase]) -> Optional[Dict[str, Any]]:
+        """Rebuild an evicted session from its stored transcript, or None for a new session."""
+        await self.transcripts.sync(db, session_id)
+        history = await db.get_chat_messages(session_id)
+        if not history:
+            return None
         
-        if not context['is_authenticated']:
-            return self._handle_authentication(context, message)
+        context = self._new_context(parent_email, db)
+        replay_authentication(context, history)
+        if context['is_authenticated'] and not self._route_student(context, route):
+            context.update(self._new_context(parent_email, db))
+        context['conversation_history'] = history
+        return context
+    
+    def _route_student(self, context: Dict[str, Any], route: Callable[[str], AsyncDatabase]) -> bool:
+        """Point the session's queries at the school of its student; False if that school is off limits."""
+        try:
+            context['db'] = route(context['current_student'])
+        except KeyError:
+            return False
+        return True
+    
+    async def _get_student(self, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The session's authorized student record, cached on the context.
         
-        if self._is_greeting(lower_message):
-            return self._generate_greeting(context)
+        The cached record is reused until the student's roster version
+        changes, which is checked at most every SESSION_STUDENT_RECHECK
+        seconds, so most turns skip the parent/student join.
+        """
+        now = time.monotonic()
+        if 'student_version' in context and now < context['student_checked_at'] + SESSION_STUDENT_RECHECK:
+            self.sessions.student_hits += 1
+            return context['student']
         
-        if self._is_attendance_query(lower_message):
-            return self._handle_attendance_query(context, message)
+        db = context['db']
+        scope = version_scope('roster', context['current_student'])
+        # Read the version before the record so a concurrent write is never cached as current
+        version = (await db.get_data_versions([scope])).get(scope, {}).get('version', 0)
+        if context.get('student_version') != version:
+            context['student'] = await db.get_student_by_parent(context['parent_email'], context['current_student'])
+            context['student_version'] = version
+            self.sessions.student_loads += 1
+        else:
+            self.sessions.student_hits += 1
+        context['student_checked_at'] = now
+        return context['student']
+    
+    async def _generate_response(self, context: Dict[str, Any], message: str,
+                                 route: Callable[[str], AsyncDatabase]) -> str:
+        if not context['is_authenticated']:
+            return self._handle_authentication(context, message, route)
         
-        if self._is_grade_query(lower_message):
-            return self._handle_grade_query(context, message)
+        intent = classify_intent(message)
         
-        if self._is_schedule_query(lower_message):
-            return self._handle_schedule_query(context, message)
+        if intent == GREETING:
+            return self._generate_greeting(context)
         
-        if self._is_teacher_query(lower_message):
-            return self._handle_teacher_query(context, message)
+        if intent in REPORT_INTENTS:
+            return await self._handle_report(context, intent, message)
         
-        if self._is_general_school_query(lower_message):
+        if intent == GENERAL:
             return self._handle_general_school_query(context, message)
         
         return self._generate_help_response()
     
-    def _handle_authentication(self, context: Dict[str, Any], message: str) -> str:
-        email_pattern = r'[\w\.-]+@[\w\.-]+\.\w+'
-        student_id_pattern = r'\b\d{4,}\b'
+    async def _handle_report(self, context: Dict[str, Any], intent: str, message: str) -> str:
+        """Answer an attendance, grade, schedule or teacher query, from the report cache when possible.
         
-        email_match = re.search(email_pattern, message)
-        student_id_match = re.search(student_id_pattern, message)
+        A report is fully determined by the student, the intent, the subject
+        filter, the day (attendance covers the last 30 days) and the data it
+        reads, so the cache key carries the data_versions of those scopes.
+        Any write bumps them, which makes older entries unreachable instead
+        of stale; they age out of the LRU. Versions are read before the data,
+        and the timetable comes with the versions its cached copy was checked
+        against, so a report is never stored under versions newer than its data.
+        """
+        handler, label = {
+            ATTENDANCE: (self._handle_attendance_query, 'attendance'),
+            GRADES: (self._handle_grade_query, 'grade'),
+            SCHEDULE: (self._handle_schedule_query, 'schedule'),
+            TEACHER: (self._handle_teacher_query, 'teacher'),
+        }[intent]
+        
+        try:
+            student = await self._get_student(context)
+            if not student:
+                return await handler(context, message)
+            
+            scopes = self._report_scopes(intent, context['current_student'], student)
+            if intent in (SCHEDULE, TEACHER):
+                versions, schedule = await context['db'].get_class_schedule_with_versions(
+                    student['class'], student['section']
+                )
+                render = lambda: handler(context, message, schedule)
+            else:
+                versions = await context['db'].get_data_versions(scopes)
+                render = lambda: handler(context, message)
+            key = (
+                id(context['db']),
+                context['current_student'],
+                context['student_version'],
+                intent,
+                self._subject_filter(message) if intent == GRADES else None,
+                datetime.now().strftime('%Y-%m-%d') if intent == ATTENDANCE else None,
+                tuple(versions.get(scope, {}).get('version', 0) for scope in scopes),
+            )
+            
+            response = self.reports.get(key)
+            if response is None:
+                response = await render()
+                self.reports.set(key, response)
+            return response
+            
+        except Exception as e:
+            print(f"Error handling {label} query: {str(e)}")
+            return f"❌ I encountered an error retrieving {label} information. Please try again or contact the school office."
+    
+    def _report_scopes(self, intent: str, student_id: str, student: Dict[str, Any]) -> List[str]:
+        if intent == ATTENDANCE:
+            return [version_scope('attendance', student_id)]
+        if intent == GRADES:
+            # Grade summaries include the teacher's name
+            return [version_scope('grades', student_id), version_scope('teachers')]
+        return schedule_scopes(student['class'], student['section'])
+    
+    def _subject_filter(self, message: str) -> Optional[str]:
+        subject_match = SUBJECT_PATTERN.search(message)
+        return subject_match.group() if subject_match else None
+    
+    def _handle_authentication(self, context: Dict[str, Any], message: str,
+                               route: Callable[[str], AsyncDatabase]) -> str:
+        email_match = EMAIL_PATTERN.search(message)
+        student_id_match = STUDENT_ID_PATTERN.search(message)
         
         if not email_match or not student_id_match:
             return """🔐 **Authentication Required**
@@ -86,8 +235,14 @@ Example: "My email is parent@email.com and my child's ID is 12345"
 
 This ensures we maintain the privacy and security of student data."""
         
-        context['parent_email'] = email_match.group()
         context['current_student'] = student_id_match.group()
+        if not self._route_student(context, route):
+            context['current_student'] = None
+            return """❌ **Student Not Found**
+
+That student ID does not belong to your school. Please check the ID and try again, or contact the school office for assistance."""
+        
+        context['parent_email'] = email_match.group()
         context['is_authenticated'] = True
         
         return """✅ **Welcome to SchoolBot!**
@@ -108,28 +263,27 @@ Hello! I'm here to help you access information about your child's academic progr
 
 What would you like to know about your child's education?"""
     
-    def _handle_attendance_query(self, context: Dict[str, Any], message: str) -> str:
-        try:
-            student = self.db.get_student_by_parent(context['parent_email'], context['current_student'])
-            
-            if not student:
-                return "❌ I couldn't find a student record associated with your account. Please verify your student ID and try again."
-            
-            end_date = datetime.now().strftime('%Y-%m-%d')
-            start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-            
-            attendance = self.db.get_attendance(context['current_student'], start_date, end_date)
-            
-            total_days = len(attendance)
-            present_days = len([a for a in attendance if a['status'] == 'present'])
-            absent_days = len([a for a in attendance if a['status'] == 'absent'])
-            late_days = len([a for a in attendance if a['status'] == 'late'])
-            
-            attendance_percentage = round((present_days / total_days) * 100) if total_days > 0 else 0
-            
-            recent_absences = [a['date'] for a in attendance if a['status'] == 'absent'][:5]
-            
-            response = f"""📊 **Attendance Report for {student['name']}** - Class {student['class']}-{student['section']}
+    async def _handle_attendance_query(self, context: Dict[str, Any], message: str) -> str:
+        student = await self._get_student(context)
+        
+        if not student:
+            return "❌ I couldn't find a student record associated with your account. Please verify your student ID and try again."
+        
+        end_date = datetime.now().strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        
+        summary, recent_absences = await asyncio.gather(
+            context['db'].get_attendance_summary(context['current_student'], start_date, end_date),
+            context['db'].get_recent_absences(context['current_student'], start_date, end_date)
+        )
+        
+        total_days = summary['total_days']
+        present_days = summary['present']
+        absent_days = summary['absent']
+        late_days = summary['late']
+        attendance_percentage = summary['attendance_rate']
+        
+        response = f"""📊 **Attendance Report for {student['name']}** - Class {student['class']}-{student['section']}
 
 **Current Month Statistics:**
 - 📈 **Attendance Rate**: {attendance_percentage}%
@@ -143,28 +297,21 @@ What would you like to know about your child's education?"""
 ℹ️ **Note**: School policy requires minimum 75% attendance for academic progression.
 
 Need more details about specific dates or have questions about attendance policies?"""
-            
-            return response
-            
-        except Exception as e:
-            print(f"Error handling attendance query: {str(e)}")
-            return "❌ I encountered an error retrieving attendance information. Please try again or contact the school office."
+        
+        return response
     
-    def _handle_grade_query(self, context: Dict[str, Any], message: str) -> str:
-        try:
-            student = self.db.get_student_by_parent(context['parent_email'], context['current_student'])
-            
-            if not student:
-                return "❌ I couldn't find a student record associated with your account. Please verify your student ID and try again."
-            
-            subject_pattern = r'\b(math|science|english|history|geography|physics|chemistry|biology|computer|art|music|pe|physical education)\b'
-            subject_match = re.search(subject_pattern, message, re.IGNORECASE)
-            subject = subject_match.group() if subject_match else None
-            
-            grades = self.db.get_grades(context['current_student'], subject)
-            
-            if not grades:
-                return f"""📚 **Academic Performance - {student['name']}**
+    async def _handle_grade_query(self, context: Dict[str, Any], message: str) -> str:
+        student = await self._get_student(context)
+        
+        if not student:
+            return "❌ I couldn't find a student record associated with your account. Please verify your student ID and try again."
+        
+        subject = self._subject_filter(message)
+        
+        grade_summary = await context['db'].get_grade_summary(context['current_student'], subject)
+        
+        if not grade_summary['subjects']:
+            return f"""📚 **Academic Performance - {student['name']}**
 
 No grades found{f' for {subject}' if subject else ''} in our current records.
 
@@ -174,119 +321,103 @@ This might be because:
 - The subject name might be different
 
 Please contact your class teacher for more information."""
-            
-            subject_groups = {}
-            for grade in grades:
-                if grade['subject'] not in subject_groups:
-                    subject_groups[grade['subject']] = []
-                subject_groups[grade['subject']].append(grade)
-            
-            response = f"📚 **Academic Performance - {student['name']}**\n\n"
-            
-            for subject_name, subject_grades in subject_groups.items():
-                latest_grade = subject_grades[0]
-                average = sum(g['score'] / g['max_score'] * 100 for g in subject_grades) / len(subject_grades)
-                
-                response += f"**{subject_name.upper()}**\n"
-                response += f"- 📝 **Latest Test**: {latest_grade['score']}/{latest_grade['max_score']} ({round(latest_grade['score']/latest_grade['max_score']*100)}%)\n"
-                response += f"- 📊 **Term Average**: {round(average)}%\n"
-                response += f"- 👨‍🏫 **Teacher**: {latest_grade['teacher_name']}\n"
-                response += f"- 📅 **Last Updated**: {latest_grade['date']}\n\n"
-            
-            overall_average = sum(g['score'] / g['max_score'] * 100 for g in grades) / len(grades)
-            response += f"📈 **Overall Performance**: {round(overall_average)}%\n\n"
-            
-            if overall_average < 60:
-                response += "🎯 **Areas for Improvement**: Performance below 60% indicates need for additional support. Consider speaking with teachers about tutoring options.\n\n"
-            
-            response += "Need more details about specific subjects or test dates?"
-            
-            return response
-            
-        except Exception as e:
-            print(f"Error handling grade query: {str(e)}")
-            return "❌ I encountered an error retrieving grade information. Please try again or contact the school office."
+        
+        response = f"📚 **Academic Performance - {student['name']}**\n\n"
+        
+        for subject_grade in grade_summary['subjects']:
+            latest_score = subject_grade['latest_score']
+            latest_max_score = subject_grade['latest_max_score']
+            
+            response += f"**{subject_grade['subject'].upper()}**\n"
+            response += f"- 📝 **Latest Test**: {latest_score}/{latest_max_score} ({round(latest_score/latest_max_score*100)}%)\n"
+            response += f"- 📊 **Term Average**: {round(subject_grade['average'])}%\n"
+            response += f"- 👨‍🏫 **Teacher**: {subject_grade['teacher_name']}\n"
+            response += f"- 📅 **Last Updated**: {subject_grade['latest_date']}\n\n"
+        
+        overall_average = grade_summary['overall_average']
+        response += f"📈 **Overall Performance**: {round(overall_average)}%\n\n"
+        
+        if overall_average < 60:
+            response += "🎯 **Areas for Improvement**: Performance below 60% indicates need for additional support. Consider speaking with teachers about tutoring options.\n\n"
+        
+        response += "Need more details about specific subjects or test dates?"
+        
+        return response
     
-    def _handle_schedule_query(self, context: Dict[str, Any], message: str) -> str:
-        try:
-            student = self.db.get_student_by_parent(context['parent_email'], context['current_student'])
-            
-            if not student:
-                return "❌ I couldn't find a student record associated with your account. Please verify your student ID and try again."
-            
-            schedule = self.db.get_class_schedule(student['class'], student['section'])
-            
-            if not schedule:
-                return f"""📅 **Class Schedule - {student['class']}-{student['section']}**
+    async def _handle_schedule_query(self, context: Dict[str, Any], message: str,
+                                     schedule: Optional[List[Dict[str, Any]]] = None) -> str:
+        student = await self._get_student(context)
+        
+        if not student:
+            return "❌ I couldn't find a student record associated with your account. Please verify your student ID and try again."
+        
+        if schedule is None:
+            schedule = await context['db'].get_class_schedule(student['class'], student['section'])
+        
+        if not schedule:
+            return f"""📅 **Class Schedule - {student['class']}-{student['section']}**
 
 No schedule information available in our current records.
 
 Please contact the school office for the latest timetable information."""
-            
-            days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-            response = f"📅 **Class Schedule for {student['class']}-{student['section']}**\n\n"
-            
-            for day in days:
-                day_schedule = [s for s in schedule if s['day_of_week'].lower() == day.lower()]
-                if day_schedule:
-                    response += f"**{day}**\n"
-                    day_schedule.sort(key=lambda x: x['start_time'])
-                    for period in day_schedule:
-                        room_info = f" | Room {period['room']}" if period['room'] else ""
-                        response += f"{period['start_time']} - {period['end_time']} | {period['subject']} | {period['teacher_name']}{room_info}\n"
-                    response += "\n"
-            
-            response += "📞 **Need to contact a teacher?** Ask me for teacher contact information!\n"
-            response += "📚 **Want to know about upcoming tests?** I can help with exam schedules too!"
-            
-            return response
-            
-        except Exception as e:
-            print(f"Error handling schedule query: {str(e)}")
-            return "❌ I encountered an error retrieving schedule information. Please try again or contact the school office."
+        
+        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+        response = f"📅 **Class Schedule for {student['class']}-{student['section']}**\n\n"
+        
+        for day in days:
+            day_schedule = [s for s in schedule if s['day_of_week'].lower() == day.lower()]
+            if day_schedule:
+                response += f"**{day}**\n"
+                day_schedule.sort(key=lambda x: x['start_time'])
+                for period in day_schedule:
+                    room_info = f" | Room {period['room']}" if period['room'] else ""
+                    response += f"{period['start_time']} - {period['end_time']} | {period['subject']} | {period['teacher_name']}{room_info}\n"
+                response += "\n"
+        
+        response += "📞 **Need to contact a teacher?** Ask me for teacher contact information!\n"
+        response += "📚 **Want to know about upcoming tests?** I can help with exam schedules too!"
+        
+        return response
     
-    def _handle_teacher_query(self, context: Dict[str, Any], message: str) -> str:
-        try:
-            student = self.db.get_student_by_parent(context['parent_email'], context['current_student'])
-            
-            if not student:
-                return "❌ I couldn't find a student record associated with your account. Please verify your student ID and try again."
-            
-            schedule = self.db.get_class_schedule(student['class'], student['section'])
-            
-            if not schedule:
-                return f"""👨‍🏫 **Teacher Information**
+    async def _handle_teacher_query(self, context: Dict[str, Any], message: str,
+                                    schedule: Optional[List[Dict[str, Any]]] = None) -> str:
+        student = await self._get_student(context)
+        
+        if not student:
+            return "❌ I couldn't find a student record associated with your account. Please verify your student ID and try again."
+        
+        if schedule is None:
+            schedule = await context['db'].get_class_schedule(student['class'], student['section'])
+        
+        if not schedule:
+            return f"""👨‍🏫 **Teacher Information**
 
 No teacher information available in our current records for class {student['class']}-{student['section']}.
 
 Please contact the school office for teacher contact details."""
-            
-            teachers = {}
-            for s in schedule:
-                if s['teacher_id'] not in teachers:
-                    teachers[s['teacher_id']] = {
-                        'name': s['teacher_name'],
-                        'subjects': set()
-                    }
-                teachers[s['teacher_id']]['subjects'].add(s['subject'])
-            
-            response = f"👨‍🏫 **Teacher Information for Class {student['class']}-{student['section']}**\n\n"
-            
-            for teacher in teachers.values():
-                response += f"**{teacher['name']}**\n"
-                response += f"- 📚 **Subjects**: {', '.join(teacher['subjects'])}\n"
-                response += f"- 📞 **Contact**: Available through school office\n"
-                response += f"- 📧 **Email**: Contact school office for email address\n\n"
-            
-            response += "📞 **School Office Contact**: For direct teacher contact information\n"
-            response += "⏰ **Office Hours**: Monday-Friday, 8:00 AM - 4:00 PM\n\n"
-            response += "💡 **Tip**: For parent-teacher meetings, please contact the school office to schedule appointments."
-            
-            return response
-            
-        except Exception as e:
-            print(f"Error handling teacher query: {str(e)}")
-            return "❌ I encountered an error retrieving teacher information. Please try again or contact the school office."
+        
+        teachers = {}
+        for s in schedule:
+            if s['teacher_id'] not in teachers:
+                teachers[s['teacher_id']] = {
+                    'name': s['teacher_name'],
+                    'subjects': set()
+                }
+            teachers[s['teacher_id']]['subjects'].add(s['subject'])
+        
+        response = f"👨‍🏫 **Teacher Information for Class {student['class']}-{student['section']}**\n\n"
+        
+        for teacher in teachers.values():
+            response += f"**{teacher['name']}**\n"
+            response += f"- 📚 **Subjects**: {', '.join(teacher['subjects'])}\n"
+            response += f"- 📞 **Contact**: Available through school office\n"
+            response += f"- 📧 **Email**: Contact school office for email address\n\n"
+        
+        response += "📞 **School Office Contact**: For direct teacher contact information\n"
+        response += "⏰ **Office Hours**: Monday-Friday, 8:00 AM - 4:00 PM\n\n"
+        response += "💡 **Tip**: For parent-teacher meetings, please contact the school office to schedule appointments."
+        
+        return response
     
     def _handle_general_school_query(self, context: Dict[str, Any], message: str) -> str:
         lower_message = message.lower()
@@ -454,22 +585,3 @@ I'm here to help you stay informed about your child's academic progress and scho
 Just ask me about attendance, grades, schedules, or any school-related questions!
 
 Example: "Show me this week's attendance" or "What are the latest math scores?\""""
-    
-    def _is_greeting(self, message: str) -> bool:
-        greetings = ['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening', 'start', 'begin']
-        return any(greeting in message for greeting in greetings)
-    
-    def _is_attendance_query(self, message: str) -> bool:
-        return any(word in message for word in ['attendance', 'absent', 'present', 'late'])
-    
-    def _is_grade_query(self, message: str) -> bool:
-        return any(word in message for word in ['grade', 'score', 'mark', 'test', 'exam', 'performance'])
-    
-    def _is_schedule_query(self, message: str) -> bool:
-        return any(word in message for word in ['schedule', 'timetable', 'class', 'time', 'when'])
-    
-    def _is_teacher_query(self, message: str) -> bool:
-        return any(word in message for word in ['teacher', 'instructor', 'contact', 'email'])
-    
-    def _is_general_school_query(self, message: str) -> bool:
-        return any(word in message for word in ['policy', 'rule', 'fee', 'event', 'program', 'school'])
\ No newline at end of file
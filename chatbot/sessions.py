@@ -0,0 +1,192 @@
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Sessions kept in memory per process; older ones are reloaded from chat_messages
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "5000"))
+# Seconds of inactivity after which a session is dropped from memory
+SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))
+# Approximate bytes of resident conversation history across all sessions
+SESSION_MEMORY_LIMIT = int(os.getenv("SESSION_MEMORY_LIMIT", str(64 * 1024 * 1024)))
+# Most recent messages kept in a resident session's history
+SESSION_HISTORY_LIMIT = int(os.getenv("SESSION_HISTORY_LIMIT", "50"))
+# Seconds a session trusts its cached student record before checking the roster version
+SESSION_STUDENT_RECHECK = float(os.getenv("SESSION_STUDENT_RECHECK", "30"))
+
+# Rough per-message cost of the dict, its keys and the timestamp string
+MESSAGE_OVERHEAD = 400
+SESSION_OVERHEAD = 1024
+
+EMAIL_PATTERN = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+# A bare number, or "<school_id>-<number>" as routed by models.sharding
+STUDENT_ID_PATTERN = re.compile(r'\b(?:[A-Za-z0-9_]{1,64}-)?\d{4,}\b')
+
+def message_size(message: Dict[str, Any]) -> int:
+    return MESSAGE_OVERHEAD + len(message.get('content') or '')
+
+def replay_authentication(context: Dict[str, Any], history: List[Dict[str, Any]]) -> None:
+    """Restore the chat login from a stored transcript.
+
+    Until a session is authenticated every user message goes through the
+    bot's authentication step, which accepts the first message carrying
+    both an email address and a student id; the same message in the
+    transcript therefore yields the same login.
+    """
+    for message in history:
+        if message['role'] != 'user':
+            continue
+        email_match = EMAIL_PATTERN.search(message['content'])
+        student_id_match = STUDENT_ID_PATTERN.search(message['content'])
+        if email_match and student_id_match:
+            context['parent_email'] = email_match.group()
+            context['current_student'] = student_id_match.group()
+            context['is_authenticated'] = True
+            return
+
+class SessionStore:
+    """Bounded in-memory chat session contexts, least recently used first out.
+
+    A session leaves memory when it has been idle for ``ttl`` seconds, when
+    more than ``maxsize`` sessions are resident, or when their histories
+    together exceed ``max_bytes``. Transcripts are persisted separately, so
+    an evicted session is rebuilt by ``load`` the next time it is used. Only
+    the last ``history_limit`` messages of a session are kept resident.
+
+    All methods run on the event loop thread.
+    """
+
+    def __init__(self, maxsize: int = SESSION_CACHE_SIZE, ttl: float = SESSION_TTL,
+                 max_bytes: int = SESSION_MEMORY_LIMIT, history_limit: int = SESSION_HISTORY_LIMIT):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.history_limit = history_limit
+        # session_id -> [expires_at, size, context]
+        self._sessions: "OrderedDict[str, list]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.created = 0
+        self.rehydrated = 0
+        self.evictions = {'ttl': 0, 'size': 0, 'memory': 0}
+        # Authorized student lookups served from the session vs. read from the database
+        self.student_hits = 0
+        self.student_loads = 0
+
+    async def get(self, session_id: str,
+                  load: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+                  create: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Resident context for ``session_id``, else ``load()``, else ``create()``.
+
+        Concurrent misses for the same session share one ``load`` call.
+        """
+        now = time.monotonic()
+        entry = self._sessions.get(session_id)
+        if entry is not None and entry[0] > now:
+            entry[0] = now + self.ttl
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return entry[2]
+        if entry is not None:
+            self._remove(session_id, 'ttl')
+
+        pending = self._loading.get(session_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._loading[session_id] = pending
+        try:
+            context = await load()
+            if context is None:
+                context = create()
+                self.created += 1
+            else:
+                self.rehydrated += 1
+            self._trim(context)
+            self._insert(session_id, context)
+            pending.set_result(context)
+            return context
+        except BaseException as e:
+            pending.set_exception(e)
+            # Waiters get the error; nobody else needs to retrieve it
+            pending.exception()
+            raise
+        finally:
+            del self._loading[session_id]
+
+    def record(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Append ``messages`` to a resident session's history."""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return
+        history = entry[2]['conversation_history']
+        history.extend(messages)
+        self._resize(entry)
+        self._evict()
+
+    def discard(self, session_id: str) -> None:
+        if session_id in self._sessions:
+            self._remove(session_id, None)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _trim(self, context: Dict[str, Any]) -> None:
+        history = context['conversation_history']
+        if len(history) > self.history_limit:
+            del history[:len(history) - self.history_limit]
+
+    def _resize(self, entry: list) -> None:
+        self._trim(entry[2])
+        size = SESSION_OVERHEAD + sum(message_size(m) for m in entry[2]['conversation_history'])
+        self.bytes += size - entry[1]
+        entry[1] = size
+
+    def _insert(self, session_id: str, context: Dict[str, Any]) -> None:
+        entry = [time.monotonic() + self.ttl, 0, context]
+        self._sessions[session_id] = entry
+        self._resize(entry)
+        self._evict()
+
+    def _remove(self, session_id: str, reason: Optional[str]) -> None:
+        entry = self._sessions.pop(session_id)
+        self.bytes -= entry[1]
+        if reason is not None:
+            self.evictions[reason] += 1
+
+    def _evict(self) -> None:
+        # Least recently used sessions are first, so expired ones are too
+        now = time.monotonic()
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if entry[0] <= now:
+                self._remove(session_id, 'ttl')
+            elif len(self._sessions) > max(self.maxsize, 1):
+                self._remove(session_id, 'size')
+            elif self.bytes > self.max_bytes and len(self._sessions) > 1:
+                # The session being served is the most recent and always stays
+                self._remove(session_id, 'memory')
+            else:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'resident': len(self._sessions),
+            'maxsize': self.maxsize,
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'created': self.created,
+            'rehydrated': self.rehydrated,
+            'evictions': dict(self.evictions),
+            'student_hits': self.student_hits,
+            'student_loads': self.student_loads,
+        }
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from models.async_database import AsyncDatabase
+
+# Longest a chat turn waits in memory before its transcript is committed; 0 writes every turn through
+TRANSCRIPT_FLUSH_INTERVAL = float(os.getenv("TRANSCRIPT_FLUSH_INTERVAL", "0.2"))
+# Queued messages that trigger a flush without waiting for the interval
+TRANSCRIPT_FLUSH_SIZE = int(os.getenv("TRANSCRIPT_FLUSH_SIZE", "256"))
+# Queued messages at which chat turns wait for the flush instead of queueing more
+TRANSCRIPT_MAX_PENDING = int(os.getenv("TRANSCRIPT_MAX_PENDING", "10000"))
+# Failed commits of one session's messages before they are dropped
+TRANSCRIPT_MAX_ATTEMPTS = int(os.getenv("TRANSCRIPT_MAX_ATTEMPTS", "5"))
+
+logger = logging.getLogger(__name__)
+
+class TranscriptWriter:
+    """Write-behind persistence of chat transcripts.
+
+    ``append`` only queues a turn's messages, so replies no longer wait for
+    a commit. Turns for the same session are coalesced, and a background
+    task commits everything queued for a shard in one
+    ``append_chat_messages_batch`` transaction every ``interval`` seconds,
+    or as soon as ``flush_size`` messages are waiting.
+
+    When a shard's batch fails, its sessions are committed one at a time
+    so a single bad session cannot hold back the rest. A session that still
+    fails is put back in front of its newer messages and retried on the
+    next flush; after ``max_attempts`` failed commits its queued messages
+    are dropped, logged and counted in ``dead_lettered``.
+
+    Each message's seq is assigned inside its INSERT under the unique
+    (session_id, seq) index, so writers in other processes can never store
+    a duplicate or leave a gap: the loser of such a race fails and is
+    retried. Turns are queued in the order a process handled them, but
+    turns of one session served by different workers are ordered by when
+    each worker commits.
+
+    ``close`` commits whatever is left and must run before the databases
+    are closed. A process that is killed outright loses at most the last
+    ``interval`` of turns.
+    """
+
+    def __init__(self, interval: float = TRANSCRIPT_FLUSH_INTERVAL, flush_size: int = TRANSCRIPT_FLUSH_SIZE,
+                 max_pending: int = TRANSCRIPT_MAX_PENDING, max_attempts: int = TRANSCRIPT_MAX_ATTEMPTS):
+        self.interval = interval
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        # db -> session_id -> messages, in the order they were queued
+        self._pending: Dict[AsyncDatabase, Dict[str, List[Dict[str, Any]]]] = {}
+        self._flushing: Dict[AsyncDatabase, Dict[str, List[Dict[str, Any]]]] = {}
+        # db -> session_id -> failed commits of the messages now queued for it
+        self._attempts: Dict[AsyncDatabase, Dict[str, int]] = {}
+        self._count = 0
+        self._task: Optional[asyncio.Task] = None
+        self._queued: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.closed = False
+        self.flushed = 0
+        self.batches = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.dead_lettered = 0
+        self.max_batch = 0
+
+    async def append(self, db: AsyncDatabase, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        if self.interval <= 0 or self.closed:
+            await db.append_chat_messages(session_id, messages)
+            return
+
+        self._start()
+        transcripts = self._pending.setdefault(db, {})
+        if session_id in transcripts:
+            self.coalesced += 1
+        transcripts.setdefault(session_id, []).extend(messages)
+        self._count += len(messages)
+        self._queued.set()
+
+        if self._count >= self.flush_size:
+            self._full.set()
+        if self._count >= self.max_pending:
+            # The database is falling behind; hold this turn until it catches up
+            await self.flush()
+
+    async def sync(self, db: AsyncDatabase, session_id: str) -> None:
+        """Commit anything still queued for ``session_id`` before its transcript is read back."""
+        if session_id in self._pending.get(db, {}) or session_id in self._flushing.get(db, {}):
+            await self.flush()
+
+    async def flush(self) -> None:
+        self._start()
+        async with self._lock:
+            batch, self._pending, self._count = self._pending, {}, 0
+            self._flushing = batch
+            try:
+                for db, transcripts in batch.items():
+                    try:
+                        appended = await db.append_chat_messages_batch(transcripts)
+                    except Exception as e:
+                        self.failures += 1
+                        logger.warning(f"Transcript flush of {len(transcripts)} sessions failed, "
+                                       f"retrying them one at a time: {e}")
+                        await self._flush_sessions(db, transcripts)
+                        continue
+                    self.flushed += appended
+                    self.batches += 1
+                    self.max_batch = max(self.max_batch, appended)
+                    self._attempts.pop(db, None)
+            finally:
+                self._flushing = {}
+            if self._count:
+                # Retry failed sessions after the next interval
+                self._queued.set()
+
+    async def close(self) -> None:
+        self.closed = True
+        if self._task is not None:
+            self._queued.set()
+            self._full.set()
+            await self._task
+            self._task = None
+        if self._pending:
+            await self.flush()
+        if self._count:
+            logger.error(f"Shutting down with {self._count} chat messages not persisted")
+
+    async def _flush_sessions(self, db: AsyncDatabase, transcripts: Dict[str, List[Dict[str, Any]]]) -> None:
+        attempts = self._attempts.setdefault(db, {})
+        for session_id, messages in transcripts.items():
+            try:
+                self.flushed += await db.append_chat_messages(session_id, messages)
+            except Exception as e:
+                attempts[session_id] = attempts.get(session_id, 0) + 1
+                if attempts[session_id] < self.max_attempts:
+                    self._requeue(db, session_id, messages)
+                    continue
+                del attempts[session_id]
+                self.dead_lettered += len(messages)
+                logger.error(f"Dropping {len(messages)} chat messages of session {session_id} "
+                             f"after {self.max_attempts} failed commits: {e}")
+            else:
+                attempts.pop(session_id, None)
+        if not attempts:
+            del self._attempts[db]
+
+    def _requeue(self, db: AsyncDatabase, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        pending = self._pending.setdefault(db, {})
+        pending[session_id] = messages + pending.get(session_id, [])
+        self._count += len(messages)
+
+    def _start(self) -> None:
+        # Created on first use so they belong to the loop serving requests
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._queued = asyncio.Event()
+            self._full = asyncio.Event()
+        if self._task is None and not self.closed:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self.closed:
+            await self._queued.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._queued.clear()
+            self._full.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Transcript flush failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending': self._count,
+            'flushed': self.flushed,
+            'batches': self.batches,
+            'coalesced': self.coalesced,
+            'failures': self.failures,
+            'retrying': sum(len(attempts) for attempts in self._attempts.values()),
+            'dead_lettered': self.dead_lettered,
+            'max_batch': self.max_batch,
+            'interval': self.interval,
+        }
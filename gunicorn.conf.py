@@ -0,0 +1,40 @@
+"""Production server settings: ``gunicorn -c gunicorn.conf.py main:app``.
+
+Every setting can be overridden from the environment so the same image
+runs on any box size.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Proxies whose X-Forwarded-For is trusted for the client address
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# Import main.py once in the master so workers fork with the code already
+# loaded; database shards and the bcrypt pool are created per worker by the
+# lifespan handler after the fork
+preload_app = True
+
+# Queued connections the kernel accepts while every worker is busy
+backlog = int(os.getenv("BACKLOG", "2048"))
+# Longer than the 60 s keepalive_timeout nginx.conf sets for its upstream
+# connections, so the proxy closes idle ones first and never reuses one the
+# worker is tearing down
+keepalive = int(os.getenv("KEEPALIVE", "75"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+# Time a worker gets after SIGTERM to finish the requests it is serving
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+# Recycle workers now and then; the jitter stops them restarting together
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "0"))
+
+# "-" logs requests to stdout; empty disables the access log
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+# Each worker owns a bcrypt process pool; share the cores between them
+# instead of letting every worker start one per core
+os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, multiprocessing.cpu_count() // workers)))
@@ -1,24 +1,43 @@
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, Query
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.security import HTTPAuthorizationCredentials
 from datetime import datetime, timedelta
+from email.utils import formatdate, parsedate_tz, mktime_tz
+import hashlib
 import os
+import asyncio
 from dotenv import load_dotenv
 import logging
+import time
 import uuid
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
 
-from models.database import Database
+from models.async_database import AsyncDatabase
+from models.sharding import ShardRouter
+from models.storage import schedule_scopes, version_scope
+from models.serialization import (
+    ndjson_stream, trusted_rows, trusted_row, encode_cursor, decode_cursor, FastJSONResponse,
+    FAST_RESPONSES, GZIP_MIN_SIZE, GZIP_LEVEL
+)
 from models.schemas import (
-    LoginRequest, LoginResponse, ChatSessionRequest, ChatSessionResponse,
-    ChatMessageRequest, ChatMessageResponse, StudentInfo, AttendanceResponse,
-    GradeResponse, ScheduleResponse, HealthResponse, ErrorResponse
+    LoginRequest, LoginResponse, RefreshRequest, TokenResponse, LogoutResponse,
+    ChatSessionRequest, ChatSessionResponse, ChatMessageRequest, ChatMessageResponse,
+    StudentInfo, AttendanceRecord, AttendanceSummary, AttendanceResponse, Grade, GradeResponse,
+    ScheduleItem, ScheduleResponse, StudentDashboard, DashboardsResponse, HealthResponse,
+    MetricsResponse, ErrorResponse
+)
+from auth.auth import (
+    create_access_token, verify_password, get_current_user, create_refresh_token,
+    hash_refresh_token, refresh_token_expiry, revoke_access_token, optional_security,
+    revocation_stats, token_cache, ACCESS_TOKEN_EXPIRE_HOURS
 )
-from auth.auth import create_access_token, verify_password, get_current_user
+from auth.hashing import PasswordHasherBusy, get_password_hasher
+from auth.rate_limit import get_rate_limiter, rate_limit
 from chatbot.school_bot import SchoolBot
 
 load_dotenv()
@@ -27,13 +46,45 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared database shards and chatbot once per process."""
+    start = time.perf_counter()
+    
+    # Opening shards runs schema checks and DDL, so keep it off the event loop
+    shards = await asyncio.to_thread(ShardRouter)
+    app.state.shards = shards
+    app.state.school_bot = SchoolBot()
+    
+    cold = [school_id for school_id, shard in shards.opened().items() if shard.db.schema_initialized]
+    app.state.startup = {
+        "seconds": round(time.perf_counter() - start, 4),
+        "shards": len(shards.schools()),
+        "schema_initialized": cold,
+    }
+    logger.info(
+        f"Startup completed in {app.state.startup['seconds'] * 1000:.0f} ms "
+        f"({len(cold)} of {len(shards.schools())} shards needed schema setup)"
+    )
+    
+    yield
+    
+    # The server has finished every request by now; commit queued
+    # transcripts while the shards are still open
+    await app.state.school_bot.transcripts.close()
+    
+    shards.close()
+    get_password_hasher().close()
+    get_rate_limiter().close()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="SchoolBot API",
     description="A secure chatbot system for school parent-teacher interactions",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -45,14 +96,156 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+if GZIP_MIN_SIZE > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
+
+def get_shards(request: Request) -> ShardRouter:
+    return request.app.state.shards
+
+def get_school_bot(request: Request) -> SchoolBot:
+    return request.app.state.school_bot
+
+def shard_for(shards: ShardRouter, current_user: dict, student_id: str = None) -> AsyncDatabase:
+    """Database of the school the token (or the student id prefix) belongs to."""
+    try:
+        return shards.for_claims(current_user, student_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Student not found or access denied")
+
+def token_payload(shards: ShardRouter, school_id: str, email: str, student_ids: str, refresh_token: str) -> dict:
+    return {
+        "access_token": create_access_token(data=shards.claims_for(school_id, email, student_ids)),
+        "expires_in": ACCESS_TOKEN_EXPIRE_HOURS * 3600,
+        "refresh_token": refresh_token,
+    }
+
+DASHBOARD_FIELDS = ("info", "attendance", "grades", "schedule")
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+conditional_stats = {"checked": 0, "not_modified": 0}
+
+async def data_version_headers(db: AsyncDatabase, scopes: List[str], *params) -> Dict[str, str]:
+    """Validators for a read of ``scopes``.
+    
+    The ETag hashes the scopes' data versions with the query parameters, so a
+    repeat load is decided by one indexed lookup instead of rebuilding the body.
+    """
+    return version_headers(scopes, await db.get_data_versions(scopes), *params)
+
+def version_headers(scopes: List[str], versions: Dict[str, Dict[str, int]], *params) -> Dict[str, str]:
+    """Validators for a body read at ``versions`` of ``scopes``."""
+    key = repr((app.version, [(scope, versions.get(scope)) for scope in scopes], params))
+    headers = {
+        "ETag": f'W/"{hashlib.sha256(key.encode()).hexdigest()[:32]}"',
+        # Per-parent data: browsers may keep it but must revalidate every time
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization",
+    }
+    updated_at = max((version['updated_at'] for version in versions.values()), default=0)
+    if updated_at:
+        headers["Last-Modified"] = formatdate(updated_at, usegmt=True)
+    return headers
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no ETag was sent."""
+    conditional_stats["checked"] += 1
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = _opaque_tag(headers["ETag"])
+        matched = any(tag.strip() == "*" or _opaque_tag(tag) == etag for tag in if_none_match.split(","))
+    else:
+        if_modified_since = parsedate_tz(request.headers.get("if-modified-since") or "")
+        last_modified = parsedate_tz(headers.get("Last-Modified", ""))
+        matched = bool(if_modified_since and last_modified) and mktime_tz(last_modified) <= mktime_tz(if_modified_since)
+    
+    if matched:
+        conditional_stats["not_modified"] += 1
+    return matched
+
+def parse_fields(fields: str) -> set:
+    selected = {field.strip() for field in fields.split(',') if field.strip()}
+    if not selected or not selected <= set(DASHBOARD_FIELDS):
+        raise HTTPException(
+            status_code=422,
+            detail=f"fields must be a comma-separated subset of: {', '.join(DASHBOARD_FIELDS)}"
+        )
+    return selected
+
+def page_request(limit: Optional[int], cursor: Optional[str],
+                 response_format: str) -> Tuple[Optional[int], Optional[Tuple[str, int]]]:
+    """Page size and keyset position for a listing; ``(None, None)`` means the whole range."""
+    if limit is None and cursor is None:
+        return None, None
+    if response_format != "json":
+        raise HTTPException(status_code=400, detail="Pagination is only supported with format=json")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return limit or DEFAULT_PAGE_SIZE, after
+
+def split_page(rows: list, limit: int) -> Tuple[list, Optional[str]]:
+    """Trim the look-ahead row fetched past ``limit`` and turn it into ``next_cursor``."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+def default_date_range(start_date: str = None, end_date: str = None) -> tuple:
+    if not start_date or not end_date:
+        end_date = datetime.now().strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+    return start_date, end_date
+
+def schedule_items(schedule: list) -> list:
+    # Convert 'class' field to 'class_name' for the response
+    for item in schedule:
+        item['class_name'] = item.pop('class', '')
+    return schedule
 
-# Initialize database and chatbot
-db = Database()
-school_bot = SchoolBot()
+async def build_dashboard(db: AsyncDatabase, student: dict, fields: set,
+                          start_date: str, end_date: str) -> StudentDashboard:
+    """Fetch the requested sections for an already authorized student concurrently."""
+    student_id = student['student_id']
+    sections = {}
+    
+    if "attendance" in fields:
+        sections["attendance"] = asyncio.gather(
+            db.get_attendance(student_id, start_date, end_date),
+            db.get_attendance_summary(student_id, start_date, end_date)
+        )
+    if "grades" in fields:
+        sections["grades"] = db.get_grades(student_id)
+    if "schedule" in fields:
+        sections["schedule"] = db.get_class_schedule(student['class'], student['section'])
+    
+    results = dict(zip(sections, await asyncio.gather(*sections.values())))
+    
+    # Only requested sections are set, so the response omits the rest
+    dashboard = {"student_id": student_id}
+    if "info" in fields:
+        dashboard["info"] = StudentInfo(
+            student_id=student_id,
+            name=student['name'],
+            class_name=student['class'],
+            section=student['section']
+        )
+    if "attendance" in results:
+        attendance, summary = results["attendance"]
+        dashboard["attendance"] = AttendanceResponse(attendance=attendance, summary=summary)
+    if "grades" in results:
+        dashboard["grades"] = results["grades"]
+    if "schedule" in results:
+        dashboard["schedule"] = schedule_items(results["schedule"])
+    
+    return StudentDashboard(**dashboard)
 
 # Templates
 templates = Jinja2Templates(directory="templates")
@@ -64,61 +257,141 @@ app.mount("/static", StaticFiles(directory="templates"), name="static")
 async def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
-@app.post("/api/auth/login", response_model=LoginResponse)
-@limiter.limit("5/minute")
-async def login(request: Request, login_data: LoginRequest):
+# Logins have no token yet, so they are limited per client IP
+@app.post("/api/auth/login", response_model=LoginResponse,
+          dependencies=[Depends(rate_limit("login", "5/minute", per_user=False))])
+async def login(request: Request, login_data: LoginRequest, shards: ShardRouter = Depends(get_shards)):
     try:
-        user = db.authenticate_parent(login_data.email, login_data.password)
+        try:
+            school_id, user = await shards.authenticate(
+                login_data.email, login_data.password, login_data.school_id
+            )
+        except KeyError:
+            school_id, user = None, None
+        except PasswordHasherBusy:
+            raise HTTPException(status_code=503, detail="Too many login attempts in progress, please retry",
+                                headers={"Retry-After": "1"})
         
         if user:
-            access_token = create_access_token(
-                data={"sub": login_data.email, "student_ids": user['student_ids']}
+            refresh_token = create_refresh_token(shards.refresh_token_prefix(school_id))
+            await shards.get(school_id).insert_refresh_token(
+                hash_refresh_token(refresh_token), login_data.email, refresh_token_expiry()
             )
             return LoginResponse(
-                access_token=access_token,
+                **token_payload(shards, school_id, login_data.email, user['student_ids'], refresh_token),
                 student_ids=user['student_ids'].split(','),
                 message="Login successful"
             )
         else:
             raise HTTPException(status_code=401, detail="Invalid credentials")
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Login error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@app.post("/api/chat/session", response_model=ChatSessionResponse)
-@limiter.limit("10/minute")
+@app.post("/api/auth/refresh", response_model=TokenResponse,
+          dependencies=[Depends(rate_limit("refresh", "30/minute", per_user=False))])
+async def refresh(request: Request, refresh_data: RefreshRequest, shards: ShardRouter = Depends(get_shards)):
+    try:
+        try:
+            school_id = shards.school_for_refresh_token(refresh_data.refresh_token)
+            db = shards.get(school_id)
+        except KeyError:
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+        
+        # A keyed hash and one indexed lookup; no bcrypt on this path
+        refresh_token = create_refresh_token(shards.refresh_token_prefix(school_id))
+        token = await db.rotate_refresh_token(
+            hash_refresh_token(refresh_data.refresh_token),
+            hash_refresh_token(refresh_token),
+            refresh_token_expiry()
+        )
+        if not token:
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+        
+        # Re-read links so a removed student drops out of the next access token
+        student_ids = await db.get_parent_student_ids(token['parent_email'])
+        
+        return TokenResponse(
+            **token_payload(shards, school_id, token['parent_email'], ','.join(student_ids), refresh_token),
+            student_ids=student_ids
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Refresh error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.post("/api/auth/logout", response_model=LogoutResponse)
+async def logout(
+    refresh_data: RefreshRequest,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    shards: ShardRouter = Depends(get_shards)
+):
+    try:
+        if credentials:
+            await revoke_access_token(shards, credentials.credentials)
+    except KeyError:
+        pass
+    except Exception as e:
+        logger.error(f"Logout error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    try:
+        db = shards.get(shards.school_for_refresh_token(refresh_data.refresh_token))
+        await db.revoke_refresh_token(hash_refresh_token(refresh_data.refresh_token))
+    except KeyError:
+        pass
+    except Exception as e:
+        logger.error(f"Logout error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    return LogoutResponse(message="Logged out")
+
+@app.post("/api/chat/session", response_model=ChatSessionResponse,
+          dependencies=[Depends(rate_limit("chat_session", "10/minute"))])
 async def create_chat_session(
     request: Request,
     session_data: ChatSessionRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    shards: ShardRouter = Depends(get_shards)
 ):
     try:
         session_id = str(uuid.uuid4())
+        db = shard_for(shards, current_user, session_data.student_id)
         
-        db.create_chat_session(session_id, current_user["sub"], session_data.student_id)
+        await db.create_chat_session(session_id, current_user["sub"], session_data.student_id)
         
         return ChatSessionResponse(
             session_id=session_id,
             message="Chat session created successfully"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Create session error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@app.post("/api/chat/message", response_model=ChatMessageResponse)
-@limiter.limit("30/minute")
+@app.post("/api/chat/message", response_model=ChatMessageResponse,
+          dependencies=[Depends(rate_limit("chat_message", "30/minute"))])
 async def send_message(
     request: Request,
     message_data: ChatMessageRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    shards: ShardRouter = Depends(get_shards),
+    school_bot: SchoolBot = Depends(get_school_bot)
 ):
     try:
-        response = school_bot.process_message(
+        response = await school_bot.process_message(
             message_data.session_id,
             current_user["sub"],
-            message_data.message
+            message_data.message,
+            db=shard_for(shards, current_user),
+            route=lambda student_id: shards.for_claims(current_user, student_id)
         )
         
         return ChatMessageResponse(
@@ -126,6 +399,8 @@ async def send_message(
             timestamp=datetime.now()
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Send message error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -133,10 +408,12 @@ async def send_message(
 @app.get("/api/student/info", response_model=StudentInfo)
 async def get_student_info(
     student_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    shards: ShardRouter = Depends(get_shards)
 ):
     try:
-        student = db.get_student_by_parent(current_user["sub"], student_id)
+        db = shard_for(shards, current_user, student_id)
+        student = await db.get_student_by_parent(current_user["sub"], student_id)
         
         if not student:
             raise HTTPException(status_code=404, detail="Student not found or access denied")
@@ -156,30 +433,62 @@ async def get_student_info(
 
 @app.get("/api/student/attendance", response_model=AttendanceResponse)
 async def get_attendance(
+    request: Request,
+    response: Response,
     student_id: str,
     start_date: str = None,
     end_date: str = None,
-    current_user: dict = Depends(get_current_user)
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    shards: ShardRouter = Depends(get_shards)
 ):
     try:
-        student = db.get_student_by_parent(current_user["sub"], student_id)
+        page_size, after = page_request(limit, cursor, response_format)
+        db = shard_for(shards, current_user, student_id)
+        student = await db.get_student_by_parent(current_user["sub"], student_id)
         if not student:
             raise HTTPException(status_code=404, detail="Student not found or access denied")
         
-        if not start_date or not end_date:
-            end_date = datetime.now().strftime('%Y-%m-%d')
-            start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        start_date, end_date = default_date_range(start_date, end_date)
         
-        attendance = db.get_attendance(student_id, start_date, end_date)
+        headers = await data_version_headers(
+            db, [version_scope('attendance', student_id)], start_date, end_date, response_format, page_size, cursor
+        )
+        if not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
         
-        summary = {
-            "total_days": len(attendance),
-            "present": len([a for a in attendance if a['status'] == 'present']),
-            "absent": len([a for a in attendance if a['status'] == 'absent']),
-            "late": len([a for a in attendance if a['status'] == 'late'])
-        }
+        if response_format == "ndjson":
+            return StreamingResponse(
+                ndjson_stream(db.iter_attendance(student_id, start_date, end_date)),
+                media_type="application/x-ndjson",
+                headers=headers
+            )
+        
+        next_cursor = None
+        if page_size:
+            # The summary covers the whole range, independent of the page
+            attendance, summary = await asyncio.gather(
+                db.get_attendance_page(student_id, start_date, end_date, page_size + 1, after),
+                db.get_attendance_summary(student_id, start_date, end_date)
+            )
+            attendance, next_cursor = split_page(attendance, page_size)
+        else:
+            attendance, summary = await asyncio.gather(
+                db.get_attendance(student_id, start_date, end_date),
+                db.get_attendance_summary(student_id, start_date, end_date)
+            )
+        
+        if FAST_RESPONSES:
+            return FastJSONResponse({
+                "attendance": trusted_rows(AttendanceRecord, attendance),
+                "summary": trusted_row(AttendanceSummary, summary),
+                "next_cursor": next_cursor,
+            }, headers=headers)
         
-        return AttendanceResponse(attendance=attendance, summary=summary)
+        response.headers.update(headers)
+        return AttendanceResponse(attendance=attendance, summary=summary, next_cursor=next_cursor)
         
     except HTTPException:
         raise
@@ -189,18 +498,50 @@ async def get_attendance(
 
 @app.get("/api/student/grades", response_model=GradeResponse)
 async def get_grades(
+    request: Request,
+    response: Response,
     student_id: str,
     subject: str = None,
-    current_user: dict = Depends(get_current_user)
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    shards: ShardRouter = Depends(get_shards)
 ):
     try:
-        student = db.get_student_by_parent(current_user["sub"], student_id)
+        page_size, after = page_request(limit, cursor, response_format)
+        db = shard_for(shards, current_user, student_id)
+        student = await db.get_student_by_parent(current_user["sub"], student_id)
         if not student:
             raise HTTPException(status_code=404, detail="Student not found or access denied")
         
-        grades = db.get_grades(student_id, subject)
+        headers = await data_version_headers(
+            db, [version_scope('grades', student_id), version_scope('teachers')], subject, response_format, page_size, cursor
+        )
+        if not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
+        
+        if response_format == "ndjson":
+            return StreamingResponse(
+                ndjson_stream(db.iter_grades(student_id, subject)),
+                media_type="application/x-ndjson",
+                headers=headers
+            )
+        
+        next_cursor = None
+        if page_size:
+            grades = await db.get_grades_page(student_id, page_size + 1, subject, after)
+            grades, next_cursor = split_page(grades, page_size)
+        else:
+            grades = await db.get_grades(student_id, subject)
+        
+        if FAST_RESPONSES:
+            return FastJSONResponse(
+                {"grades": trusted_rows(Grade, grades), "next_cursor": next_cursor}, headers=headers
+            )
         
-        return GradeResponse(grades=grades)
+        response.headers.update(headers)
+        return GradeResponse(grades=grades, next_cursor=next_cursor)
         
     except HTTPException:
         raise
@@ -210,21 +551,30 @@ async def get_grades(
 
 @app.get("/api/student/schedule", response_model=ScheduleResponse)
 async def get_schedule(
+    request: Request,
+    response: Response,
     student_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    shards: ShardRouter = Depends(get_shards)
 ):
     try:
-        student = db.get_student_by_parent(current_user["sub"], student_id)
+        db = shard_for(shards, current_user, student_id)
+        student = await db.get_student_by_parent(current_user["sub"], student_id)
         if not student:
             raise HTTPException(status_code=404, detail="Student not found or access denied")
         
-        schedule = db.get_class_schedule(student['class'], student['section'])
+        # The body may come from the schedule cache, so the validators must
+        # come from the versions that cache entry was checked against
+        versions, schedule = await db.get_class_schedule_with_versions(student['class'], student['section'])
+        headers = version_headers(schedule_scopes(student['class'], student['section']), versions)
+        if not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
         
-        # Convert 'class' field to 'class_name' for the response
-        for item in schedule:
-            item['class_name'] = item.pop('class', '')
+        if FAST_RESPONSES:
+            return FastJSONResponse({"schedule": trusted_rows(ScheduleItem, schedule_items(schedule))}, headers=headers)
         
-        return ScheduleResponse(schedule=schedule)
+        response.headers.update(headers)
+        return ScheduleResponse(schedule=schedule_items(schedule))
         
     except HTTPException:
         raise
@@ -232,6 +582,68 @@ async def get_schedule(
         logger.error(f"Get schedule error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/api/student/dashboard", response_model=StudentDashboard, response_model_exclude_unset=True)
+async def get_dashboard(
+    student_id: str,
+    fields: str = ",".join(DASHBOARD_FIELDS),
+    start_date: str = None,
+    end_date: str = None,
+    current_user: dict = Depends(get_current_user),
+    shards: ShardRouter = Depends(get_shards)
+):
+    try:
+        selected = parse_fields(fields)
+        db = shard_for(shards, current_user, student_id)
+        student = await db.get_student_by_parent(current_user["sub"], student_id)
+        if not student:
+            raise HTTPException(status_code=404, detail="Student not found or access denied")
+        
+        start_date, end_date = default_date_range(start_date, end_date)
+        
+        return await build_dashboard(db, student, selected, start_date, end_date)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get dashboard error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/api/students/dashboard", response_model=DashboardsResponse, response_model_exclude_unset=True)
+async def get_dashboards(
+    student_ids: str = None,
+    fields: str = ",".join(DASHBOARD_FIELDS),
+    start_date: str = None,
+    end_date: str = None,
+    current_user: dict = Depends(get_current_user),
+    shards: ShardRouter = Depends(get_shards)
+):
+    """Dashboards for several (by default all) of the parent's children."""
+    try:
+        selected = parse_fields(fields)
+        db = shard_for(shards, current_user)
+        
+        # One query authorizes every child at once
+        students = await db.get_students_by_parent(current_user["sub"])
+        if student_ids:
+            requested = {student_id.strip() for student_id in student_ids.split(',') if student_id.strip()}
+            students = [student for student in students if student['student_id'] in requested]
+            if len(students) != len(requested):
+                raise HTTPException(status_code=404, detail="Student not found or access denied")
+        
+        start_date, end_date = default_date_range(start_date, end_date)
+        
+        dashboards = await asyncio.gather(*(
+            build_dashboard(db, student, selected, start_date, end_date) for student in students
+        ))
+        
+        return DashboardsResponse(students=dashboards)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get dashboards error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @app.get("/api/health", response_model=HealthResponse)
 async def health_check():
     return HealthResponse(
@@ -240,14 +652,41 @@ async def health_check():
         version="1.0.0"
     )
 
+@app.get("/api/metrics", response_model=MetricsResponse)
+async def metrics(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    shards: ShardRouter = Depends(get_shards)
+):
+    """Process internals; nginx.conf also keeps this route off the public server."""
+    return MetricsResponse(
+        timestamp=datetime.now(),
+        metrics={
+            "password_hasher": get_password_hasher().stats(),
+            "token_cache": token_cache.stats(),
+            "token_revocations": revocation_stats(),
+            "rate_limiter": get_rate_limiter().stats(),
+            "conditional_get": dict(conditional_stats),
+            "startup": request.app.state.startup,
+            "chat_sessions": request.app.state.school_bot.sessions.stats(),
+            "chat_reports": request.app.state.school_bot.reports.stats(),
+            "chat_transcripts": request.app.state.school_bot.transcripts.stats(),
+            **{
+                (name if school_id == shards.default_school else f"{name}:{school_id}"): values
+                for school_id, shard_metrics in shards.stats().items()
+                for name, values in shard_metrics.items()
+            }
+        }
+    )
+
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc: HTTPException):
-    return {"error": "Endpoint not found"}
+    return JSONResponse(status_code=404, content={"error": "Endpoint not found", "detail": exc.detail})
 
 @app.exception_handler(500)
 async def internal_error_handler(request: Request, exc: HTTPException):
     logger.error(f"Internal server error: {str(exc)}")
-    return {"error": "Internal server error"}
+    return JSONResponse(status_code=500, content={"error": "Internal server error"})
 
 if __name__ == "__main__":
     import uvicorn
@@ -255,6 +694,10 @@ if __name__ == "__main__":
     # Create data directory if it doesn't exist
     os.makedirs('data', exist_ok=True)
     
+    if os.getenv("FASTAPI_ENV") == "production":
+        # Pre-forked workers configured by gunicorn.conf.py
+        os.execvp("gunicorn", ["gunicorn", "-c", "gunicorn.conf.py", "main:app"])
+    
     # Run the application
     uvicorn.run(
         "main:app",
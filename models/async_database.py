@@ -0,0 +1,97 @@
+import asyncio
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from auth.hashing import PasswordHasher, get_password_hasher
+from models.storage import StorageBackend, create_database
+
+class AsyncDatabase:
+    """Awaitable facade over a storage backend (:class:`Database` by default).
+
+    Every public backend method is exposed as a coroutine that runs the
+    blocking SQLite call on a dedicated thread pool, so queries never run on
+    the event loop. Generator methods (``iter_*``) are passed through. A
+    semaphore bounds the number of in-flight queries to the size of that
+    pool.
+
+    Password hashing and verification go to a separate :class:`PasswordHasher`
+    so a burst of logins never occupies the database workers.
+    """
+
+    def __init__(self, db: Optional[StorageBackend] = None, max_workers: Optional[int] = None,
+                 hasher: Optional[PasswordHasher] = None):
+        self.db = db if db is not None else create_database()
+        self.hasher = hasher if hasher is not None else get_password_hasher()
+        self.max_workers = max_workers or max(self.db.pool_size, 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='db')
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+        self._waiting = 0
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking callable on the database executor."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._loop = loop
+
+        semaphore = self._semaphore
+        self._waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        try:
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        finally:
+            self._in_flight -= 1
+            semaphore.release()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.db, name)
+        # Generators are returned as-is: they only touch the database when
+        # iterated, and a streaming response iterates them off the loop.
+        if name.startswith('_') or not callable(attr) or inspect.isgeneratorfunction(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args: Any, **kwargs: Any) -> Any:
+            return await self.run(attr, *args, **kwargs)
+
+        return method
+
+    async def authenticate_parent(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        result = await self.get_parent_auth(email)
+
+        if not result:
+            return None
+
+        valid, new_hash = await self.hasher.verify_and_update(password, result['password_hash'])
+        if not valid:
+            return None
+
+        await self.record_parent_login(email, new_hash)
+
+        user = dict(result)
+        user['student_ids'] = ','.join(await self.get_parent_student_ids(email))
+        return user
+
+    async def create_parent_account(self, email: str, password: str, student_ids: List[str]) -> int:
+        password_hash = await self.hasher.hash(password)
+        return await self.run(self.db._insert_parent_account, email, password_hash, student_ids)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'max_workers': self.max_workers,
+            'in_flight': self._in_flight,
+            'waiting': self._waiting,
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.db.close()
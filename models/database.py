@@ -1,377 +1,940 @@
-import sqlite3
 import json
-from passlib.context import CryptContext
 import os
+import time
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Tuple
 
-class Database:
-    def __init__(self, db_path: str = 'data/school.db'):
+from models.pool import ConnectionPool
+from models.storage import StorageBackend, DEFAULT_POOL_SIZE, REVOKED_ACCESS_TOKENS_SCOPE, SCHEMA_VERSION, version_scope
+
+class Database(StorageBackend):
+    """Default storage backend: SQLite through the built-in ``sqlite3`` module."""
+    
+    def __init__(self, db_path: str = 'data/school.db', pool_size: Optional[int] = None):
+        super().__init__()
         self.db_path = db_path
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.pool = ConnectionPool(
+            db_path,
+            pool_size=DEFAULT_POOL_SIZE if pool_size is None else pool_size
+        )
         self.init_database()
     
-    def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    @property
+    def pool_size(self) -> int:
+        return self.pool.pool_size
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        return self.pool.stats()
+    
+    def connection(self):
+        """Check out a pooled connection for the duration of a ``with`` block."""
+        return self.pool.connection()
+    
+    def close(self):
+        self.pool.close()
     
     def init_database(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Warm start: the file already carries the current schema
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] >= SCHEMA_VERSION:
+                return
+            
+            tables = [
+                """CREATE TABLE IF NOT EXISTS students (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    student_id TEXT UNIQUE NOT NULL,
+                    name TEXT NOT NULL,
+                    class TEXT NOT NULL,
+                    section TEXT NOT NULL,
+                    date_of_birth DATE,
+                    parent_name TEXT NOT NULL,
+                    parent_email TEXT NOT NULL,
+                    parent_phone TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )""",
+                
+                """CREATE TABLE IF NOT EXISTS teachers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    teacher_id TEXT UNIQUE NOT NULL,
+                    name TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    phone TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )""",
+                
+                """CREATE TABLE IF NOT EXISTS attendance (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    student_id TEXT NOT NULL,
+                    date DATE NOT NULL,
+                    status TEXT CHECK(status IN ('present', 'absent', 'late')) NOT NULL,
+                    reason TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (student_id) REFERENCES students(student_id)
+                )""",
+                
+                """CREATE TABLE IF NOT EXISTS grades (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    student_id TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    test_type TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    max_score REAL NOT NULL,
+                    date DATE NOT NULL,
+                    teacher_id TEXT NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (student_id) REFERENCES students(student_id),
+                    FOREIGN KEY (teacher_id) REFERENCES teachers(teacher_id)
+                )""",
+                
+                """CREATE TABLE IF NOT EXISTS class_schedule (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    class TEXT NOT NULL,
+                    section TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    teacher_id TEXT NOT NULL,
+                    day_of_week TEXT NOT NULL,
+                    start_time TIME NOT NULL,
+                    end_time TIME NOT NULL,
+                    room TEXT,
+                    FOREIGN KEY (teacher_id) REFERENCES teachers(teacher_id)
+                )""",
+                
+                """CREATE TABLE IF NOT EXISTS parent_auth (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    parent_email TEXT UNIQUE NOT NULL,
+                    password_hash TEXT NOT NULL,
+                    student_ids TEXT NOT NULL,
+                    last_login DATETIME,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )""",
+                
+                """CREATE TABLE IF NOT EXISTS parent_students (
+                    parent_email TEXT NOT NULL,
+                    student_id TEXT NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (parent_email, student_id)
+                ) WITHOUT ROWID""",
+                
+                """CREATE TABLE IF NOT EXISTS chat_sessions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT UNIQUE NOT NULL,
+                    parent_email TEXT NOT NULL,
+                    student_id TEXT NOT NULL,
+                    messages TEXT NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )""",
+                
+                """CREATE TABLE IF NOT EXISTS chat_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    timestamp TEXT,
+                    FOREIGN KEY (session_id) REFERENCES chat_sessions(session_id)
+                )""",
+                
+                """CREATE TABLE IF NOT EXISTS refresh_tokens (
+                    token_hash TEXT PRIMARY KEY,
+                    parent_email TEXT NOT NULL,
+                    expires_at INTEGER NOT NULL,
+                    revoked_at INTEGER,
+                    replaced_by TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )""",
+                
+                """CREATE TABLE IF NOT EXISTS revoked_access_tokens (
+                    token_hash TEXT PRIMARY KEY,
+                    expires_at INTEGER NOT NULL
+                ) WITHOUT ROWID""",
+                
+                """CREATE TABLE IF NOT EXISTS data_versions (
+                    scope TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    updated_at INTEGER NOT NULL
+                ) WITHOUT ROWID"""
+            ]
+            
+            indexes = [
+                "CREATE INDEX IF NOT EXISTS idx_parent_students_student ON parent_students (student_id, parent_email)",
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_chat_messages_session_seq ON chat_messages (session_id, seq)",
+                "CREATE INDEX IF NOT EXISTS idx_attendance_student_date ON attendance (student_id, date, status)",
+                "CREATE INDEX IF NOT EXISTS idx_grades_student_subject ON grades (student_id, subject, date)",
+                # Keyset pagination walks (date, id) backwards from the cursor
+                "CREATE INDEX IF NOT EXISTS idx_attendance_student_keyset ON attendance (student_id, date, id)",
+                "CREATE INDEX IF NOT EXISTS idx_grades_student_keyset ON grades (student_id, date, id)",
+                "CREATE INDEX IF NOT EXISTS idx_refresh_tokens_parent ON refresh_tokens (parent_email, expires_at)",
+                "CREATE INDEX IF NOT EXISTS idx_revoked_access_tokens_expiry ON revoked_access_tokens (expires_at)"
+            ]
+            
+            for table in tables:
+                cursor.execute(table)
+            
+            for index in indexes:
+                cursor.execute(index)
+            
+            self._backfill_parent_students(cursor)
+            self._migrate_chat_messages(cursor)
+            
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.commit()
+            self.schema_initialized = True
+    
+    def _backfill_parent_students(self, cursor):
+        """Populate parent_students from legacy comma-joined parent_auth.student_ids."""
+        cursor.execute("""
+            SELECT pa.parent_email, pa.student_ids
+            FROM parent_auth pa
+            WHERE NOT EXISTS (
+                SELECT 1 FROM parent_students ps WHERE ps.parent_email = pa.parent_email
+            )
+        """)
         
-        tables = [
-            """CREATE TABLE IF NOT EXISTS students (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id TEXT UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                class TEXT NOT NULL,
-                section TEXT NOT NULL,
-                date_of_birth DATE,
-                parent_name TEXT NOT NULL,
-                parent_email TEXT NOT NULL,
-                parent_phone TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )""",
-            
-            """CREATE TABLE IF NOT EXISTS teachers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                teacher_id TEXT UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                subject TEXT NOT NULL,
-                email TEXT NOT NULL,
-                phone TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )""",
-            
-            """CREATE TABLE IF NOT EXISTS attendance (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id TEXT NOT NULL,
-                date DATE NOT NULL,
-                status TEXT CHECK(status IN ('present', 'absent', 'late')) NOT NULL,
-                reason TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (student_id) REFERENCES students(student_id)
-            )""",
-            
-            """CREATE TABLE IF NOT EXISTS grades (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id TEXT NOT NULL,
-                subject TEXT NOT NULL,
-                test_type TEXT NOT NULL,
-                score REAL NOT NULL,
-                max_score REAL NOT NULL,
-                date DATE NOT NULL,
-                teacher_id TEXT NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (student_id) REFERENCES students(student_id),
-                FOREIGN KEY (teacher_id) REFERENCES teachers(teacher_id)
-            )""",
-            
-            """CREATE TABLE IF NOT EXISTS class_schedule (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                class TEXT NOT NULL,
-                section TEXT NOT NULL,
-                subject TEXT NOT NULL,
-                teacher_id TEXT NOT NULL,
-                day_of_week TEXT NOT NULL,
-                start_time TIME NOT NULL,
-                end_time TIME NOT NULL,
-                room TEXT,
-                FOREIGN KEY (teacher_id) REFERENCES teachers(teacher_id)
-            )""",
-            
-            """CREATE TABLE IF NOT EXISTS parent_auth (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                parent_email TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                student_ids TEXT NOT NULL,
-                last_login DATETIME,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )""",
-            
-            """CREATE TABLE IF NOT EXISTS chat_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT UNIQUE NOT NULL,
-                parent_email TEXT NOT NULL,
-                student_id TEXT NOT NULL,
-                messages TEXT NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )"""
+        links = [
+            (row['parent_email'], student_id.strip())
+            for row in cursor.fetchall()
+            for student_id in row['student_ids'].split(',')
+            if student_id.strip()
         ]
         
-        for table in tables:
-            cursor.execute(table)
+        cursor.executemany(
+            "INSERT OR IGNORE INTO parent_students (parent_email, student_id) VALUES (?, ?)",
+            links
+        )
+    
+    def _migrate_chat_messages(self, cursor):
+        """Move legacy chat_sessions.messages JSON blobs into chat_messages rows."""
+        cursor.execute("SELECT session_id, messages FROM chat_sessions WHERE messages != '[]'")
         
-        conn.commit()
-        conn.close()
+        for row in cursor.fetchall():
+            cursor.execute(
+                "SELECT 1 FROM chat_messages WHERE session_id = ? LIMIT 1",
+                (row['session_id'],)
+            )
+            if cursor.fetchone() is None:
+                cursor.executemany(
+                    """INSERT INTO chat_messages (session_id, seq, role, content, timestamp)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    [
+                        (row['session_id'], seq, message.get('role'), message.get('content', ''), message.get('timestamp'))
+                        for seq, message in enumerate(json.loads(row['messages']), start=1)
+                    ]
+                )
+            
+            cursor.execute(
+                "UPDATE chat_sessions SET messages = '[]' WHERE session_id = ?",
+                (row['session_id'],)
+            )
     
     def get_student_by_parent(self, parent_email: str, student_id: str) -> Optional[Dict[str, Any]]:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT s.*, pa.parent_email 
-            FROM students s 
-            JOIN parent_auth pa ON pa.parent_email = ? 
-            WHERE s.student_id = ? AND pa.student_ids LIKE '%' || ? || '%'
-        """
-        
-        cursor.execute(query, (parent_email, student_id, student_id))
-        result = cursor.fetchone()
-        conn.close()
-        
-        return dict(result) if result else None
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                SELECT s.*, ps.parent_email 
+                FROM parent_students ps 
+                JOIN students s ON s.student_id = ps.student_id 
+                WHERE ps.parent_email = ? AND ps.student_id = ?
+            """
+            
+            cursor.execute(query, (parent_email, student_id))
+            result = cursor.fetchone()
+            
+            return dict(result) if result else None
+    
+    def get_students_by_parent(self, parent_email: str) -> List[Dict[str, Any]]:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                SELECT s.*, ps.parent_email 
+                FROM parent_students ps 
+                JOIN students s ON s.student_id = ps.student_id 
+                WHERE ps.parent_email = ?
+                ORDER BY ps.student_id
+            """
+            
+            cursor.execute(query, (parent_email,))
+            return [dict(row) for row in cursor.fetchall()]
     
     def get_attendance(self, student_id: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT * FROM attendance 
-            WHERE student_id = ? AND date BETWEEN ? AND ?
-            ORDER BY date DESC
-        """
-        
-        cursor.execute(query, (student_id, start_date, end_date))
-        results = cursor.fetchall()
-        conn.close()
-        
-        return [dict(row) for row in results]
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                SELECT * FROM attendance 
+                WHERE student_id = ? AND date BETWEEN ? AND ?
+                ORDER BY date DESC
+            """
+            
+            cursor.execute(query, (student_id, start_date, end_date))
+            results = cursor.fetchall()
+            
+            return [dict(row) for row in results]
+    
+    def get_attendance_page(self, student_id: str, start_date: str, end_date: str, limit: int,
+                            after: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                SELECT * FROM attendance 
+                WHERE student_id = ? AND date BETWEEN ? AND ?
+            """
+            params = [student_id, start_date, end_date]
+            
+            if after:
+                query += " AND (date, id) < (?, ?)"
+                params.extend(after)
+            
+            query += " ORDER BY date DESC, id DESC LIMIT ?"
+            params.append(limit)
+            
+            cursor.execute(query, params)
+            
+            return [dict(row) for row in cursor.fetchall()]
     
     def get_grades(self, student_id: str, subject: Optional[str] = None) -> List[Dict[str, Any]]:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT g.*, t.name as teacher_name 
-            FROM grades g 
-            JOIN teachers t ON g.teacher_id = t.teacher_id 
-            WHERE g.student_id = ?
-        """
-        params = [student_id]
-        
-        if subject:
-            query += " AND g.subject = ?"
-            params.append(subject)
-        
-        query += " ORDER BY g.date DESC"
-        
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        conn.close()
-        
-        return [dict(row) for row in results]
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                SELECT g.*, t.name as teacher_name 
+                FROM grades g 
+                JOIN teachers t ON g.teacher_id = t.teacher_id 
+                WHERE g.student_id = ?
+            """
+            params = [student_id]
+            
+            if subject:
+                query += " AND g.subject = ?"
+                params.append(subject)
+            
+            query += " ORDER BY g.date DESC"
+            
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+            
+            return [dict(row) for row in results]
+    
+    def get_grades_page(self, student_id: str, limit: int, subject: Optional[str] = None,
+                        after: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                SELECT g.*, t.name as teacher_name 
+                FROM grades g 
+                JOIN teachers t ON g.teacher_id = t.teacher_id 
+                WHERE g.student_id = ?
+            """
+            params = [student_id]
+            
+            if subject:
+                query += " AND g.subject = ?"
+                params.append(subject)
+            
+            if after:
+                query += " AND (g.date, g.id) < (?, ?)"
+                params.extend(after)
+            
+            query += " ORDER BY g.date DESC, g.id DESC LIMIT ?"
+            params.append(limit)
+            
+            cursor.execute(query, params)
+            
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_attendance_summary(self, student_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                SELECT
+                    COUNT(*) AS total_days,
+                    COALESCE(SUM(CASE WHEN status = 'present' THEN 1 ELSE 0 END), 0) AS present,
+                    COALESCE(SUM(CASE WHEN status = 'absent' THEN 1 ELSE 0 END), 0) AS absent,
+                    COALESCE(SUM(CASE WHEN status = 'late' THEN 1 ELSE 0 END), 0) AS late,
+                    CASE WHEN COUNT(*) > 0
+                        THEN CAST(ROUND(100.0 * SUM(CASE WHEN status = 'present' THEN 1 ELSE 0 END) / COUNT(*)) AS INTEGER)
+                        ELSE 0
+                    END AS attendance_rate
+                FROM attendance
+                WHERE student_id = ? AND date BETWEEN ? AND ?
+            """
+            
+            cursor.execute(query, (student_id, start_date, end_date))
+            
+            return dict(cursor.fetchone())
+    
+    def get_recent_absences(self, student_id: str, start_date: str, end_date: str, limit: int = 5) -> List[str]:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                SELECT date FROM attendance
+                WHERE student_id = ? AND date BETWEEN ? AND ? AND status = 'absent'
+                ORDER BY date DESC
+                LIMIT ?
+            """
+            
+            cursor.execute(query, (student_id, start_date, end_date, limit))
+            
+            return [row['date'] for row in cursor.fetchall()]
     
-    def get_class_schedule(self, class_name: str, section: str) -> List[Dict[str, Any]]:
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def get_grade_summary(self, student_id: str, subject: Optional[str] = None) -> Dict[str, Any]:
+        """Per-subject latest score and average plus the overall average, computed in SQL.
         
-        query = """
-            SELECT cs.*, t.name as teacher_name 
-            FROM class_schedule cs 
-            JOIN teachers t ON cs.teacher_id = t.teacher_id 
-            WHERE cs.class = ? AND cs.section = ?
-            ORDER BY cs.day_of_week, cs.start_time
+        Subjects are ordered by their most recent test, newest first.
         """
-        
-        cursor.execute(query, (class_name, section))
-        results = cursor.fetchall()
-        conn.close()
-        
-        return [dict(row) for row in results]
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            subject_filter = " AND g.subject = ?" if subject else ""
+            params = [student_id, subject] if subject else [student_id]
+            
+            query = f"""
+                WITH ranked AS (
+                    SELECT
+                        g.subject,
+                        g.score,
+                        g.max_score,
+                        g.date,
+                        t.name AS teacher_name,
+                        ROW_NUMBER() OVER (PARTITION BY g.subject ORDER BY g.date DESC, g.id DESC) AS recency,
+                        AVG(g.score * 100.0 / g.max_score) OVER (PARTITION BY g.subject) AS average,
+                        COUNT(*) OVER (PARTITION BY g.subject) AS test_count,
+                        AVG(g.score * 100.0 / g.max_score) OVER () AS overall_average
+                    FROM grades g 
+                    JOIN teachers t ON g.teacher_id = t.teacher_id 
+                    WHERE g.student_id = ?{subject_filter}
+                )
+                SELECT subject, score AS latest_score, max_score AS latest_max_score,
+                       date AS latest_date, teacher_name, average, test_count, overall_average
+                FROM ranked
+                WHERE recency = 1
+                ORDER BY latest_date DESC
+            """
+            
+            cursor.execute(query, params)
+            rows = [dict(row) for row in cursor.fetchall()]
+        
+        overall_average = rows[0]['overall_average'] if rows else None
+        for row in rows:
+            del row['overall_average']
+        
+        return {
+            'subjects': rows,
+            'overall_average': overall_average,
+            'total_tests': sum(row['test_count'] for row in rows)
+        }
     
-    def authenticate_parent(self, email: str, password: str) -> Optional[Dict[str, Any]]:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM parent_auth WHERE parent_email = ?"
-        cursor.execute(query, (email,))
-        result = cursor.fetchone()
-        
-        if not result:
-            conn.close()
-            return None
+    def _load_class_schedule(self, class_name: str, section: str) -> tuple:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                SELECT cs.*, t.name as teacher_name 
+                FROM class_schedule cs 
+                JOIN teachers t ON cs.teacher_id = t.teacher_id 
+                WHERE cs.class = ? AND cs.section = ?
+                ORDER BY cs.day_of_week, cs.start_time
+            """
+            
+            cursor.execute(query, (class_name, section))
+            results = cursor.fetchall()
+            
+            return tuple(dict(row) for row in results)
+    
+    def get_data_versions(self, scopes: List[str]) -> Dict[str, Dict[str, int]]:
+        if not scopes:
+            return {}
         
-        if self.pwd_context.verify(password, result['password_hash']):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            placeholders = ','.join('?' * len(scopes))
+            cursor.execute(
+                f"SELECT scope, version, updated_at FROM data_versions WHERE scope IN ({placeholders})",
+                list(scopes)
+            )
+            
+            return {row['scope']: {'version': row['version'], 'updated_at': row['updated_at']} for row in cursor.fetchall()}
+    
+    def _bump_versions(self, cursor, scopes: Iterable[str]):
+        """Bump data versions inside the caller's write transaction."""
+        now = int(time.time())
+        cursor.executemany(
+            """
+                INSERT INTO data_versions (scope, version, updated_at) VALUES (?, 1, ?)
+                ON CONFLICT (scope) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at
+            """,
+            [(scope, now) for scope in scopes]
+        )
+    
+    def get_parent_student_ids(self, parent_email: str) -> List[str]:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
             cursor.execute(
-                "UPDATE parent_auth SET last_login = CURRENT_TIMESTAMP WHERE parent_email = ?",
-                (email,)
+                "SELECT student_id FROM parent_students WHERE parent_email = ? ORDER BY student_id",
+                (parent_email,)
             )
+            
+            return [row['student_id'] for row in cursor.fetchall()]
+    
+    def get_parent_auth(self, email: str) -> Optional[Dict[str, Any]]:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = "SELECT * FROM parent_auth WHERE parent_email = ?"
+            cursor.execute(query, (email,))
+            result = cursor.fetchone()
+            
+            return dict(result) if result else None
+    
+    def record_parent_login(self, email: str, password_hash: Optional[str] = None) -> None:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            if password_hash:
+                cursor.execute(
+                    "UPDATE parent_auth SET last_login = CURRENT_TIMESTAMP, password_hash = ? WHERE parent_email = ?",
+                    (password_hash, email)
+                )
+            else:
+                cursor.execute(
+                    "UPDATE parent_auth SET last_login = CURRENT_TIMESTAMP WHERE parent_email = ?",
+                    (email,)
+                )
             conn.commit()
-            conn.close()
-            return dict(result)
-        
-        conn.close()
-        return None
+    
+    def insert_refresh_token(self, token_hash: str, parent_email: str, expires_at: int) -> None:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Prune this parent's expired tokens while we hold the write lock
+            cursor.execute(
+                "DELETE FROM refresh_tokens WHERE parent_email = ? AND expires_at < ?",
+                (parent_email, int(time.time()))
+            )
+            cursor.execute(
+                "INSERT INTO refresh_tokens (token_hash, parent_email, expires_at) VALUES (?, ?, ?)",
+                (token_hash, parent_email, expires_at)
+            )
+            conn.commit()
+    
+    def get_refresh_token(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT * FROM refresh_tokens WHERE token_hash = ?", (token_hash,))
+            result = cursor.fetchone()
+            
+            return dict(result) if result else None
+    
+    def revoke_refresh_token(self, token_hash: str, replaced_by: Optional[str] = None) -> bool:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                """UPDATE refresh_tokens SET revoked_at = ?, replaced_by = ?
+                   WHERE token_hash = ? AND revoked_at IS NULL""",
+                (int(time.time()), replaced_by, token_hash)
+            )
+            conn.commit()
+            
+            return cursor.rowcount == 1
+    
+    def revoke_parent_refresh_tokens(self, parent_email: str) -> int:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "UPDATE refresh_tokens SET revoked_at = ? WHERE parent_email = ? AND revoked_at IS NULL",
+                (int(time.time()), parent_email)
+            )
+            conn.commit()
+            
+            return cursor.rowcount
+    
+    def revoke_access_token(self, token_hash: str, expires_at: int) -> None:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Expired tokens fail verification anyway; drop them while we hold the write lock
+            cursor.execute("DELETE FROM revoked_access_tokens WHERE expires_at < ?", (int(time.time()),))
+            cursor.execute(
+                "INSERT OR IGNORE INTO revoked_access_tokens (token_hash, expires_at) VALUES (?, ?)",
+                (token_hash, expires_at)
+            )
+            self._bump_versions(cursor, [REVOKED_ACCESS_TOKENS_SCOPE])
+            conn.commit()
+    
+    def get_revoked_access_tokens(self) -> List[str]:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT token_hash FROM revoked_access_tokens WHERE expires_at >= ?", (int(time.time()),))
+            
+            return [row[0] for row in cursor.fetchall()]
     
     def create_chat_session(self, session_id: str, parent_email: str, student_id: str) -> int:
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                INSERT INTO chat_sessions (session_id, parent_email, student_id, messages)
+                VALUES (?, ?, ?, ?)
+            """
+            
+            cursor.execute(query, (session_id, parent_email, student_id, json.dumps([])))
+            session_id = cursor.lastrowid
+            conn.commit()
+            
+            return session_id
+    
+    def append_chat_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> int:
+        """Append messages to a session's transcript.
         
-        query = """
-            INSERT INTO chat_sessions (session_id, parent_email, student_id, messages)
-            VALUES (?, ?, ?, ?)
+        Each message is a single-row insert whose seq is derived from the
+        (session_id, seq) index, so the cost does not grow with the length
+        of the conversation.
         """
+        return self.append_chat_messages_batch({session_id: messages})
+    
+    def append_chat_messages_batch(self, transcripts: Dict[str, List[Dict[str, Any]]]) -> int:
+        """Append messages to several sessions' transcripts in one transaction."""
+        rows = [
+            (session_id, message['role'], message['content'], message.get('timestamp'), session_id)
+            for session_id, messages in transcripts.items()
+            for message in messages
+        ]
+        if not rows:
+            return 0
         
-        cursor.execute(query, (session_id, parent_email, student_id, json.dumps([])))
-        session_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
-        return session_id
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                INSERT INTO chat_messages (session_id, seq, role, content, timestamp)
+                SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ?, ?
+                FROM chat_messages WHERE session_id = ?
+            """
+            
+            cursor.executemany(query, rows)
+            cursor.executemany(
+                "UPDATE chat_sessions SET updated_at = CURRENT_TIMESTAMP WHERE session_id = ?",
+                [(session_id,) for session_id, messages in transcripts.items() if messages]
+            )
+            conn.commit()
+            
+            return len(rows)
+    
+    def get_chat_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                SELECT role, content, timestamp FROM chat_messages
+                WHERE session_id = ?
+                ORDER BY seq
+            """
+            
+            cursor.execute(query, (session_id,))
+            
+            return [dict(row) for row in cursor.fetchall()]
     
     def update_chat_session(self, session_id: str, messages: List[Dict[str, Any]]) -> int:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        query = """
-            UPDATE chat_sessions 
-            SET messages = ?, updated_at = CURRENT_TIMESTAMP 
-            WHERE session_id = ?
-        """
-        
-        cursor.execute(query, (json.dumps(messages), session_id))
-        changes = cursor.rowcount
-        conn.commit()
-        conn.close()
-        
-        return changes
+        """Persist a full conversation history by appending only the messages not yet stored."""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM chat_messages WHERE session_id = ?",
+                (session_id,)
+            )
+            stored = cursor.fetchone()[0]
+            
+            return self.append_chat_messages(session_id, messages[stored:])
+    
+    def _insert_parent_account(self, email: str, password_hash: str, student_ids: List[str]) -> int:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            student_ids_str = ','.join(student_ids)
+            
+            query = """
+                INSERT INTO parent_auth (parent_email, password_hash, student_ids)
+                VALUES (?, ?, ?)
+            """
+            
+            cursor.execute(query, (email, password_hash, student_ids_str))
+            parent_id = cursor.lastrowid
+            
+            cursor.executemany(
+                "INSERT OR IGNORE INTO parent_students (parent_email, student_id) VALUES (?, ?)",
+                [(email, student_id) for student_id in student_ids]
+            )
+            self._bump_versions(cursor, [version_scope('roster', student_id) for student_id in student_ids])
+            conn.commit()
+            
+            return parent_id
+    
+    def add_student(self, student_data: Dict[str, Any]) -> int:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                INSERT INTO students (student_id, name, class, section, date_of_birth, 
+                                    parent_name, parent_email, parent_phone)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """
+            
+            cursor.execute(query, (
+                student_data['student_id'],
+                student_data['name'],
+                student_data['class'],
+                student_data['section'],
+                student_data['date_of_birth'],
+                student_data['parent_name'],
+                student_data['parent_email'],
+                student_data['parent_phone']
+            ))
+            
+            student_id = cursor.lastrowid
+            self._bump_versions(cursor, [version_scope('roster', student_data['student_id'])])
+            conn.commit()
+            
+            return student_id
     
-    def create_parent_account(self, email: str, password: str, student_ids: List[str]) -> int:
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def add_teacher(self, teacher_data: Dict[str, Any]) -> int:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                INSERT INTO teachers (teacher_id, name, subject, email, phone)
+                VALUES (?, ?, ?, ?, ?)
+            """
+            
+            cursor.execute(query, (
+                teacher_data['teacher_id'],
+                teacher_data['name'],
+                teacher_data['subject'],
+                teacher_data['email'],
+                teacher_data['phone']
+            ))
+            
+            teacher_id = cursor.lastrowid
+            self._bump_versions(cursor, [version_scope('teachers')])
+            conn.commit()
         
-        password_hash = self.pwd_context.hash(password)
-        student_ids_str = ','.join(student_ids)
+        # Cached schedules embed teacher names from the join
+        self.schedule_cache.invalidate()
         
-        query = """
-            INSERT INTO parent_auth (parent_email, password_hash, student_ids)
-            VALUES (?, ?, ?)
-        """
+        return teacher_id
+    
+    def add_attendance(self, student_id: str, date: str, status: str, reason: str = None) -> int:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                INSERT INTO attendance (student_id, date, status, reason)
+                VALUES (?, ?, ?, ?)
+            """
+            
+            cursor.execute(query, (student_id, date, status, reason))
+            attendance_id = cursor.lastrowid
+            self._bump_versions(cursor, [version_scope('attendance', student_id)])
+            conn.commit()
+            
+            return attendance_id
+    
+    def add_grade(self, grade_data: Dict[str, Any]) -> int:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                INSERT INTO grades (student_id, subject, test_type, score, max_score, date, teacher_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """
+            
+            cursor.execute(query, (
+                grade_data['student_id'],
+                grade_data['subject'],
+                grade_data['test_type'],
+                grade_data['score'],
+                grade_data['max_score'],
+                grade_data['date'],
+                grade_data['teacher_id']
+            ))
+            
+            grade_id = cursor.lastrowid
+            self._bump_versions(cursor, [version_scope('grades', grade_data['student_id'])])
+            conn.commit()
+            
+            return grade_id
+    
+    def add_schedule(self, schedule_data: Dict[str, Any]) -> int:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                INSERT INTO class_schedule (class, section, subject, teacher_id, day_of_week, start_time, end_time, room)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """
+            
+            cursor.execute(query, (
+                schedule_data['class'],
+                schedule_data['section'],
+                schedule_data['subject'],
+                schedule_data['teacher_id'],
+                schedule_data['day_of_week'],
+                schedule_data['start_time'],
+                schedule_data['end_time'],
+                schedule_data['room']
+            ))
+            
+            schedule_id = cursor.lastrowid
+            self._bump_versions(cursor, [version_scope('schedule', schedule_data['class'], schedule_data['section'])])
+            conn.commit()
         
-        cursor.execute(query, (email, password_hash, student_ids_str))
-        parent_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        self.schedule_cache.invalidate((schedule_data['class'], schedule_data['section']))
         
-        return parent_id
+        return schedule_id
     
-    def add_student(self, student_data: Dict[str, Any]) -> int:
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def _executemany(self, query: str, params: Iterable[tuple], scopes: Optional[set] = None) -> int:
+        """Run one statement over many parameter rows inside a single transaction.
         
+        ``scopes`` is filled while ``params`` is consumed and bumped in the same transaction.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(query, params)
+            inserted = cursor.rowcount
+            if scopes:
+                self._bump_versions(cursor, scopes)
+            conn.commit()
+            
+            return inserted
+    
+    def add_students_bulk(self, students: Iterable[Dict[str, Any]]) -> int:
         query = """
             INSERT INTO students (student_id, name, class, section, date_of_birth, 
                                 parent_name, parent_email, parent_phone)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """
         
-        cursor.execute(query, (
-            student_data['student_id'],
-            student_data['name'],
-            student_data['class'],
-            student_data['section'],
-            student_data['date_of_birth'],
-            student_data['parent_name'],
-            student_data['parent_email'],
-            student_data['parent_phone']
-        ))
-        
-        student_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
-        return student_id
+        scopes = set()
+        
+        def rows():
+            for student in students:
+                scopes.add(version_scope('roster', student['student_id']))
+                yield (
+                    student['student_id'],
+                    student['name'],
+                    student['class'],
+                    student['section'],
+                    student.get('date_of_birth'),
+                    student['parent_name'],
+                    student['parent_email'],
+                    student.get('parent_phone')
+                )
+        
+        return self._executemany(query, rows(), scopes)
     
-    def add_teacher(self, teacher_data: Dict[str, Any]) -> int:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+    def add_teachers_bulk(self, teachers: Iterable[Dict[str, Any]]) -> int:
         query = """
             INSERT INTO teachers (teacher_id, name, subject, email, phone)
             VALUES (?, ?, ?, ?, ?)
         """
         
-        cursor.execute(query, (
-            teacher_data['teacher_id'],
-            teacher_data['name'],
-            teacher_data['subject'],
-            teacher_data['email'],
-            teacher_data['phone']
-        ))
+        inserted = self._executemany(query, (
+            (
+                teacher['teacher_id'],
+                teacher['name'],
+                teacher['subject'],
+                teacher['email'],
+                teacher.get('phone')
+            )
+            for teacher in teachers
+        ), {version_scope('teachers')})
         
-        teacher_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        self.schedule_cache.invalidate()
         
-        return teacher_id
+        return inserted
     
-    def add_attendance(self, student_id: str, date: str, status: str, reason: str = None) -> int:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+    def add_attendance_bulk(self, records: Iterable[Dict[str, Any]]) -> int:
         query = """
             INSERT INTO attendance (student_id, date, status, reason)
             VALUES (?, ?, ?, ?)
         """
         
-        cursor.execute(query, (student_id, date, status, reason))
-        attendance_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        scopes = set()
         
-        return attendance_id
-    
-    def add_grade(self, grade_data: Dict[str, Any]) -> int:
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        def rows():
+            for record in records:
+                scopes.add(version_scope('attendance', record['student_id']))
+                yield (record['student_id'], record['date'], record['status'], record.get('reason'))
         
+        return self._executemany(query, rows(), scopes)
+    
+    def add_grades_bulk(self, grades: Iterable[Dict[str, Any]]) -> int:
         query = """
             INSERT INTO grades (student_id, subject, test_type, score, max_score, date, teacher_id)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """
         
-        cursor.execute(query, (
-            grade_data['student_id'],
-            grade_data['subject'],
-            grade_data['test_type'],
-            grade_data['score'],
-            grade_data['max_score'],
-            grade_data['date'],
-            grade_data['teacher_id']
-        ))
-        
-        grade_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
-        return grade_id
+        scopes = set()
+        
+        def rows():
+            for grade in grades:
+                scopes.add(version_scope('grades', grade['student_id']))
+                yield (
+                    grade['student_id'],
+                    grade['subject'],
+                    grade['test_type'],
+                    grade['score'],
+                    grade['max_score'],
+                    grade['date'],
+                    grade['teacher_id']
+                )
+        
+        return self._executemany(query, rows(), scopes)
     
-    def add_schedule(self, schedule_data: Dict[str, Any]) -> int:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+    def add_schedules_bulk(self, schedules: Iterable[Dict[str, Any]]) -> int:
         query = """
             INSERT INTO class_schedule (class, section, subject, teacher_id, day_of_week, start_time, end_time, room)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """
         
-        cursor.execute(query, (
-            schedule_data['class'],
-            schedule_data['section'],
-            schedule_data['subject'],
-            schedule_data['teacher_id'],
-            schedule_data['day_of_week'],
-            schedule_data['start_time'],
-            schedule_data['end_time'],
-            schedule_data['room']
-        ))
-        
-        schedule_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
-        return schedule_id
\ No newline at end of file
+        classes = set()
+        scopes = set()
+        
+        def rows():
+            for schedule in schedules:
+                classes.add((schedule['class'], schedule['section']))
+                scopes.add(version_scope('schedule', schedule['class'], schedule['section']))
+                yield (
+                    schedule['class'],
+                    schedule['section'],
+                    schedule['subject'],
+                    schedule['teacher_id'],
+                    schedule['day_of_week'],
+                    schedule['start_time'],
+                    schedule['end_time'],
+                    schedule.get('room')
+                )
+        
+        inserted = self._executemany(query, rows(), scopes)
+        
+        for key in classes:
+            self.schedule_cache.invalidate(key)
+        
+        return inserted
\ No newline at end of file
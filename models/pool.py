@@ -0,0 +1,134 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# Applied to every new connection. WAL lets readers proceed while a writer
+# commits, and NORMAL synchronous is durable under WAL except on power loss.
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,        # negative = KiB, i.e. ~16 MB page cache
+    'mmap_size': 268435456,      # 256 MB memory-mapped I/O
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available in time."""
+
+
+class ConnectionPool:
+    """Bounded pool of reusable SQLite connections.
+
+    Connections are created lazily up to ``pool_size`` and handed back to an
+    idle stack after use. A thread that already holds a connection gets the
+    same one back on nested ``connection()`` calls. A ``pool_size`` of 0
+    disables pooling and opens a fresh connection per checkout.
+    """
+
+    def __init__(self, db_path: str, pool_size: int = 5, timeout: float = 30.0,
+                 pragmas: Optional[Dict[str, Any]] = None):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        if self.pool_size <= 0:
+            return self._connect()
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.pool_size
+            if can_create:
+                self._created += 1
+
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeout(f"No database connection available after {self.timeout}s")
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if self.pool_size <= 0:
+            conn.close()
+            return
+
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            yield held
+            return
+
+        conn = self.acquire()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self.release(conn)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'pool_size': self.pool_size,
+            'created': self._created,
+            'idle': self._idle.qsize(),
+        }
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
@@ -1,17 +1,33 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str
+    school_id: Optional[str] = None
 
 class LoginResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    expires_in: Optional[int] = None
+    refresh_token: Optional[str] = None
     student_ids: List[str]
     message: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+    refresh_token: str
+    student_ids: List[str]
+
+class LogoutResponse(BaseModel):
+    message: str
+
 class ChatSessionRequest(BaseModel):
     student_id: str
 
@@ -52,10 +68,12 @@ class AttendanceSummary(BaseModel):
     present: int
     absent: int
     late: int
+    attendance_rate: int = 0
 
 class AttendanceResponse(BaseModel):
     attendance: List[AttendanceRecord]
     summary: AttendanceSummary
+    next_cursor: Optional[str] = None
 
 class Grade(BaseModel):
     id: int
@@ -74,6 +92,7 @@ class Grade(BaseModel):
 
 class GradeResponse(BaseModel):
     grades: List[Grade]
+    next_cursor: Optional[str] = None
 
 class ScheduleItem(BaseModel):
     id: int
@@ -93,10 +112,24 @@ class ScheduleItem(BaseModel):
 class ScheduleResponse(BaseModel):
     schedule: List[ScheduleItem]
 
+class StudentDashboard(BaseModel):
+    student_id: str
+    info: Optional[StudentInfo] = None
+    attendance: Optional[AttendanceResponse] = None
+    grades: Optional[List[Grade]] = None
+    schedule: Optional[List[ScheduleItem]] = None
+
+class DashboardsResponse(BaseModel):
+    students: List[StudentDashboard]
+
 class HealthResponse(BaseModel):
     status: str
     timestamp: datetime
     version: str
 
+class MetricsResponse(BaseModel):
+    timestamp: datetime
+    metrics: Dict[str, Dict[str, Any]]
+
 class ErrorResponse(BaseModel):
     error: str
\ No newline at end of file
@@ -0,0 +1,208 @@
+import asyncio
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from models.async_database import AsyncDatabase
+from models.storage import create_database
+
+SHARD_DIR = os.getenv("SHARD_DIR", "")
+SCHOOL_IDS = [s.strip() for s in os.getenv("SCHOOL_IDS", "").split(",") if s.strip()]
+DEFAULT_SCHOOL_ID = os.getenv("DEFAULT_SCHOOL_ID", "default")
+STUDENT_ID_SEPARATOR = "-"
+
+# School ids become file names, so keep them to a safe alphabet
+_SCHOOL_ID_RE = re.compile(r'^[A-Za-z0-9_]{1,64}$')
+
+class ShardRouter:
+    """Map each school to its own database file, connection pool and executor.
+
+    With ``SHARD_DIR`` unset there is a single shard backed by the configured
+    ``DATABASE_URL``, which is the original one-database layout. With
+    ``SHARD_DIR`` set, every school lives in ``<SHARD_DIR>/<school_id>.db``
+    and writes for one school never wait on another school's lock.
+
+    Requests are routed by the ``school_id`` JWT claim, or by the prefix of
+    a ``<school_id>-<number>`` student id.
+    """
+
+    def __init__(self, shard_dir: Optional[str] = None, schools: Optional[Iterable[str]] = None,
+                 default_school: str = DEFAULT_SCHOOL_ID, pool_size: Optional[int] = None):
+        self.shard_dir = shard_dir if shard_dir is not None else SHARD_DIR
+        self.default_school = default_school
+        self.pool_size = pool_size
+        self._shards: Dict[str, AsyncDatabase] = {}
+        self._known = set(SCHOOL_IDS if schools is None else schools)
+        self._lock = threading.Lock()
+
+        if self.shard_dir:
+            os.makedirs(self.shard_dir, exist_ok=True)
+            for name in os.listdir(self.shard_dir):
+                school_id, ext = os.path.splitext(name)
+                if ext == '.db' and _SCHOOL_ID_RE.match(school_id):
+                    self._known.add(school_id)
+        else:
+            self._known = {self.default_school}
+
+        for school_id in self.schools():
+            self._validate(school_id)
+            self.get(school_id)
+
+    @property
+    def sharded(self) -> bool:
+        return bool(self.shard_dir)
+
+    def schools(self) -> List[str]:
+        return sorted(self._known)
+
+    def _validate(self, school_id: str) -> None:
+        if not _SCHOOL_ID_RE.match(school_id):
+            raise ValueError(f"Invalid school id: {school_id!r}")
+
+    def _open(self, school_id: str) -> AsyncDatabase:
+        kwargs = {} if self.pool_size is None else {'pool_size': self.pool_size}
+        if not self.sharded:
+            return AsyncDatabase(create_database(**kwargs))
+
+        url = f"sqlite:///{os.path.join(self.shard_dir, school_id + '.db')}"
+        return AsyncDatabase(create_database(url, **kwargs))
+
+    def get(self, school_id: str, create: bool = False) -> AsyncDatabase:
+        """Return the shard for ``school_id``.
+
+        Unknown schools raise ``KeyError`` unless ``create`` is set, so a
+        forged student id prefix can never create a database file.
+        """
+        if not self.sharded:
+            school_id = self.default_school
+
+        shard = self._shards.get(school_id)
+        if shard is not None:
+            return shard
+
+        with self._lock:
+            shard = self._shards.get(school_id)
+            if shard is None:
+                if school_id not in self._known:
+                    if not create:
+                        raise KeyError(school_id)
+                    self._validate(school_id)
+                shard = self._open(school_id)
+                self._shards[school_id] = shard
+                self._known.add(school_id)
+            return shard
+
+    def school_for_student(self, student_id: str) -> Optional[str]:
+        """School encoded in a ``<school_id>-<number>`` student id, if any."""
+        prefix, sep, _ = student_id.partition(STUDENT_ID_SEPARATOR)
+        return prefix if sep else None
+
+    def school_for(self, claims: Dict[str, Any], student_id: Optional[str] = None) -> str:
+        if not self.sharded:
+            return self.default_school
+
+        school_id = claims.get('school_id')
+        prefix = self.school_for_student(student_id) if student_id else None
+
+        # A token only ever grants access to its own school
+        if school_id and prefix and prefix != school_id:
+            raise KeyError(prefix)
+
+        school_id = school_id or prefix
+        if not school_id:
+            for sid in claims.get('student_ids', '').split(','):
+                school_id = self.school_for_student(sid)
+                if school_id:
+                    break
+
+        return school_id or self.default_school
+
+    def for_claims(self, claims: Dict[str, Any], student_id: Optional[str] = None) -> AsyncDatabase:
+        return self.get(self.school_for(claims, student_id))
+
+    def claims_for(self, school_id: str, email: str, student_ids: str) -> Dict[str, Any]:
+        """Access token claims for a parent of ``school_id``."""
+        claims = {"sub": email, "student_ids": student_ids}
+        if self.sharded:
+            claims["school_id"] = school_id
+        return claims
+
+    def refresh_token_prefix(self, school_id: str) -> Optional[str]:
+        return school_id if self.sharded else None
+
+    def school_for_refresh_token(self, refresh_token: str) -> str:
+        """School a refresh token belongs to; sharded tokens carry it as a prefix."""
+        if not self.sharded:
+            return self.default_school
+
+        school_id, sep, _ = refresh_token.partition('.')
+        if not sep:
+            raise KeyError(refresh_token)
+        return school_id
+
+    async def authenticate(self, email: str, password: str,
+                           school_id: Optional[str] = None) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Authenticate against one school, or find the parent's school.
+
+        Without a school id every shard is asked; shards that do not know
+        the email answer from a cheap lookup without hashing.
+        """
+        if not self.sharded or school_id:
+            school_id = school_id if self.sharded else self.default_school
+            user = await self.get(school_id).authenticate_parent(email, password)
+            return (school_id, user) if user else (None, None)
+
+        results = await self.fan_out('authenticate_parent', email, password)
+        for school_id, user in sorted(results.items()):
+            if user:
+                return school_id, user
+        return None, None
+
+    async def fan_out(self, method: str, *args: Any, schools: Optional[Iterable[str]] = None,
+                      **kwargs: Any) -> Dict[str, Any]:
+        """Call ``method`` on every shard concurrently, keyed by school id."""
+        school_ids = list(schools) if schools is not None else self.schools()
+        shards = [self.get(school_id) for school_id in school_ids]
+        results = await asyncio.gather(*(getattr(shard, method)(*args, **kwargs) for shard in shards))
+        return dict(zip(school_ids, results))
+
+    async def query_all(self, method: str, *args: Any, schools: Optional[Iterable[str]] = None,
+                        **kwargs: Any) -> List[Dict[str, Any]]:
+        """Fan a list-returning query out to every shard and merge the rows.
+
+        Each row is tagged with the ``school_id`` it came from.
+        """
+        results = await self.fan_out(method, *args, schools=schools, **kwargs)
+        merged = []
+        for school_id, rows in results.items():
+            for row in rows or []:
+                row = dict(row)
+                row['school_id'] = school_id
+                merged.append(row)
+        return merged
+
+    def opened(self) -> Dict[str, AsyncDatabase]:
+        """Shards opened so far, keyed by school id."""
+        with self._lock:
+            return dict(self._shards)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        shards = self.opened()
+
+        return {
+            school_id: {
+                'db_pool': shard.db.pool_stats(),
+                'db_executor': shard.stats(),
+                'schedule_cache': shard.db.schedule_cache.stats(),
+            }
+            for school_id, shard in shards.items()
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            shards = list(self._shards.values())
+            self._shards.clear()
+
+        for shard in shards:
+            shard.close()
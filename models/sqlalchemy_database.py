@@ -0,0 +1,861 @@
+import json
+import os
+import time
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+
+from sqlalchemy import (
+    CheckConstraint, Column, Float, ForeignKey, Index, Integer, MetaData, PrimaryKeyConstraint, String, Table, Text,
+    DateTime, and_, bindparam, case, create_engine, delete, event, func, insert, select, tuple_, update
+)
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from models.pool import DEFAULT_PRAGMAS
+from models.storage import StorageBackend, DEFAULT_POOL_SIZE, REVOKED_ACCESS_TOKENS_SCOPE, SCHEMA_VERSION, version_scope
+
+BULK_CHUNK_SIZE = 1000
+
+metadata = MetaData()
+
+students = Table(
+    'students', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('student_id', String, unique=True, nullable=False),
+    Column('name', String, nullable=False),
+    Column('class', String, nullable=False),
+    Column('section', String, nullable=False),
+    Column('date_of_birth', String),
+    Column('parent_name', String, nullable=False),
+    Column('parent_email', String, nullable=False),
+    Column('parent_phone', String),
+    Column('created_at', DateTime, server_default=func.current_timestamp()),
+)
+
+teachers = Table(
+    'teachers', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('teacher_id', String, unique=True, nullable=False),
+    Column('name', String, nullable=False),
+    Column('subject', String, nullable=False),
+    Column('email', String, nullable=False),
+    Column('phone', String),
+    Column('created_at', DateTime, server_default=func.current_timestamp()),
+)
+
+attendance = Table(
+    'attendance', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('student_id', String, ForeignKey('students.student_id'), nullable=False),
+    Column('date', String, nullable=False),
+    Column('status', String, nullable=False),
+    Column('reason', String),
+    Column('created_at', DateTime, server_default=func.current_timestamp()),
+    CheckConstraint("status IN ('present', 'absent', 'late')"),
+    Index('idx_attendance_student_date', 'student_id', 'date', 'status'),
+    Index('idx_attendance_student_keyset', 'student_id', 'date', 'id'),
+)
+
+grades = Table(
+    'grades', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('student_id', String, ForeignKey('students.student_id'), nullable=False),
+    Column('subject', String, nullable=False),
+    Column('test_type', String, nullable=False),
+    Column('score', Float, nullable=False),
+    Column('max_score', Float, nullable=False),
+    Column('date', String, nullable=False),
+    Column('teacher_id', String, ForeignKey('teachers.teacher_id'), nullable=False),
+    Column('created_at', DateTime, server_default=func.current_timestamp()),
+    Index('idx_grades_student_subject', 'student_id', 'subject', 'date'),
+    Index('idx_grades_student_keyset', 'student_id', 'date', 'id'),
+)
+
+class_schedule = Table(
+    'class_schedule', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('class', String, nullable=False),
+    Column('section', String, nullable=False),
+    Column('subject', String, nullable=False),
+    Column('teacher_id', String, ForeignKey('teachers.teacher_id'), nullable=False),
+    Column('day_of_week', String, nullable=False),
+    Column('start_time', String, nullable=False),
+    Column('end_time', String, nullable=False),
+    Column('room', String),
+)
+
+parent_auth = Table(
+    'parent_auth', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('parent_email', String, unique=True, nullable=False),
+    Column('password_hash', String, nullable=False),
+    Column('student_ids', String, nullable=False),
+    Column('last_login', DateTime),
+    Column('created_at', DateTime, server_default=func.current_timestamp()),
+)
+
+parent_students = Table(
+    'parent_students', metadata,
+    Column('parent_email', String, nullable=False),
+    Column('student_id', String, nullable=False),
+    Column('created_at', DateTime, server_default=func.current_timestamp()),
+    PrimaryKeyConstraint('parent_email', 'student_id'),
+    Index('idx_parent_students_student', 'student_id', 'parent_email'),
+    sqlite_with_rowid=False,
+)
+
+chat_sessions = Table(
+    'chat_sessions', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('session_id', String, unique=True, nullable=False),
+    Column('parent_email', String, nullable=False),
+    Column('student_id', String, nullable=False),
+    Column('messages', Text, nullable=False),
+    Column('created_at', DateTime, server_default=func.current_timestamp()),
+    Column('updated_at', DateTime, server_default=func.current_timestamp()),
+)
+
+chat_messages = Table(
+    'chat_messages', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('session_id', String, ForeignKey('chat_sessions.session_id'), nullable=False),
+    Column('seq', Integer, nullable=False),
+    Column('role', String, nullable=False),
+    Column('content', Text, nullable=False),
+    Column('timestamp', String),
+    Index('idx_chat_messages_session_seq', 'session_id', 'seq', unique=True),
+)
+
+refresh_tokens = Table(
+    'refresh_tokens', metadata,
+    Column('token_hash', String, primary_key=True),
+    Column('parent_email', String, nullable=False),
+    Column('expires_at', Integer, nullable=False),
+    Column('revoked_at', Integer),
+    Column('replaced_by', String),
+    Column('created_at', DateTime, server_default=func.current_timestamp()),
+    Index('idx_refresh_tokens_parent', 'parent_email', 'expires_at'),
+)
+
+revoked_access_tokens = Table(
+    'revoked_access_tokens', metadata,
+    Column('token_hash', String, primary_key=True),
+    Column('expires_at', Integer, nullable=False),
+    Index('idx_revoked_access_tokens_expiry', 'expires_at'),
+    sqlite_with_rowid=False,
+)
+
+data_versions = Table(
+    'data_versions', metadata,
+    Column('scope', String, primary_key=True),
+    Column('version', Integer, nullable=False),
+    Column('updated_at', Integer, nullable=False),
+)
+
+def _chunks(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+class SQLAlchemyDatabase(StorageBackend):
+    """SQLAlchemy Core implementation of the storage interface.
+
+    Statements are built once per instance from bind parameters so the
+    engine's compiled-statement cache serves every call after the first.
+    Connections come from the engine's QueuePool; bulk writes go through
+    executemany in a single transaction.
+    """
+
+    def __init__(self, url: str = 'sqlite:///data/school.db', pool_size: Optional[int] = None,
+                 max_overflow: int = 5, echo: bool = False):
+        super().__init__()
+        self.url = url
+        self._pool_size = DEFAULT_POOL_SIZE if pool_size is None else pool_size
+
+        if url.startswith('sqlite:///'):
+            path = url[len('sqlite:///'):]
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self.engine = create_engine(
+            url,
+            pool_size=max(self._pool_size, 1),
+            max_overflow=max_overflow,
+            pool_pre_ping=not url.startswith('sqlite'),
+            query_cache_size=1200,
+            echo=echo,
+        )
+
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', self._apply_sqlite_pragmas)
+
+        self._build_statements()
+        self.init_database()
+
+    @staticmethod
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        for name, value in DEFAULT_PRAGMAS.items():
+            dbapi_connection.execute(f"PRAGMA {name} = {value}")
+
+    def _insert_ignore(self, table: Table):
+        """INSERT that skips rows violating a unique constraint."""
+        if self.engine.dialect.name == 'sqlite':
+            return sqlite.insert(table).on_conflict_do_nothing()
+        if self.engine.dialect.name == 'postgresql':
+            return postgresql.insert(table).on_conflict_do_nothing()
+        return insert(table).prefix_with('IGNORE')
+
+    def _upsert_version(self):
+        """Create a data_versions row at 1 or bump it, in one atomic statement."""
+        dv = data_versions.c
+        if self.engine.dialect.name in ('sqlite', 'postgresql'):
+            dialect = sqlite if self.engine.dialect.name == 'sqlite' else postgresql
+            statement = dialect.insert(data_versions).values(scope=bindparam('key'), version=1, updated_at=bindparam('now'))
+            return statement.on_conflict_do_update(
+                index_elements=[dv.scope],
+                set_={'version': dv.version + 1, 'updated_at': statement.excluded.updated_at},
+            )
+        statement = mysql.insert(data_versions).values(scope=bindparam('key'), version=1, updated_at=bindparam('now'))
+        return statement.on_duplicate_key_update(version=dv.version + 1, updated_at=statement.inserted.updated_at)
+
+    def _build_statements(self):
+        s = students.c
+        ps = parent_students.c
+        a = attendance.c
+        g = grades.c
+        cs = class_schedule.c
+        t = teachers.c
+        cm = chat_messages.c
+
+        # Like ``SELECT s.*, ps.parent_email``: the linked parent's email wins
+        self._student_by_parent = (
+            select(*[column for column in students.c if column.name != 'parent_email'], ps.parent_email)
+            .select_from(parent_students.join(students, s.student_id == ps.student_id))
+            .where(ps.parent_email == bindparam('parent_email'), ps.student_id == bindparam('student_id'))
+        )
+
+        self._students_by_parent = (
+            select(*[column for column in students.c if column.name != 'parent_email'], ps.parent_email)
+            .select_from(parent_students.join(students, s.student_id == ps.student_id))
+            .where(ps.parent_email == bindparam('parent_email'))
+            .order_by(ps.student_id)
+        )
+
+        self._parent_student_ids = (
+            select(ps.student_id)
+            .where(ps.parent_email == bindparam('parent_email'))
+            .order_by(ps.student_id)
+        )
+
+        self._parent_auth = select(parent_auth).where(parent_auth.c.parent_email == bindparam('email'))
+
+        self._record_login = (
+            update(parent_auth)
+            .where(parent_auth.c.parent_email == bindparam('email'))
+            .values(last_login=func.current_timestamp())
+        )
+        self._record_login_rehash = self._record_login.values(password_hash=bindparam('new_hash'))
+
+        rt = refresh_tokens.c
+        self._refresh_token = select(refresh_tokens).where(rt.token_hash == bindparam('token_hash'))
+        self._prune_refresh_tokens = delete(refresh_tokens).where(
+            rt.parent_email == bindparam('email'), rt.expires_at < bindparam('now')
+        )
+        self._revoke_refresh_token = (
+            update(refresh_tokens)
+            .where(rt.token_hash == bindparam('hash'), rt.revoked_at.is_(None))
+            .values(revoked_at=bindparam('now'), replaced_by=bindparam('new_hash'))
+        )
+        self._revoke_parent_refresh_tokens = (
+            update(refresh_tokens)
+            .where(rt.parent_email == bindparam('email'), rt.revoked_at.is_(None))
+            .values(revoked_at=bindparam('now'))
+        )
+
+        rat = revoked_access_tokens.c
+        self._prune_revoked_access_tokens = delete(revoked_access_tokens).where(rat.expires_at < bindparam('now'))
+        self._revoked_access_tokens = select(rat.token_hash).where(rat.expires_at >= bindparam('now'))
+
+        dv = data_versions.c
+        self._data_versions = select(dv.scope, dv.version, dv.updated_at).where(
+            dv.scope.in_(bindparam('scopes', expanding=True))
+        )
+        self._bump_version = self._upsert_version()
+
+        self._attendance_range = (
+            select(attendance)
+            .where(a.student_id == bindparam('student_id'), a.date.between(bindparam('start_date'), bindparam('end_date')))
+            .order_by(a.date.desc())
+        )
+
+        present = func.sum(case((a.status == 'present', 1), else_=0))
+        self._attendance_summary = (
+            select(
+                func.count().label('total_days'),
+                func.coalesce(present, 0).label('present'),
+                func.coalesce(func.sum(case((a.status == 'absent', 1), else_=0)), 0).label('absent'),
+                func.coalesce(func.sum(case((a.status == 'late', 1), else_=0)), 0).label('late'),
+            )
+            .where(a.student_id == bindparam('student_id'), a.date.between(bindparam('start_date'), bindparam('end_date')))
+        )
+
+        self._recent_absences = (
+            select(a.date)
+            .where(
+                a.student_id == bindparam('student_id'),
+                a.date.between(bindparam('start_date'), bindparam('end_date')),
+                a.status == 'absent'
+            )
+            .order_by(a.date.desc())
+            .limit(bindparam('limit'))
+        )
+
+        grades_base = (
+            select(grades, t.name.label('teacher_name'))
+            .select_from(grades.join(teachers, g.teacher_id == t.teacher_id))
+            .where(g.student_id == bindparam('student_id'))
+        )
+        self._grades_all = grades_base.order_by(g.date.desc())
+        self._grades_subject = grades_base.where(g.subject == bindparam('subject')).order_by(g.date.desc())
+
+        # Keyset pages, keyed by (subject filter, after a cursor)
+        after_attendance = tuple_(a.date, a.id) < tuple_(bindparam('after_date'), bindparam('after_id'))
+        attendance_page = (
+            select(attendance)
+            .where(a.student_id == bindparam('student_id'), a.date.between(bindparam('start_date'), bindparam('end_date')))
+            .order_by(a.date.desc(), a.id.desc())
+            .limit(bindparam('limit'))
+        )
+        self._attendance_page = {False: attendance_page, True: attendance_page.where(after_attendance)}
+
+        after_grade = tuple_(g.date, g.id) < tuple_(bindparam('after_date'), bindparam('after_id'))
+        grades_page = grades_base.order_by(g.date.desc(), g.id.desc()).limit(bindparam('limit'))
+        grades_subject_page = grades_page.where(g.subject == bindparam('subject'))
+        self._grades_page = {
+            (False, False): grades_page,
+            (False, True): grades_page.where(after_grade),
+            (True, False): grades_subject_page,
+            (True, True): grades_subject_page.where(after_grade),
+        }
+
+        self._grade_summary_all = self._grade_summary_statement(subject_filter=False)
+        self._grade_summary_subject = self._grade_summary_statement(subject_filter=True)
+
+        self._class_schedule = (
+            select(class_schedule, t.name.label('teacher_name'))
+            .select_from(class_schedule.join(teachers, cs.teacher_id == t.teacher_id))
+            .where(cs['class'] == bindparam('class_name'), cs.section == bindparam('section'))
+            .order_by(cs.day_of_week, cs.start_time)
+        )
+
+        self._max_seq = select(func.coalesce(func.max(cm.seq), 0)).where(cm.session_id == bindparam('session_id'))
+
+        # seq is taken from the session's rows in the same statement
+        next_seq = (
+            select(func.coalesce(func.max(cm.seq), 0) + 1)
+            .where(cm.session_id == bindparam('sid'))
+            .scalar_subquery()
+        )
+        self._append_chat_message = insert(chat_messages).values(
+            session_id=bindparam('sid'),
+            seq=next_seq,
+            role=bindparam('role'),
+            content=bindparam('content'),
+            timestamp=bindparam('ts'),
+        )
+
+        self._chat_messages = (
+            select(cm.role, cm.content, cm.timestamp)
+            .where(cm.session_id == bindparam('session_id'))
+            .order_by(cm.seq)
+        )
+
+        self._touch_session = (
+            update(chat_sessions)
+            .where(chat_sessions.c.session_id == bindparam('sid'))
+            .values(updated_at=func.current_timestamp())
+        )
+
+    def _grade_summary_statement(self, subject_filter: bool):
+        g = grades.c
+        t = teachers.c
+        percent = g.score * 100.0 / g.max_score
+
+        where = [g.student_id == bindparam('student_id')]
+        if subject_filter:
+            where.append(g.subject == bindparam('subject'))
+
+        ranked = (
+            select(
+                g.subject,
+                g.score,
+                g.max_score,
+                g.date,
+                t.name.label('teacher_name'),
+                func.row_number().over(partition_by=g.subject, order_by=(g.date.desc(), g.id.desc())).label('recency'),
+                func.avg(percent).over(partition_by=g.subject).label('average'),
+                func.count().over(partition_by=g.subject).label('test_count'),
+                func.avg(percent).over().label('overall_average'),
+            )
+            .select_from(grades.join(teachers, g.teacher_id == t.teacher_id))
+            .where(and_(*where))
+            .cte('ranked')
+        )
+
+        r = ranked.c
+        return (
+            select(
+                r.subject,
+                r.score.label('latest_score'),
+                r.max_score.label('latest_max_score'),
+                r.date.label('latest_date'),
+                r.teacher_name,
+                r.average,
+                r.test_count,
+                r.overall_average,
+            )
+            .where(r.recency == 1)
+            .order_by(r.date.desc())
+        )
+
+    @property
+    def pool_size(self) -> int:
+        return self._pool_size
+
+    def pool_stats(self) -> Dict[str, Any]:
+        pool = self.engine.pool
+        return {
+            'pool_size': self._pool_size,
+            'checked_out': pool.checkedout() if hasattr(pool, 'checkedout') else 0,
+            'idle': pool.checkedin() if hasattr(pool, 'checkedin') else 0,
+            'overflow': pool.overflow() if hasattr(pool, 'overflow') else 0,
+        }
+
+    def close(self) -> None:
+        self.engine.dispose()
+
+    def init_database(self) -> None:
+        # SQLite keeps the schema version in the file header; other servers
+        # rely on create_all's existence checks
+        versioned = self.engine.dialect.name == 'sqlite'
+        if versioned:
+            with self.engine.connect() as conn:
+                if conn.exec_driver_sql("PRAGMA user_version").scalar() >= SCHEMA_VERSION:
+                    return
+
+        with self.engine.begin() as conn:
+            metadata.create_all(conn)
+            self._create_indexes(conn)
+            self._backfill_parent_students(conn)
+            self._migrate_chat_messages(conn)
+            # Last, so a file is never marked current while any step above is missing;
+            # the sqlite3 backend trusts this stamp and skips its own DDL
+            if versioned:
+                conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.schema_initialized = True
+
+    def _create_indexes(self, conn) -> None:
+        """Create missing indexes; create_all skips them on tables that already exist."""
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+    def _backfill_parent_students(self, conn) -> None:
+        """Populate parent_students from legacy comma-joined parent_auth.student_ids."""
+        pa = parent_auth.c
+        linked = select(parent_students.c.parent_email).where(parent_students.c.parent_email == pa.parent_email)
+        rows = conn.execute(select(pa.parent_email, pa.student_ids).where(~linked.exists())).all()
+
+        links = [
+            {'parent_email': row.parent_email, 'student_id': student_id.strip()}
+            for row in rows
+            for student_id in row.student_ids.split(',')
+            if student_id.strip()
+        ]
+        if links:
+            conn.execute(self._insert_ignore(parent_students), links)
+
+    def _migrate_chat_messages(self, conn) -> None:
+        """Move legacy chat_sessions.messages JSON blobs into chat_messages rows."""
+        cs = chat_sessions.c
+        rows = conn.execute(select(cs.session_id, cs.messages).where(cs.messages != '[]')).all()
+
+        for row in rows:
+            exists = conn.execute(
+                select(chat_messages.c.id).where(chat_messages.c.session_id == row.session_id).limit(1)
+            ).first()
+            if exists is None:
+                messages = json.loads(row.messages)
+                if messages:
+                    conn.execute(insert(chat_messages), [
+                        {
+                            'session_id': row.session_id,
+                            'seq': seq,
+                            'role': message.get('role'),
+                            'content': message.get('content', ''),
+                            'timestamp': message.get('timestamp'),
+                        }
+                        for seq, message in enumerate(messages, start=1)
+                    ])
+
+            conn.execute(update(chat_sessions).where(cs.session_id == row.session_id).values(messages='[]'))
+
+    def _fetch_all(self, statement, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            return [dict(row) for row in conn.execute(statement, params).mappings()]
+
+    def _fetch_one(self, statement, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            row = conn.execute(statement, params).mappings().first()
+            return dict(row) if row else None
+
+    # Parents and authorization
+
+    def get_student_by_parent(self, parent_email: str, student_id: str) -> Optional[Dict[str, Any]]:
+        return self._fetch_one(self._student_by_parent, {'parent_email': parent_email, 'student_id': student_id})
+
+    def get_students_by_parent(self, parent_email: str) -> List[Dict[str, Any]]:
+        return self._fetch_all(self._students_by_parent, {'parent_email': parent_email})
+
+    def get_parent_student_ids(self, parent_email: str) -> List[str]:
+        with self.engine.connect() as conn:
+            return list(conn.execute(self._parent_student_ids, {'parent_email': parent_email}).scalars())
+
+    def get_parent_auth(self, email: str) -> Optional[Dict[str, Any]]:
+        return self._fetch_one(self._parent_auth, {'email': email})
+
+    def record_parent_login(self, email: str, password_hash: Optional[str] = None) -> None:
+        with self.engine.begin() as conn:
+            if password_hash:
+                conn.execute(self._record_login_rehash, {'email': email, 'new_hash': password_hash})
+            else:
+                conn.execute(self._record_login, {'email': email})
+
+    def _insert_parent_account(self, email: str, password_hash: str, student_ids: List[str]) -> int:
+        with self.engine.begin() as conn:
+            result = conn.execute(insert(parent_auth), {
+                'parent_email': email,
+                'password_hash': password_hash,
+                'student_ids': ','.join(student_ids),
+            })
+            if student_ids:
+                conn.execute(self._insert_ignore(parent_students), [
+                    {'parent_email': email, 'student_id': student_id} for student_id in student_ids
+                ])
+            self._bump_versions(conn, [version_scope('roster', student_id) for student_id in student_ids])
+            return result.inserted_primary_key[0]
+
+    # Attendance and grades
+
+    def get_attendance(self, student_id: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        return self._fetch_all(self._attendance_range, {
+            'student_id': student_id, 'start_date': start_date, 'end_date': end_date
+        })
+
+    def get_attendance_page(self, student_id: str, start_date: str, end_date: str, limit: int,
+                            after: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        params = {'student_id': student_id, 'start_date': start_date, 'end_date': end_date, 'limit': limit}
+        if after:
+            params.update(after_date=after[0], after_id=after[1])
+        return self._fetch_all(self._attendance_page[bool(after)], params)
+
+    def get_attendance_summary(self, student_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+        summary = self._fetch_one(self._attendance_summary, {
+            'student_id': student_id, 'start_date': start_date, 'end_date': end_date
+        })
+        summary = {key: int(value or 0) for key, value in summary.items()}
+        total = summary['total_days']
+        # Round half up, matching SQLite's ROUND() in the sqlite3 backend
+        summary['attendance_rate'] = int(100.0 * summary['present'] / total + 0.5) if total else 0
+        return summary
+
+    def get_recent_absences(self, student_id: str, start_date: str, end_date: str, limit: int = 5) -> List[str]:
+        with self.engine.connect() as conn:
+            return list(conn.execute(self._recent_absences, {
+                'student_id': student_id, 'start_date': start_date, 'end_date': end_date, 'limit': limit
+            }).scalars())
+
+    def get_grades(self, student_id: str, subject: Optional[str] = None) -> List[Dict[str, Any]]:
+        if subject:
+            return self._fetch_all(self._grades_subject, {'student_id': student_id, 'subject': subject})
+        return self._fetch_all(self._grades_all, {'student_id': student_id})
+
+    def get_grades_page(self, student_id: str, limit: int, subject: Optional[str] = None,
+                        after: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        params = {'student_id': student_id, 'subject': subject, 'limit': limit}
+        if after:
+            params.update(after_date=after[0], after_id=after[1])
+        return self._fetch_all(self._grades_page[bool(subject), bool(after)], params)
+
+    def get_grade_summary(self, student_id: str, subject: Optional[str] = None) -> Dict[str, Any]:
+        if subject:
+            rows = self._fetch_all(self._grade_summary_subject, {'student_id': student_id, 'subject': subject})
+        else:
+            rows = self._fetch_all(self._grade_summary_all, {'student_id': student_id})
+
+        overall_average = rows[0]['overall_average'] if rows else None
+        for row in rows:
+            del row['overall_average']
+
+        return {
+            'subjects': rows,
+            'overall_average': overall_average,
+            'total_tests': sum(row['test_count'] for row in rows)
+        }
+
+    # Schedules
+
+    def _load_class_schedule(self, class_name: str, section: str) -> tuple:
+        return tuple(self._fetch_all(self._class_schedule, {'class_name': class_name, 'section': section}))
+
+    # Data versions
+
+    def get_data_versions(self, scopes: List[str]) -> Dict[str, Dict[str, int]]:
+        if not scopes:
+            return {}
+        rows = self._fetch_all(self._data_versions, {'scopes': list(scopes)})
+        return {row['scope']: {'version': row['version'], 'updated_at': row['updated_at']} for row in rows}
+
+    def _bump_versions(self, conn, scopes: Iterable[str]) -> None:
+        """Bump data versions inside the caller's transaction.
+
+        An upsert, so two first writes to the same scope cannot both try to
+        insert its row and abort one of the writes on a key violation.
+        """
+        now = int(time.time())
+        params = [{'key': scope, 'now': now} for scope in scopes]
+        if params:
+            conn.execute(self._bump_version, params)
+
+    # Refresh tokens
+
+    def insert_refresh_token(self, token_hash: str, parent_email: str, expires_at: int) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(self._prune_refresh_tokens, {'email': parent_email, 'now': int(time.time())})
+            conn.execute(insert(refresh_tokens), {
+                'token_hash': token_hash, 'parent_email': parent_email, 'expires_at': expires_at
+            })
+
+    def get_refresh_token(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        return self._fetch_one(self._refresh_token, {'token_hash': token_hash})
+
+    def revoke_refresh_token(self, token_hash: str, replaced_by: Optional[str] = None) -> bool:
+        with self.engine.begin() as conn:
+            result = conn.execute(self._revoke_refresh_token, {
+                'hash': token_hash, 'now': int(time.time()), 'new_hash': replaced_by
+            })
+            return result.rowcount == 1
+
+    def revoke_parent_refresh_tokens(self, parent_email: str) -> int:
+        with self.engine.begin() as conn:
+            result = conn.execute(self._revoke_parent_refresh_tokens, {'email': parent_email, 'now': int(time.time())})
+            return result.rowcount
+
+    def revoke_access_token(self, token_hash: str, expires_at: int) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(self._prune_revoked_access_tokens, {'now': int(time.time())})
+            conn.execute(self._insert_ignore(revoked_access_tokens), {'token_hash': token_hash, 'expires_at': expires_at})
+            self._bump_versions(conn, [REVOKED_ACCESS_TOKENS_SCOPE])
+
+    def get_revoked_access_tokens(self) -> List[str]:
+        with self.engine.connect() as conn:
+            return list(conn.execute(self._revoked_access_tokens, {'now': int(time.time())}).scalars())
+
+    # Chat transcripts
+
+    def create_chat_session(self, session_id: str, parent_email: str, student_id: str) -> int:
+        with self.engine.begin() as conn:
+            result = conn.execute(insert(chat_sessions), {
+                'session_id': session_id,
+                'parent_email': parent_email,
+                'student_id': student_id,
+                'messages': json.dumps([]),
+            })
+            return result.inserted_primary_key[0]
+
+    def append_chat_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> int:
+        return self.append_chat_messages_batch({session_id: messages})
+
+    def append_chat_messages_batch(self, transcripts: Dict[str, List[Dict[str, Any]]]) -> int:
+        transcripts = {session_id: messages for session_id, messages in transcripts.items() if messages}
+        if not transcripts:
+            return 0
+
+        appended = 0
+        with self.engine.begin() as conn:
+            for session_id, messages in transcripts.items():
+                # One statement per message so each seq sees the previous insert
+                for message in messages:
+                    conn.execute(self._append_chat_message, {
+                        'sid': session_id,
+                        'role': message['role'],
+                        'content': message['content'],
+                        'ts': message.get('timestamp'),
+                    })
+                conn.execute(self._touch_session, {'sid': session_id})
+                appended += len(messages)
+
+        return appended
+
+    def get_chat_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        return self._fetch_all(self._chat_messages, {'session_id': session_id})
+
+    def update_chat_session(self, session_id: str, messages: List[Dict[str, Any]]) -> int:
+        """Persist a full conversation history by appending only the messages not yet stored."""
+        with self.engine.connect() as conn:
+            stored = conn.execute(self._max_seq, {'session_id': session_id}).scalar()
+
+        return self.append_chat_messages(session_id, messages[stored:])
+
+    # Writes
+
+    def _insert_one(self, table: Table, values: Dict[str, Any], scopes: Iterable[str] = ()) -> int:
+        with self.engine.begin() as conn:
+            row_id = conn.execute(insert(table), values).inserted_primary_key[0]
+            self._bump_versions(conn, scopes)
+            return row_id
+
+    def _insert_many(self, table: Table, rows: Iterable[Dict[str, Any]], scopes: Iterable[str] = ()) -> int:
+        """Insert rows in chunks inside a single transaction.
+
+        ``scopes`` may be filled while ``rows`` is consumed; it is bumped afterwards.
+        """
+        inserted = 0
+        with self.engine.begin() as conn:
+            for chunk in _chunks(rows, BULK_CHUNK_SIZE):
+                conn.execute(insert(table), chunk)
+                inserted += len(chunk)
+            self._bump_versions(conn, scopes)
+        return inserted
+
+    @staticmethod
+    def _student_values(student: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'student_id': student['student_id'],
+            'name': student['name'],
+            'class': student['class'],
+            'section': student['section'],
+            'date_of_birth': student.get('date_of_birth'),
+            'parent_name': student['parent_name'],
+            'parent_email': student['parent_email'],
+            'parent_phone': student.get('parent_phone'),
+        }
+
+    @staticmethod
+    def _teacher_values(teacher: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'teacher_id': teacher['teacher_id'],
+            'name': teacher['name'],
+            'subject': teacher['subject'],
+            'email': teacher['email'],
+            'phone': teacher.get('phone'),
+        }
+
+    @staticmethod
+    def _grade_values(grade: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'student_id': grade['student_id'],
+            'subject': grade['subject'],
+            'test_type': grade['test_type'],
+            'score': grade['score'],
+            'max_score': grade['max_score'],
+            'date': grade['date'],
+            'teacher_id': grade['teacher_id'],
+        }
+
+    @staticmethod
+    def _schedule_values(schedule: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'class': schedule['class'],
+            'section': schedule['section'],
+            'subject': schedule['subject'],
+            'teacher_id': schedule['teacher_id'],
+            'day_of_week': schedule['day_of_week'],
+            'start_time': schedule['start_time'],
+            'end_time': schedule['end_time'],
+            'room': schedule.get('room'),
+        }
+
+    def add_student(self, student_data: Dict[str, Any]) -> int:
+        return self._insert_one(students, self._student_values(student_data),
+                                [version_scope('roster', student_data['student_id'])])
+
+    def add_teacher(self, teacher_data: Dict[str, Any]) -> int:
+        teacher_id = self._insert_one(teachers, self._teacher_values(teacher_data), [version_scope('teachers')])
+        # Cached schedules embed teacher names from the join
+        self.schedule_cache.invalidate()
+        return teacher_id
+
+    def add_attendance(self, student_id: str, date: str, status: str, reason: str = None) -> int:
+        return self._insert_one(attendance, {
+            'student_id': student_id, 'date': date, 'status': status, 'reason': reason
+        }, [version_scope('attendance', student_id)])
+
+    def add_grade(self, grade_data: Dict[str, Any]) -> int:
+        return self._insert_one(grades, self._grade_values(grade_data), [version_scope('grades', grade_data['student_id'])])
+
+    def add_schedule(self, schedule_data: Dict[str, Any]) -> int:
+        schedule_id = self._insert_one(
+            class_schedule, self._schedule_values(schedule_data),
+            [version_scope('schedule', schedule_data['class'], schedule_data['section'])]
+        )
+        self.schedule_cache.invalidate((schedule_data['class'], schedule_data['section']))
+        return schedule_id
+
+    def add_students_bulk(self, students_data: Iterable[Dict[str, Any]]) -> int:
+        scopes = set()
+
+        def rows():
+            for student in students_data:
+                scopes.add(version_scope('roster', student['student_id']))
+                yield self._student_values(student)
+
+        return self._insert_many(students, rows(), scopes)
+
+    def add_teachers_bulk(self, teachers_data: Iterable[Dict[str, Any]]) -> int:
+        inserted = self._insert_many(teachers, (self._teacher_values(t) for t in teachers_data), [version_scope('teachers')])
+        self.schedule_cache.invalidate()
+        return inserted
+
+    def add_attendance_bulk(self, records: Iterable[Dict[str, Any]]) -> int:
+        scopes = set()
+
+        def rows():
+            for record in records:
+                scopes.add(version_scope('attendance', record['student_id']))
+                yield {
+                    'student_id': record['student_id'],
+                    'date': record['date'],
+                    'status': record['status'],
+                    'reason': record.get('reason'),
+                }
+
+        return self._insert_many(attendance, rows(), scopes)
+
+    def add_grades_bulk(self, grades_data: Iterable[Dict[str, Any]]) -> int:
+        scopes = set()
+
+        def rows():
+            for grade in grades_data:
+                scopes.add(version_scope('grades', grade['student_id']))
+                yield self._grade_values(grade)
+
+        return self._insert_many(grades, rows(), scopes)
+
+    def add_schedules_bulk(self, schedules: Iterable[Dict[str, Any]]) -> int:
+        classes = set()
+        scopes = set()
+
+        def rows():
+            for schedule in schedules:
+                classes.add((schedule['class'], schedule['section']))
+                scopes.add(version_scope('schedule', schedule['class'], schedule['section']))
+                yield self._schedule_values(schedule)
+
+        inserted = self._insert_many(class_schedule, rows(), scopes)
+
+        for key in classes:
+            self.schedule_cache.invalidate(key)
+
+        return inserted
@@ -0,0 +1,360 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple
+
+from auth.hashing import pwd_context
+from models.cache import TTLCache
+
+DEFAULT_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+SCHEDULE_CACHE_SIZE = int(os.getenv("SCHEDULE_CACHE_SIZE", "512"))
+SCHEDULE_CACHE_TTL = float(os.getenv("SCHEDULE_CACHE_TTL", "600"))
+STREAM_BATCH_SIZE = 500
+# Bump whenever init_database gains a table, index or migration. 5 reruns
+# the DDL on files SQLAlchemyDatabase stamped 4 without their keyset indexes
+SCHEMA_VERSION = 5
+REFRESH_REUSE_GRACE = 30
+
+def version_scope(kind: str, *key: str) -> str:
+    """Key of a ``data_versions`` row, e.g. ``grades:12345`` or ``schedule:10:A``.
+
+    Every write bumps the scopes whose reads it changes; ``teachers`` covers
+    the teacher names joined into grades and schedules, ``roster:<student>``
+    the student row and the parents linked to it.
+    """
+    return ':'.join((kind,) + key)
+
+# Bumped with every access token revocation so workers know when to reload the list
+REVOKED_ACCESS_TOKENS_SCOPE = version_scope('revoked_access_tokens')
+
+def schedule_scopes(class_name: str, section: str) -> List[str]:
+    """Scopes a class timetable reads: its periods and the teacher names joined into them."""
+    return [version_scope('schedule', class_name, section), version_scope('teachers')]
+
+class StorageBackend(ABC):
+    """Storage interface behind the ``Database`` API used by main.py and SchoolBot.
+
+    Backends implement the table-level reads and writes. Password handling
+    and the class schedule cache are shared here so every backend behaves
+    the same way.
+    """
+
+    def __init__(self):
+        self.pwd_context = pwd_context
+        # Schedules change about once a term; keyed by (class, section) and
+        # checked against data_versions on every read
+        self.schedule_cache = TTLCache(maxsize=SCHEDULE_CACHE_SIZE, ttl=SCHEDULE_CACHE_TTL)
+        # True when this process created or migrated the schema
+        self.schema_initialized = False
+
+    # Lifecycle and pool introspection
+
+    @property
+    @abstractmethod
+    def pool_size(self) -> int:
+        ...
+
+    @abstractmethod
+    def pool_stats(self) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def init_database(self) -> None:
+        """Create and migrate the schema unless it is already at ``SCHEMA_VERSION``."""
+        ...
+
+    @abstractmethod
+    def close(self) -> None:
+        ...
+
+    # Parents and authorization
+
+    @abstractmethod
+    def get_student_by_parent(self, parent_email: str, student_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def get_students_by_parent(self, parent_email: str) -> List[Dict[str, Any]]:
+        """Every student linked to a parent, in one query."""
+        ...
+
+    @abstractmethod
+    def get_parent_student_ids(self, parent_email: str) -> List[str]:
+        ...
+
+    @abstractmethod
+    def get_parent_auth(self, email: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def record_parent_login(self, email: str, password_hash: Optional[str] = None) -> None:
+        """Stamp ``last_login``, replacing the stored hash when one is given."""
+        ...
+
+    @abstractmethod
+    def _insert_parent_account(self, email: str, password_hash: str, student_ids: List[str]) -> int:
+        ...
+
+    def authenticate_parent(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        result = self.get_parent_auth(email)
+
+        if not result:
+            return None
+
+        # bcrypt is slow; verify without holding a pooled connection
+        valid, new_hash = self.pwd_context.verify_and_update(password, result['password_hash'])
+        if not valid:
+            return None
+
+        # new_hash is set when the configured bcrypt cost has changed
+        self.record_parent_login(email, new_hash)
+
+        user = dict(result)
+        user['student_ids'] = ','.join(self.get_parent_student_ids(email))
+        return user
+
+    def create_parent_account(self, email: str, password: str, student_ids: List[str]) -> int:
+        password_hash = self.pwd_context.hash(password)
+        return self._insert_parent_account(email, password_hash, student_ids)
+
+    # Refresh tokens
+
+    @abstractmethod
+    def insert_refresh_token(self, token_hash: str, parent_email: str, expires_at: int) -> None:
+        ...
+
+    @abstractmethod
+    def get_refresh_token(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def revoke_refresh_token(self, token_hash: str, replaced_by: Optional[str] = None) -> bool:
+        """Revoke a live token; False if it was already revoked or does not exist."""
+        ...
+
+    @abstractmethod
+    def revoke_parent_refresh_tokens(self, parent_email: str) -> int:
+        ...
+
+    # Revoked access tokens
+
+    @abstractmethod
+    def revoke_access_token(self, token_hash: str, expires_at: int) -> None:
+        """Deny an access token to every process using this database until ``expires_at``."""
+        ...
+
+    @abstractmethod
+    def get_revoked_access_tokens(self) -> List[str]:
+        """Hashes of every revoked access token that has not expired yet."""
+        ...
+
+    def rotate_refresh_token(self, token_hash: str, new_hash: str, expires_at: int) -> Optional[Dict[str, Any]]:
+        """Swap a live refresh token for a new one and return the old token's row.
+
+        Returns None when the token is unknown, expired, revoked or already
+        rotated. A rotated token replayed after ``REFRESH_REUSE_GRACE``
+        seconds is treated as stolen, and every refresh token of that parent
+        is revoked.
+        """
+        token = self.get_refresh_token(token_hash)
+        if not token:
+            return None
+
+        now = int(time.time())
+        if token['revoked_at'] is not None:
+            # Tabs sharing one token race to refresh; only later replays of a
+            # rotated (not logged-out) token are suspicious
+            if token['replaced_by'] is not None and now - token['revoked_at'] > REFRESH_REUSE_GRACE:
+                self.revoke_parent_refresh_tokens(token['parent_email'])
+            return None
+
+        if token['expires_at'] <= now:
+            return None
+
+        # Compare-and-set: only one concurrent caller wins the rotation
+        if not self.revoke_refresh_token(token_hash, replaced_by=new_hash):
+            return None
+
+        self.insert_refresh_token(new_hash, token['parent_email'], expires_at)
+        return token
+
+    # Attendance and grades
+
+    @abstractmethod
+    def get_attendance(self, student_id: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def get_attendance_page(self, student_id: str, start_date: str, end_date: str, limit: int,
+                            after: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        """Up to ``limit`` rows ordered by ``(date, id)`` descending, strictly after the ``after`` key."""
+        ...
+
+    def iter_attendance(self, student_id: str, start_date: str, end_date: str,
+                        batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        yield from self._iter_pages(
+            lambda limit, after: self.get_attendance_page(student_id, start_date, end_date, limit, after),
+            batch_size
+        )
+
+    @abstractmethod
+    def get_attendance_summary(self, student_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def get_recent_absences(self, student_id: str, start_date: str, end_date: str, limit: int = 5) -> List[str]:
+        ...
+
+    @abstractmethod
+    def get_grades(self, student_id: str, subject: Optional[str] = None) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def get_grades_page(self, student_id: str, limit: int, subject: Optional[str] = None,
+                        after: Optional[Tuple[str, int]] = None) -> List[Dict[str, Any]]:
+        """Keyset page of grades; see :meth:`get_attendance_page`."""
+        ...
+
+    def iter_grades(self, student_id: str, subject: Optional[str] = None,
+                    batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        yield from self._iter_pages(
+            lambda limit, after: self.get_grades_page(student_id, limit, subject, after),
+            batch_size
+        )
+
+    def _iter_pages(self, fetch_page: Callable[[int, Optional[Tuple[str, int]]], List[Dict[str, Any]]],
+                    batch_size: int) -> Iterator[Dict[str, Any]]:
+        """Yield rows from successive keyset pages of ``fetch_page(limit, after)``.
+
+        Every page checks a connection out and returns it before its rows
+        are yielded, so a slow client holds neither a pooled connection nor
+        an open read transaction while it downloads. Rows committed while a
+        stream is running may or may not be included, but no row is repeated.
+        """
+        after = None
+        while True:
+            rows = fetch_page(batch_size, after)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1]['date'], rows[-1]['id'])
+
+    @abstractmethod
+    def get_grade_summary(self, student_id: str, subject: Optional[str] = None) -> Dict[str, Any]:
+        ...
+
+    # Data versions
+
+    @abstractmethod
+    def get_data_versions(self, scopes: List[str]) -> Dict[str, Dict[str, int]]:
+        """``{scope: {'version', 'updated_at'}}`` for the scopes that have been written."""
+        ...
+
+    # Schedules
+
+    @abstractmethod
+    def _load_class_schedule(self, class_name: str, section: str) -> tuple:
+        ...
+
+    def get_class_schedule_with_versions(self, class_name: str, section: str) -> Tuple[Dict[str, Dict[str, int]], List[Dict[str, Any]]]:
+        """The class timetable and the ``data_versions`` it is current for.
+
+        Writes from any process bump the ``schedule`` and ``teachers``
+        scopes, so each cache entry is stored with the versions read before
+        it was loaded and only served while they still match. The rows are
+        never older than the returned versions.
+        """
+        scopes = schedule_scopes(class_name, section)
+        versions = self.get_data_versions(scopes)
+        schedule = self.schedule_cache.get_or_load(
+            (class_name, section),
+            lambda: self._load_class_schedule(class_name, section),
+            version=tuple(versions.get(scope, {}).get('version', 0) for scope in scopes)
+        )
+
+        # Callers reshape rows in place, so hand out copies of the cached rows
+        return versions, [dict(row) for row in schedule]
+
+    def get_class_schedule(self, class_name: str, section: str) -> List[Dict[str, Any]]:
+        return self.get_class_schedule_with_versions(class_name, section)[1]
+
+    # Chat transcripts
+
+    @abstractmethod
+    def create_chat_session(self, session_id: str, parent_email: str, student_id: str) -> int:
+        ...
+
+    @abstractmethod
+    def append_chat_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> int:
+        ...
+
+    @abstractmethod
+    def append_chat_messages_batch(self, transcripts: Dict[str, List[Dict[str, Any]]]) -> int:
+        ...
+
+    @abstractmethod
+    def get_chat_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def update_chat_session(self, session_id: str, messages: List[Dict[str, Any]]) -> int:
+        ...
+
+    # Writes
+
+    @abstractmethod
+    def add_student(self, student_data: Dict[str, Any]) -> int:
+        ...
+
+    @abstractmethod
+    def add_teacher(self, teacher_data: Dict[str, Any]) -> int:
+        ...
+
+    @abstractmethod
+    def add_attendance(self, student_id: str, date: str, status: str, reason: str = None) -> int:
+        ...
+
+    @abstractmethod
+    def add_grade(self, grade_data: Dict[str, Any]) -> int:
+        ...
+
+    @abstractmethod
+    def add_schedule(self, schedule_data: Dict[str, Any]) -> int:
+        ...
+
+    @abstractmethod
+    def add_students_bulk(self, students: Iterable[Dict[str, Any]]) -> int:
+        ...
+
+    @abstractmethod
+    def add_teachers_bulk(self, teachers: Iterable[Dict[str, Any]]) -> int:
+        ...
+
+    @abstractmethod
+    def add_attendance_bulk(self, records: Iterable[Dict[str, Any]]) -> int:
+        ...
+
+    @abstractmethod
+    def add_grades_bulk(self, grades: Iterable[Dict[str, Any]]) -> int:
+        ...
+
+    @abstractmethod
+    def add_schedules_bulk(self, schedules: Iterable[Dict[str, Any]]) -> int:
+        ...
+
+def create_database(url: Optional[str] = None, **kwargs: Any) -> StorageBackend:
+    """Build the configured storage backend.
+
+    SQLite through the built-in ``sqlite3`` module stays the default. Setting
+    ``DB_BACKEND=sqlalchemy``, or pointing ``DATABASE_URL`` at a non-SQLite
+    server, selects the SQLAlchemy Core backend instead.
+    """
+    url = url or os.getenv("DATABASE_URL", "sqlite:///data/school.db")
+    backend = os.getenv("DB_BACKEND", "sqlite3" if url.startswith("sqlite:///") else "sqlalchemy")
+
+    if backend == "sqlalchemy":
+        from models.sqlalchemy_database import SQLAlchemyDatabase
+        return SQLAlchemyDatabase(url, **kwargs)
+
+    from models.database import Database
+    return Database(url[len("sqlite:///"):], **kwargs)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Show that a slow query no longer stalls unrelated requests.
+
+One request issues a deliberately slow query while twenty others, arriving a
+millisecond apart, issue quick student lookups. Called synchronously on the
+event loop (as the handlers used to) the quick lookups cannot start until the
+slow one returns; through AsyncDatabase they complete while it is running.
+Latency is measured from when each quick request arrived.
+
+    python scripts/benchmark_async_db.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import tempfile
+
+from models.database import Database
+from models.async_database import AsyncDatabase
+
+QUICK_REQUESTS = 20
+
+SLOW_QUERY = """
+    WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < 3000000)
+    SELECT COUNT(*) FROM counter
+"""
+
+def slow_query(db: Database) -> int:
+    with db.connection() as conn:
+        return conn.execute(SLOW_QUERY).fetchone()[0]
+
+def quick_query(db: Database):
+    return db.get_student_by_parent('nobody@email.com', '00000')
+
+async def simulate(run_query):
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    async def slow():
+        await run_query(slow_query)
+        return loop.time() - started
+
+    async def quick(delay: float):
+        arrived = started + delay
+        await asyncio.sleep(max(arrived - loop.time(), 0))
+        await run_query(quick_query)
+        return loop.time() - arrived
+
+    results = await asyncio.gather(slow(), *[quick(0.001 * (i + 1)) for i in range(QUICK_REQUESTS)])
+    return results[0], sorted(results[1:])
+
+def report(label: str, slow_time: float, latencies):
+    print(f"{label:<20} slow={slow_time * 1000:8.1f} ms  "
+          f"quick p50={latencies[len(latencies) // 2] * 1000:8.2f} ms  "
+          f"quick max={latencies[-1] * 1000:8.2f} ms")
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), pool_size=4)
+        adb = AsyncDatabase(db)
+
+        async def blocking(func):
+            return func(db)
+
+        async def non_blocking(func):
+            return await adb.run(func, db)
+
+        report("sync on event loop", *asyncio.run(simulate(blocking)))
+        report("AsyncDatabase", *asyncio.run(simulate(non_blocking)))
+
+        adb.close()
+
+if __name__ == '__main__':
+    main()
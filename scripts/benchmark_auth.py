@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Micro-benchmark get_current_user with and without the verified-token cache.
+
+Each round authenticates ``--requests`` calls spread round-robin over
+``--users`` distinct access tokens, the way concurrent parents reuse their
+token for every chat message. Every call takes the full request path,
+including the revocation check against a school database holding
+``--revoked`` revoked tokens:
+
+    no cache      every token's signature verified, revocation list polled
+                  every REVOCATION_POLL_SECONDS
+    cached        verified payloads reused, same polling
+    poll always   cached payloads, but the revocation list polled on every
+                  request, which is what asking the database per request costs
+
+    python scripts/benchmark_auth.py --requests 50000 --users 500
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import tempfile
+import time
+from types import SimpleNamespace
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from auth import auth
+from models.async_database import AsyncDatabase
+from models.cache import TTLCache
+from models.database import Database
+
+async def authenticate(db: AsyncDatabase, credentials, requests: int) -> float:
+    shards = SimpleNamespace(for_claims=lambda payload: db)
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(shards=shards)))
+    start = time.perf_counter()
+    for i in range(requests):
+        await auth.get_current_user(request, credentials[i % len(credentials)])
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--revoked', type=int, default=1000, help="revoked tokens in the database")
+    args = parser.parse_args()
+
+    credentials = [
+        HTTPAuthorizationCredentials(
+            scheme='Bearer',
+            credentials=auth.create_access_token({'sub': f'parent{i}@email.com', 'student_ids': str(10000 + i)})
+        )
+        for i in range(args.users)
+    ]
+
+    rounds = {
+        'no cache': (TTLCache(maxsize=0), auth.REVOCATION_POLL_SECONDS),
+        'cached': (TTLCache(maxsize=auth.TOKEN_CACHE_SIZE, ttl=auth.TOKEN_CACHE_TTL), auth.REVOCATION_POLL_SECONDS),
+        'poll always': (TTLCache(maxsize=auth.TOKEN_CACHE_SIZE, ttl=auth.TOKEN_CACHE_TTL), 0),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AsyncDatabase(Database(os.path.join(tmp, 'auth.db')))
+        expires = int(time.time()) + 3600
+        for i in range(args.revoked):
+            db.db.revoke_access_token(f'revoked-{i}', expires)
+
+        for label, (cache, interval) in rounds.items():
+            auth.token_cache = cache
+            auth.revocation_lists[db] = auth.RevocationList(interval)
+            elapsed = asyncio.run(authenticate(db, credentials, args.requests))
+            print(f"{label:<12} {args.requests} requests / {args.users} tokens: "
+                  f"{args.requests / elapsed:10.0f} req/s  {elapsed / args.requests * 1e6:7.1f} us/req  "
+                  f"hit_rate={cache.stats()['hit_rate']}  polls={auth.revocation_lists[db].polls}")
+        db.close()
+
+if __name__ == '__main__':
+    main()
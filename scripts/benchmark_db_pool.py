@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Compare requests/sec for pooled connections against open-per-call.
+
+Each simulated request does what a parent's page load does: an
+authorization lookup followed by attendance and grade reads.
+
+    python scripts/benchmark_db_pool.py --requests 2000 --threads 8
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from models.database import Database
+
+STUDENT_ID = '12345'
+PARENT_EMAIL = 'bench.parent@email.com'
+
+def populate(db: Database):
+    db.add_teacher({'teacher_id': 'T001', 'name': 'Bench Teacher', 'subject': 'Mathematics',
+                    'email': 'teacher@school.edu', 'phone': None})
+    db.add_student({
+        'student_id': STUDENT_ID, 'name': 'Bench Student', 'class': '10', 'section': 'A',
+        'date_of_birth': '2008-01-01', 'parent_name': 'Bench Parent',
+        'parent_email': PARENT_EMAIL, 'parent_phone': None
+    })
+    db.create_parent_account(PARENT_EMAIL, 'password123', [STUDENT_ID])
+
+    for i in range(30):
+        date = (datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d')
+        db.add_attendance(STUDENT_ID, date, 'present')
+        db.add_grade({'student_id': STUDENT_ID, 'subject': 'Mathematics', 'test_type': 'Quiz',
+                      'score': 80, 'max_score': 100, 'date': date, 'teacher_id': 'T001'})
+
+def simulated_request(db: Database):
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+    db.get_student_by_parent(PARENT_EMAIL, STUDENT_ID)
+    db.get_attendance(STUDENT_ID, start_date, end_date)
+    db.get_grades(STUDENT_ID)
+
+def run(db: Database, requests: int, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for _ in executor.map(lambda _: simulated_request(db), range(requests)):
+            pass
+    return requests / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--pool-size', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Baseline mirrors the old behaviour: a fresh connection per call,
+        # default rollback journal and no tuning pragmas.
+        baseline = Database(os.path.join(tmp, 'baseline.db'), pool_size=0)
+        baseline.pool.pragmas = {}
+        with baseline.connection() as conn:
+            conn.execute("PRAGMA journal_mode = DELETE")
+        populate(baseline)
+
+        pooled = Database(os.path.join(tmp, 'pooled.db'), pool_size=args.pool_size)
+        populate(pooled)
+
+        baseline_rps = run(baseline, args.requests, args.threads)
+        pooled_rps = run(pooled, args.requests, args.threads)
+        pooled.close()
+
+    print(f"requests={args.requests} threads={args.threads} pool_size={args.pool_size}")
+    print(f"open-per-call: {baseline_rps:10.1f} req/s")
+    print(f"pooled (WAL):  {pooled_rps:10.1f} req/s  ({pooled_rps / baseline_rps:.2f}x)")
+
+if __name__ == '__main__':
+    main()
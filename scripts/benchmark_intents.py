@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Compare SchoolBot's intent classifiers on a labelled corpus of parent messages.
+
+    substring  the original chain of ``any(word in message ...)`` checks,
+               first match wins, greeting checked first
+    scan-all   the same substring checks run for every intent, which is
+               what scoring intents against each other would cost
+    compiled   chatbot.intents: one word-boundary regex scored in one pass
+
+Reports messages/s over ``--repeat`` passes of the corpus and accuracy
+against the labels; ``--verbose`` also lists the messages each one gets wrong.
+
+    python scripts/benchmark_intents.py --repeat 2000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from typing import Callable, List, Tuple
+
+from chatbot.intents import ATTENDANCE, GENERAL, GRADES, GREETING, HELP, SCHEDULE, TEACHER, classify_intent
+
+CORPUS: List[Tuple[str, str]] = [
+    ("Hi", GREETING),
+    ("Hello!", GREETING),
+    ("hey there", GREETING),
+    ("Good morning", GREETING),
+    ("Good evening, thanks for getting back to me", GREETING),
+    ("Hi, how has Emma's attendance been this month?", ATTENDANCE),
+    ("Was my son absent yesterday?", ATTENDANCE),
+    ("How many absences does he have so far?", ATTENDANCE),
+    ("Has she been late to school a lot?", ATTENDANCE),
+    ("Was he tardy this week?", ATTENDANCE),
+    ("Which days has he missed since September?", ATTENDANCE),
+    ("Hello, can you show me the attendance record please", ATTENDANCE),
+    ("What are the latest test scores?", GRADES),
+    ("How did she do on her history exam?", GRADES),
+    ("Can I see his grades in maths?", GRADES),
+    ("Hi, how are his marks this term?", GRADES),
+    ("What was the result of the science quiz?", GRADES),
+    ("Is the report card out yet?", GRADES),
+    ("How is his performance in English?", GRADES),
+    ("How did my child score in chemistry?", GRADES),
+    ("This is his mother, are his history grades improving?", GRADES),
+    ("What's the class schedule for today?", SCHEDULE),
+    ("What time does the first period begin?", SCHEDULE),
+    ("Can you send me this week's timetable?", SCHEDULE),
+    ("When is PE on Thursdays?", SCHEDULE),
+    ("Good morning, when do classes start on Monday?", SCHEDULE),
+    ("Which classes does she have after lunch?", SCHEDULE),
+    ("Who is her maths teacher?", TEACHER),
+    ("How can I contact the science instructor?", TEACHER),
+    ("What is Mr. Brown's email address?", TEACHER),
+    ("Hi, I'd like to reach his teachers", TEACHER),
+    ("What is the school's mobile phone policy?", GENERAL),
+    ("Are there any rules about uniforms?", GENERAL),
+    ("When are the tuition fees due?", GENERAL),
+    ("What events are coming up this term?", GENERAL),
+    ("Does the school run an after-school program?", GENERAL),
+    ("How do I make a payment online?", GENERAL),
+    ("My daughter thinks her classmate is bullying her", HELP),
+    ("Thanks, that's all", HELP),
+    ("Can you help me?", HELP),
+    ("He said history is his favourite subject", HELP),
+    ("Which chemistry textbook should we buy?", HELP),
+    ("Sometimes he forgets his lunchbox", HELP),
+    ("Is the gym open this weekend?", HELP),
+    ("Our address changed, who should I tell?", HELP),
+    ("We are moving house in this month", HELP),
+]
+
+LEGACY_KEYWORDS = [
+    (GREETING, ['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening', 'start', 'begin']),
+    (ATTENDANCE, ['attendance', 'absent', 'present', 'late']),
+    (GRADES, ['grade', 'score', 'mark', 'test', 'exam', 'performance']),
+    (SCHEDULE, ['schedule', 'timetable', 'class', 'time', 'when']),
+    (TEACHER, ['teacher', 'instructor', 'contact', 'email']),
+    (GENERAL, ['policy', 'rule', 'fee', 'event', 'program', 'school']),
+]
+
+def legacy_classify(message: str) -> str:
+    # What SchoolBot._generate_response did before chatbot.intents
+    lower_message = message.lower()
+    for intent, keywords in LEGACY_KEYWORDS:
+        if any(word in lower_message for word in keywords):
+            return intent
+    return HELP
+
+def scan_all_classify(message: str) -> str:
+    lower_message = message.lower()
+    counts = [sum(word in lower_message for word in keywords) for _, keywords in LEGACY_KEYWORDS]
+    best = max(range(len(counts)), key=lambda index: (counts[index], -index))
+    return LEGACY_KEYWORDS[best][0] if counts[best] else HELP
+
+def measure(classify: Callable[[str], str], repeat: int) -> Tuple[float, float, List[Tuple[str, str, str]]]:
+    messages = [message for message, _ in CORPUS]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            classify(message)
+    elapsed = time.perf_counter() - start
+
+    wrong = [(message, expected, classify(message)) for message, expected in CORPUS
+             if classify(message) != expected]
+    return repeat * len(messages) / elapsed, 1 - len(wrong) / len(CORPUS), wrong
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--verbose', action='store_true', help="list misclassified messages")
+    args = parser.parse_args()
+
+    print(f"{len(CORPUS)} labelled messages x {args.repeat} passes")
+    for name, classify in (('substring', legacy_classify), ('scan-all', scan_all_classify),
+                           ('compiled', classify_intent)):
+        rate, accuracy, wrong = measure(classify, args.repeat)
+        print(f"{name:<10} {rate:10.0f} msg/s  accuracy {accuracy:6.1%}  ({len(wrong)} wrong)")
+        if args.verbose:
+            for message, expected, got in wrong:
+                print(f"    {got:<10} expected {expected:<10} {message!r}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Measure login and non-login latency during a burst of logins.
+
+Fires a burst of concurrent parent logins while a steady stream of cheap
+student lookups runs alongside, and reports p50/p99 latency for both.
+Three ways of running bcrypt are compared:
+
+    inline       verify on the event loop (what a synchronous call inside an
+                 async endpoint does)
+    db-executor  verify inside the database thread pool, holding a worker
+    hasher       verify in the dedicated PasswordHasher pool (current code)
+
+    python scripts/benchmark_login.py --logins 40 --workers 2
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import List
+
+from auth.hashing import PasswordHasher, pwd_context
+from models.async_database import AsyncDatabase
+from models.database import Database
+
+PASSWORD = 'password123'
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def populate(db: Database, parents: int):
+    db.add_students_bulk(
+        {'student_id': str(10000 + i), 'name': f'Student {i}', 'class': '10', 'section': 'A',
+         'parent_name': f'Parent {i}', 'parent_email': f'parent{i}@email.com'}
+        for i in range(parents)
+    )
+    password_hash = pwd_context.hash(PASSWORD)
+    for i in range(parents):
+        db._insert_parent_account(f'parent{i}@email.com', password_hash, [str(10000 + i)])
+
+async def login(adb: AsyncDatabase, mode: str, email: str):
+    if mode == 'inline':
+        return adb.db.authenticate_parent(email, PASSWORD)
+    if mode == 'db-executor':
+        return await adb.run(adb.db.authenticate_parent, email, PASSWORD)
+    return await adb.authenticate_parent(email, PASSWORD)
+
+async def timed(coro, latencies: List[float], scheduled: float = None):
+    # Lookups are timed from when they were due, so time spent waiting for a
+    # blocked event loop to start them counts against them
+    start = scheduled if scheduled is not None else time.perf_counter()
+    await coro
+    latencies.append(time.perf_counter() - start)
+
+async def scenario(adb: AsyncDatabase, mode: str, logins: int, interval: float):
+    login_latencies: List[float] = []
+    query_latencies: List[float] = []
+
+    burst = [
+        asyncio.ensure_future(timed(login(adb, mode, f'parent{i}@email.com'), login_latencies))
+        for i in range(logins)
+    ]
+
+    queries = []
+    start = time.perf_counter()
+    while not all(task.done() for task in burst):
+        scheduled = start + len(queries) * interval
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        while scheduled <= time.perf_counter():
+            i = len(queries) % logins
+            queries.append(asyncio.ensure_future(
+                timed(adb.get_student_by_parent(f'parent{i}@email.com', str(10000 + i)), query_latencies, scheduled)
+            ))
+            scheduled = start + len(queries) * interval
+
+    await asyncio.gather(*burst, *queries)
+    return login_latencies, query_latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=2, help="password hasher workers")
+    parser.add_argument('--db-workers', type=int, default=5)
+    parser.add_argument('--interval', type=float, default=0.005, help="seconds between background lookups")
+    parser.add_argument('--modes', default='inline,db-executor,hasher')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), pool_size=args.db_workers)
+        populate(db, args.logins)
+        hasher = PasswordHasher(workers=args.workers, max_queue=args.logins)
+        adb = AsyncDatabase(db, max_workers=args.db_workers, hasher=hasher)
+
+        # Start the hasher's worker processes outside the measurement
+        asyncio.run(hasher.hash('warm-up'))
+
+        print(f"{args.logins} concurrent logins, lookups every {args.interval * 1000:.0f} ms, "
+              f"{args.db_workers} db workers, {args.workers} hasher workers, {os.cpu_count()} CPUs")
+        for mode in args.modes.split(','):
+            start = time.perf_counter()
+            logins, queries = asyncio.run(scenario(adb, mode, args.logins, args.interval))
+            elapsed = time.perf_counter() - start
+            print(f"{mode:<12} total={elapsed:6.2f}s  "
+                  f"login p50={percentile(logins, 50) * 1000:7.0f} ms  p99={percentile(logins, 99) * 1000:7.0f} ms  |  "
+                  f"lookup n={len(queries):4d} p50={percentile(queries, 50) * 1000:7.1f} ms  "
+                  f"p99={percentile(queries, 99) * 1000:7.1f} ms")
+
+        hasher.close()
+        adb.close()
+
+if __name__ == '__main__':
+    main()
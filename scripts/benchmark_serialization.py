@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Compare response serialization paths for large list responses.
+
+Builds ``--rows`` attendance and grade rows shaped like the database
+returns them and times turning them into a response body three ways:
+
+    standard   pydantic response model, FastAPI's serialize_response and
+               JSONResponse (FAST_RESPONSES=false)
+    fast       trusted_rows projection and FastJSONResponse (orjson)
+    fast+gzip  fast, then gzip at GZIP_LEVEL as GZipMiddleware would
+
+Latency is the median of ``--repeat`` runs; allocations are the tracemalloc
+peak of one run.
+
+    python scripts/benchmark_serialization.py --rows 10000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import gzip
+import statistics
+import time
+import tracemalloc
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from models.schemas import AttendanceRecord, AttendanceResponse, AttendanceSummary, Grade, GradeResponse
+from models.serialization import FastJSONResponse, GZIP_LEVEL, orjson, trusted_row, trusted_rows
+
+def attendance_rows(count: int):
+    statuses = ['present', 'present', 'present', 'absent', 'late']
+    rows = [
+        {'id': i, 'student_id': '12345', 'date': f'{2000 + i // 365}-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+         'status': statuses[i % 5], 'reason': 'Sick leave' if i % 5 == 3 else None,
+         'created_at': '2024-09-01 08:00:00'}
+        for i in range(count)
+    ]
+    summary = {'total_days': count, 'present': count * 3 // 5, 'absent': count // 5, 'late': count // 5,
+               'attendance_rate': 60}
+    return rows, summary
+
+def grade_rows(count: int):
+    return [
+        {'id': i, 'student_id': '12345', 'subject': ['Mathematics', 'Science', 'English'][i % 3],
+         'test_type': 'Quiz', 'score': float(i % 100), 'max_score': 100.0, 'date': '2024-09-01',
+         'teacher_id': 'T001', 'teacher_name': 'Mrs. Sarah Johnson', 'created_at': '2024-09-01 08:00:00'}
+        for i in range(count)
+    ]
+
+def standard(model, build):
+    # What a route with response_model does with the returned model
+    field = create_response_field(name='response', type_=model)
+
+    def run():
+        content = asyncio.run(serialize_response(field=field, response_content=build()))
+        return JSONResponse(content).body
+
+    return run
+
+def measure(run, repeat: int):
+    body = run()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return statistics.median(timings), peak, len(body)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    attendance, summary = attendance_rows(args.rows)
+    grades = grade_rows(args.rows)
+
+    def fast_attendance():
+        return FastJSONResponse({
+            'attendance': trusted_rows(AttendanceRecord, attendance),
+            'summary': trusted_row(AttendanceSummary, summary),
+            'next_cursor': None,
+        }).body
+
+    def fast_grades():
+        return FastJSONResponse({'grades': trusted_rows(Grade, grades), 'next_cursor': None}).body
+
+    cases = {
+        'attendance': {
+            'standard': standard(AttendanceResponse, lambda: AttendanceResponse(attendance=attendance, summary=summary)),
+            'fast': fast_attendance,
+            'fast+gzip': lambda: gzip.compress(fast_attendance(), GZIP_LEVEL),
+        },
+        'grades': {
+            'standard': standard(GradeResponse, lambda: GradeResponse(grades=grades)),
+            'fast': fast_grades,
+            'fast+gzip': lambda: gzip.compress(fast_grades(), GZIP_LEVEL),
+        },
+    }
+
+    print(f"{args.rows} rows, median of {args.repeat} runs, encoder={'orjson' if orjson else 'json'}")
+    for response, paths in cases.items():
+        baseline = None
+        for path, run in paths.items():
+            elapsed, peak, size = measure(run, args.repeat)
+            baseline = baseline or elapsed
+            print(f"{response:<11} {path:<10} {elapsed * 1000:8.1f} ms  {baseline / elapsed:5.1f}x  "
+                  f"peak alloc {peak / 1024 / 1024:6.1f} MiB  body {size / 1024:7.0f} KiB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Compare peak memory of buffered and streamed attendance exports.
+
+Loads a multi-year attendance history for one student, then encodes it
+twice: once the buffered way (get_attendance + one JSON document) and once
+through iter_attendance + NDJSON chunks as the streaming endpoint does.
+Peak allocations are measured with tracemalloc.
+
+    python scripts/benchmark_streaming.py --rows 200000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from models.database import Database
+from models.serialization import ndjson_stream
+
+STUDENT_ID = '12345'
+
+def populate(db: Database, rows: int):
+    start = date(2000, 1, 1)
+    db.add_attendance_bulk(
+        {'student_id': STUDENT_ID, 'date': (start + timedelta(days=i)).isoformat(), 'status': 'present'}
+        for i in range(rows)
+    )
+
+def buffered(db: Database) -> int:
+    records = db.get_attendance(STUDENT_ID, '1900-01-01', '2999-12-31')
+    return len(json.dumps({'attendance': records}, default=str))
+
+def streamed(db: Database) -> int:
+    return sum(len(chunk) for chunk in ndjson_stream(db.iter_attendance(STUDENT_ID, '1900-01-01', '2999-12-31')))
+
+def measure(func, db: Database):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func(db)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'))
+        populate(db, args.rows)
+
+        for label, func in (('buffered', buffered), ('streamed', streamed)):
+            size, peak, elapsed = measure(func, db)
+            print(f"{label:<9} rows={args.rows}  body={size / 1e6:7.1f} MB  "
+                  f"peak={peak / 1e6:8.2f} MB  time={elapsed:6.2f}s")
+
+        db.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Compare write-through and write-behind chat transcript persistence.
+
+Runs ``--sessions`` concurrent chat sessions, each persisting ``--turns``
+turns (a user and an assistant message) through a TranscriptWriter over a
+fresh SQLite database, with ``--think`` seconds between a session's turns:
+
+    write-through  interval 0: every turn commits before the reply returns
+    write-behind   TRANSCRIPT_FLUSH_INTERVAL / TRANSCRIPT_FLUSH_SIZE batching
+
+Reports the time a turn spends persisting (what the reply waits for),
+turns/s including the final flush, and the number of commits.
+
+    python scripts/benchmark_transcripts.py --sessions 200 --turns 20
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import List
+
+from chatbot.transcripts import TRANSCRIPT_FLUSH_INTERVAL, TRANSCRIPT_FLUSH_SIZE, TranscriptWriter
+from models.async_database import AsyncDatabase
+from models.database import Database
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+async def chat(writer: TranscriptWriter, db: AsyncDatabase, session_id: str, turns: int, think: float,
+               latencies: List[float]):
+    for turn in range(turns):
+        messages = [
+            {'role': 'user', 'content': f'How are the grades this week? ({turn})', 'timestamp': '2024-09-01T08:00:00'},
+            {'role': 'assistant', 'content': 'Academic Performance report ' * 20, 'timestamp': '2024-09-01T08:00:01'},
+        ]
+        start = time.perf_counter()
+        await writer.append(db, session_id, messages)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(think)
+
+async def run(path: str, interval: float, args) -> None:
+    db = AsyncDatabase(Database(path))
+    session_ids = [f'{interval}-{i}' for i in range(args.sessions)]
+    for session_id in session_ids:
+        await db.create_chat_session(session_id, 'parent@email.com', '12345')
+
+    writer = TranscriptWriter(interval=interval, flush_size=args.flush_size)
+    latencies: List[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(chat(writer, db, s, args.turns, args.think, latencies) for s in session_ids))
+    await writer.close()
+    elapsed = time.perf_counter() - start
+
+    stored = sum([len(await db.get_chat_messages(s)) for s in session_ids])
+    commits = writer.batches if interval > 0 else len(latencies)
+    name = 'write-through' if interval <= 0 else 'write-behind'
+    print(f"{name:<14} persist p50={percentile(latencies, 50) * 1000:7.2f} ms  "
+          f"p99={percentile(latencies, 99) * 1000:7.2f} ms  {len(latencies) / elapsed:7.0f} turns/s  "
+          f"{commits:6d} commits  {stored} messages stored")
+    db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--think', type=float, default=0.01, help="seconds between a session's turns")
+    parser.add_argument('--interval', type=float, default=TRANSCRIPT_FLUSH_INTERVAL or 0.2)
+    parser.add_argument('--flush-size', type=int, default=TRANSCRIPT_FLUSH_SIZE)
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions x {args.turns} turns, flush every {args.interval}s "
+          f"or {args.flush_size} messages")
+    with tempfile.TemporaryDirectory() as tmp:
+        for interval in (0.0, args.interval):
+            asyncio.run(run(os.path.join(tmp, f'transcripts-{interval}.db'), interval, args))
+
+if __name__ == '__main__':
+    main()
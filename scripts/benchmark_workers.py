@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Measure API throughput of the production server at different worker counts.
+
+For each entry in ``--workers`` this starts ``gunicorn -c gunicorn.conf.py
+main:app`` against a freshly seeded database, logs in once, then keeps
+``--connections`` keep-alive connections busy with GETs of ``--path`` for
+``--duration`` seconds and reports requests/s and latency percentiles.
+
+The load generator is a single asyncio process speaking raw HTTP/1.1, so
+it costs far less CPU than the server; on a small box it still competes
+with the workers, so leave a core free when comparing worker counts.
+
+    python scripts/benchmark_workers.py --workers 1,2,4,8 --connections 64
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import subprocess
+import tempfile
+import time
+import urllib.request
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMAIL = 'john.johnson@email.com'
+PASSWORD = 'password123'
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+def seed(database_url: str) -> None:
+    env = dict(os.environ, DATABASE_URL=database_url)
+    subprocess.run([sys.executable, 'scripts/seed_data.py'], cwd=ROOT, env=env, check=True, capture_output=True)
+
+def start_server(workers: int, port: int, database_url: str) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=database_url, WEB_CONCURRENCY=str(workers),
+               BIND=f'127.0.0.1:{port}', ACCESS_LOG='', LOG_LEVEL='warning')
+    server = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', 'main:app'], cwd=ROOT, env=env)
+
+    deadline = time.time() + 60
+    while time.time() < deadline and server.poll() is None:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"server with {workers} workers did not start")
+
+def login(port: int) -> str:
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{port}/api/auth/login',
+        data=json.dumps({'email': EMAIL, 'password': PASSWORD}).encode(),
+        headers={'Content-Type': 'application/json'},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())['access_token']
+
+async def connection(port: int, request: bytes, stop_at: float, latencies: List[float], errors: List[int]):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            writer.write(request)
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.partition(b':')
+                if name.lower() == b'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+async def drive(port: int, path: str, token: str, connections: int, duration: float) -> Tuple[List[float], List[int]]:
+    request = (
+        f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n\r\n'
+    ).encode()
+    latencies: List[float] = []
+    errors: List[int] = []
+    stop_at = time.perf_counter() + duration
+    await asyncio.gather(*(connection(port, request, stop_at, latencies, errors) for _ in range(connections)))
+    return latencies, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--path', default='/api/student/schedule?student_id=12345')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"GET {args.path}, {args.connections} keep-alive connections, {args.duration:.0f} s per run, "
+          f"{os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        seed(database_url)
+
+        for workers in (int(w) for w in args.workers.split(',')):
+            server = start_server(workers, args.port, database_url)
+            try:
+                token = login(args.port)
+                # Warm every worker's pools and caches before measuring
+                asyncio.run(drive(args.port, args.path, token, args.connections, 1.0))
+                latencies, errors = asyncio.run(drive(args.port, args.path, token, args.connections, args.duration))
+            finally:
+                server.terminate()
+                server.wait()
+
+            print(f"workers={workers:<3} {len(latencies) / args.duration:8.0f} req/s  "
+                  f"p50={percentile(latencies, 50) * 1000:6.1f} ms  p99={percentile(latencies, 99) * 1000:6.1f} ms  "
+                  f"errors={len(errors)}")
+
+if __name__ == '__main__':
+    main()
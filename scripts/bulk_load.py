@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Stream a CSV or NDJSON export into the database in chunks.
+
+Rows are read lazily and written one chunk per transaction, so memory use
+stays constant no matter how large the export is.
+
+    python scripts/bulk_load.py students exports/roster.csv
+    python scripts/bulk_load.py attendance exports/attendance.ndjson --chunk-size 20000
+    python scripts/bulk_load.py grades exports/north_grades.csv --school north
+
+Rows go to the database configured by DATABASE_URL and DB_BACKEND, as for
+the app, or to the ``--school`` shard under SHARD_DIR. Column names must
+match the table columns (e.g. student_id, date, status, reason for
+attendance). Empty CSV cells are loaded as NULL.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import csv
+import json
+import time
+from itertools import islice
+from typing import Any, Dict, Iterator, List
+
+from models.sharding import ShardRouter, SHARD_DIR
+from models.storage import StorageBackend, create_database
+
+LOADERS = {
+    'students': 'add_students_bulk',
+    'teachers': 'add_teachers_bulk',
+    'attendance': 'add_attendance_bulk',
+    'grades': 'add_grades_bulk',
+    'schedule': 'add_schedules_bulk',
+}
+
+def read_csv(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            yield {key: (value if value != '' else None) for key, value in row.items()}
+
+def read_ndjson(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def chunked(rows: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def load(db: StorageBackend, kind: str, path: str, fmt: str, chunk_size: int) -> int:
+    reader = read_ndjson if fmt == 'ndjson' else read_csv
+    insert = getattr(db, LOADERS[kind])
+
+    total = 0
+    start = time.perf_counter()
+    for chunk in chunked(reader(path), chunk_size):
+        total += insert(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"\r{total:>10} rows  {total / elapsed:10.0f} rows/s", end='', flush=True)
+
+    elapsed = time.perf_counter() - start
+    print(f"\nLoaded {total} {kind} rows in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} rows/s)")
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('kind', choices=sorted(LOADERS))
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=['csv', 'ndjson'],
+                        help="input format (default: inferred from the file extension)")
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--url', help="database URL (default: DATABASE_URL, honouring DB_BACKEND)")
+    parser.add_argument('--school', help="load into this school's shard instead of --url")
+    parser.add_argument('--shard-dir', default=SHARD_DIR or 'data/shards')
+    args = parser.parse_args()
+
+    fmt = args.format or ('ndjson' if args.path.endswith(('.ndjson', '.jsonl')) else 'csv')
+
+    if args.school:
+        shards = ShardRouter(shard_dir=args.shard_dir, schools=[])
+        try:
+            load(shards.get(args.school, create=True).db, args.kind, args.path, fmt, args.chunk_size)
+        finally:
+            shards.close()
+        return
+
+    if SHARD_DIR and not args.url:
+        parser.error("SHARD_DIR is set: pass --school to choose the shard to load")
+
+    db = create_database(args.url)
+    try:
+        load(db, args.kind, args.path, fmt, args.chunk_size)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Run the same scenario against every storage backend and compare results.
+
+Each backend gets a fresh SQLite file (or the --url given for the
+SQLAlchemy backend), is loaded with the same data, and must return the
+same answers for every read used by main.py and SchoolBot.
+
+    python scripts/check_storage_backends.py
+    python scripts/check_storage_backends.py --url postgresql://schoolbot:pw@localhost/schoolbot_test
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import tempfile
+
+from models.database import Database
+from models.sqlalchemy_database import SQLAlchemyDatabase
+
+IGNORED_FIELDS = {'id', 'created_at', 'updated_at', 'last_login', 'password_hash', 'revoked_at'}
+FAR_FUTURE = 4102444800
+
+def normalize(value):
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items() if k not in IGNORED_FIELDS}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if isinstance(value, float):
+        return round(value, 6)
+    return value
+
+def scenario(db):
+    db.add_teachers_bulk([
+        {'teacher_id': 'T001', 'name': 'Mrs. Sarah Johnson', 'subject': 'Mathematics', 'email': 'sj@school.edu'},
+        {'teacher_id': 'T002', 'name': 'Mr. David Wilson', 'subject': 'Science', 'email': 'dw@school.edu'},
+    ])
+    db.add_students_bulk([
+        {'student_id': '12345', 'name': 'Alex Johnson', 'class': '10', 'section': 'A',
+         'parent_name': 'John Johnson', 'parent_email': 'john@email.com'},
+        {'student_id': '123', 'name': 'Sam Short', 'class': '10', 'section': 'A',
+         'parent_name': 'Pat Short', 'parent_email': 'pat@email.com'},
+    ])
+    db.add_student({'student_id': '12346', 'name': 'Emma Wilson', 'class': '9', 'section': 'B',
+                    'date_of_birth': '2009-01-01', 'parent_name': 'Mary Wilson',
+                    'parent_email': 'john@email.com', 'parent_phone': None})
+    db.create_parent_account('john@email.com', 'password123', ['12345', '12346'])
+
+    db.add_schedule({'class': '10', 'section': 'A', 'subject': 'Mathematics', 'teacher_id': 'T001',
+                     'day_of_week': 'Monday', 'start_time': '08:00', 'end_time': '09:00', 'room': '101'})
+    db.add_schedules_bulk([
+        {'class': '10', 'section': 'A', 'subject': 'Science', 'teacher_id': 'T002',
+         'day_of_week': 'Monday', 'start_time': '09:00', 'end_time': '10:00', 'room': None},
+    ])
+
+    db.add_attendance('12345', '2024-09-01', 'present')
+    db.add_attendance_bulk([
+        {'student_id': '12345', 'date': f'2024-09-{day:02d}', 'status': status, 'reason': None}
+        for day, status in zip(range(2, 10), ['present', 'absent', 'late', 'present', 'absent', 'present', 'present', 'late'])
+    ])
+
+    db.add_grade({'student_id': '12345', 'subject': 'Mathematics', 'test_type': 'Quiz', 'score': 78,
+                  'max_score': 100, 'date': '2024-09-03', 'teacher_id': 'T001'})
+    db.add_grades_bulk([
+        {'student_id': '12345', 'subject': 'Mathematics', 'test_type': 'Test', 'score': 45, 'max_score': 50,
+         'date': '2024-09-10', 'teacher_id': 'T001'},
+        {'student_id': '12345', 'subject': 'Science', 'test_type': 'Quiz', 'score': 17, 'max_score': 20,
+         'date': '2024-09-05', 'teacher_id': 'T002'},
+    ])
+
+    db.create_chat_session('session-1', 'john@email.com', '12345')
+    db.append_chat_messages('session-1', [{'role': 'user', 'content': 'hi', 'timestamp': 't1'}])
+    db.update_chat_session('session-1', [
+        {'role': 'user', 'content': 'hi', 'timestamp': 't1'},
+        {'role': 'assistant', 'content': 'hello', 'timestamp': 't2'},
+    ])
+    db.create_chat_session('session-2', 'john@email.com', '12346')
+    chat_batch = db.append_chat_messages_batch({
+        'session-1': [{'role': 'user', 'content': 'grades?', 'timestamp': 't3'}],
+        'session-2': [{'role': 'user', 'content': 'hi', 'timestamp': 't1'},
+                      {'role': 'assistant', 'content': 'hello', 'timestamp': 't2'}],
+        'session-3': [],
+    })
+
+    db.insert_refresh_token('rt-1', 'john@email.com', FAR_FUTURE)
+    refresh_rotated = db.rotate_refresh_token('rt-1', 'rt-2', FAR_FUTURE)
+    refresh_replayed = db.rotate_refresh_token('rt-1', 'rt-3', FAR_FUTURE)
+    db.revoke_access_token('at-1', FAR_FUTURE)
+    db.revoke_access_token('at-1', FAR_FUTURE)
+
+    return {
+        'refresh_rotated': refresh_rotated,
+        'refresh_replayed': refresh_replayed,
+        'refresh_old': db.get_refresh_token('rt-1'),
+        'refresh_current': db.get_refresh_token('rt-2'),
+        'refresh_revoke_all': db.revoke_parent_refresh_tokens('john@email.com'),
+        'access_revoked': db.get_revoked_access_tokens(),
+        'access_revoked_version': db.get_data_versions(['revoked_access_tokens'])['revoked_access_tokens']['version'],
+        'student_by_parent': db.get_student_by_parent('john@email.com', '12345'),
+        'students_by_parent': db.get_students_by_parent('john@email.com'),
+        'substring_denied': db.get_student_by_parent('john@email.com', '123'),
+        'parent_student_ids': db.get_parent_student_ids('john@email.com'),
+        'authenticate_ok': db.authenticate_parent('john@email.com', 'password123'),
+        'authenticate_bad': db.authenticate_parent('john@email.com', 'wrong'),
+        'attendance': db.get_attendance('12345', '2024-09-01', '2024-09-30'),
+        'attendance_stream': list(db.iter_attendance('12345', '2024-09-01', '2024-09-30', batch_size=3)),
+        'attendance_page': db.get_attendance_page('12345', '2024-09-01', '2024-09-30', 3),
+        'attendance_page_after': db.get_attendance_page('12345', '2024-09-01', '2024-09-30', 3, after=('2024-09-07', 10**9)),
+        'attendance_summary': db.get_attendance_summary('12345', '2024-09-01', '2024-09-30'),
+        'recent_absences': db.get_recent_absences('12345', '2024-09-01', '2024-09-30'),
+        'grades': db.get_grades('12345'),
+        'grades_math': db.get_grades('12345', 'Mathematics'),
+        'grades_stream': list(db.iter_grades('12345')),
+        'grades_page': db.get_grades_page('12345', 2),
+        'grades_page_after': db.get_grades_page('12345', 2, after=('2024-09-05', 10**9)),
+        'grades_page_subject': db.get_grades_page('12345', 5, subject='Mathematics', after=('2024-09-10', 10**9)),
+        'grade_summary': db.get_grade_summary('12345'),
+        'grade_summary_science': db.get_grade_summary('12345', 'Science'),
+        'schedule': db.get_class_schedule('10', 'A'),
+        'schedule_cached': db.get_class_schedule('10', 'A'),
+        'schedule_with_versions': db.get_class_schedule_with_versions('10', 'A'),
+        'chat_messages': db.get_chat_messages('session-1'),
+        'chat_batch': chat_batch,
+        'chat_messages_batched': db.get_chat_messages('session-2'),
+        'data_versions': db.get_data_versions([
+            'attendance:12345', 'grades:12345', 'schedule:10:A', 'teachers', 'grades:12346',
+            'roster:12345', 'roster:12346', 'roster:123'
+        ]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="database URL for the SQLAlchemy backend (default: temporary SQLite file)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            'sqlite3': Database(os.path.join(tmp, 'sqlite3.db')),
+            'sqlalchemy': SQLAlchemyDatabase(args.url or f"sqlite:///{os.path.join(tmp, 'sqlalchemy.db')}"),
+        }
+
+        results = {}
+        for name, db in backends.items():
+            results[name] = normalize(scenario(db))
+            db.close()
+
+    reference = results['sqlite3']
+    failures = 0
+    for name, result in results.items():
+        for check, expected in reference.items():
+            if result[check] != expected:
+                failures += 1
+                print(f"MISMATCH {name}.{check}:\n  expected {expected}\n  got      {result[check]}")
+
+    print(f"{len(reference)} checks x {len(results)} backends: {'OK' if not failures else f'{failures} mismatches'}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
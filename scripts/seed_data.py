@@ -4,12 +4,12 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.database import Database
+from models.storage import create_database
 from datetime import datetime, timedelta
 import random
 
 def seed_database():
-    db = Database()
+    db = create_database()
     
     print("Seeding database with sample data...")
     
@@ -23,8 +23,7 @@ def seed_database():
         {'teacher_id': 'T006', 'name': 'Mr. Robert Miller', 'subject': 'Physical Education', 'email': 'robert.miller@school.edu', 'phone': '555-0106'},
     ]
     
-    for teacher in teachers:
-        db.add_teacher(teacher)
+    db.add_teachers_bulk(teachers)
     
     # Sample students
     students = [
@@ -80,8 +79,7 @@ def seed_database():
         }
     ]
     
-    for student in students:
-        db.add_student(student)
+    db.add_students_bulk(students)
     
     # Create parent authentication accounts
     parent_accounts = [
@@ -128,12 +126,12 @@ def seed_database():
         {'class': '10', 'section': 'A', 'subject': 'History', 'teacher_id': 'T004', 'day_of_week': 'Friday', 'start_time': '13:30', 'end_time': '14:30', 'room': '104'},
     ]
     
-    for schedule_item in schedule_10a:
-        db.add_schedule(schedule_item)
+    db.add_schedules_bulk(schedule_10a)
     
     # Generate sample attendance data for the last 30 days
     student_ids = ['12345', '12346', '12347', '12348', '12349']
     statuses = ['present', 'absent', 'late']
+    attendance_records = []
     
     for student_id in student_ids:
         for i in range(30):
@@ -149,11 +147,19 @@ def seed_database():
             
             reason = 'Sick' if status == 'absent' and random.random() < 0.5 else None
             
-            db.add_attendance(student_id, date, status, reason)
+            attendance_records.append({
+                'student_id': student_id,
+                'date': date,
+                'status': status,
+                'reason': reason
+            })
+    
+    db.add_attendance_bulk(attendance_records)
     
     # Generate sample grades
     subjects = ['Mathematics', 'Science', 'English', 'History', 'Art']
     test_types = ['Quiz', 'Test', 'Assignment', 'Project', 'Midterm', 'Final']
+    grade_records = []
     
     for student_id in student_ids:
         for subject in subjects:
@@ -188,7 +194,9 @@ def seed_database():
                         'teacher_id': teacher_id
                     }
                     
-                    db.add_grade(grade_data)
+                    grade_records.append(grade_data)
+    
+    db.add_grades_bulk(grade_records)
     
     print("Database seeding completed successfully!")
     print("\nSample login credentials:")
@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+
+# Settings are read at import time, so they are pinned before any app module loads
+_data_dir = tempfile.mkdtemp(prefix='school-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_data_dir, 'school.db')}"
+os.environ['RATE_LIMIT_DB'] = os.path.join(_data_dir, 'rate_limits.db')
+os.environ.setdefault('JWT_SECRET_KEY', 'test-secret')
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+os.environ.setdefault('PASSWORD_HASH_EXECUTOR', 'thread')
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '1')
+os.environ.pop('DB_BACKEND', None)
+os.environ.pop('SHARD_DIR', None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from models.database import Database
+from models.sqlalchemy_database import SQLAlchemyDatabase
+
+PARENT_EMAIL = 'john.johnson@email.com'
+PARENT_PASSWORD = 'password123'
+STUDENT_ID = '12345'
+
+BACKENDS = {
+    'sqlite3': lambda path: Database(path, pool_size=4),
+    'sqlalchemy': lambda path: SQLAlchemyDatabase(f'sqlite:///{path}', pool_size=4),
+}
+
+@pytest.fixture(params=sorted(BACKENDS))
+def db(request, tmp_path):
+    """Each storage backend over a fresh ``tmp_path / 'test.db'``."""
+    database = BACKENDS[request.param](str(tmp_path / 'test.db'))
+    yield database
+    database.close()
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """The sqlite3 backend, for tests that need its raw pooled connections."""
+    database = Database(str(tmp_path / 'test.db'), pool_size=4)
+    yield database
+    database.close()
+
+@pytest.fixture(scope='session')
+def database_path():
+    return os.environ['DATABASE_URL'][len('sqlite:///'):]
+
+@pytest.fixture(scope='session')
+def client():
+    from fastapi.testclient import TestClient
+    from scripts.seed_data import seed_database
+    import main
+
+    seed_database()
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+def _login(client, email: str = PARENT_EMAIL, password: str = PARENT_PASSWORD) -> dict:
+    response = client.post('/api/auth/login', json={'email': email, 'password': password})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+@pytest.fixture
+def login(client):
+    """Fresh tokens for tests that revoke or rotate them; logins are limited to 5 a minute."""
+    return lambda **kwargs: _login(client, **kwargs)
+
+@pytest.fixture(scope='session')
+def auth_headers(client):
+    return {'Authorization': f"Bearer {_login(client)['access_token']}"}
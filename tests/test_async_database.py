@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+import pytest
+
+from models.async_database import AsyncDatabase
+
+QUICK_REQUESTS = 20
+
+@pytest.mark.asyncio
+async def test_quick_lookups_finish_while_slow_query_runs(sqlite_db):
+    db = sqlite_db
+    adb = AsyncDatabase(db)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_query(database):
+        with database.connection() as conn:
+            # Holds the statement open inside SQLite until the test lets it go
+            conn.create_function('hold', 0, lambda: (started.set(), release.wait(10))[1])
+            return conn.execute('SELECT hold()').fetchone()[0]
+
+    slow = asyncio.ensure_future(adb.run(slow_query, db))
+    try:
+        assert await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+
+        lookups = [adb.get_student_by_parent('nobody@email.com', '00000') for _ in range(QUICK_REQUESTS)]
+        results = await asyncio.wait_for(asyncio.gather(*lookups), 5)
+
+        assert results == [None] * QUICK_REQUESTS
+        assert not slow.done()
+    finally:
+        release.set()
+    assert await slow == 1
+    adb.close()
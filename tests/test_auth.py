@@ -0,0 +1,70 @@
+import pytest
+
+FAR_FUTURE = 4102444800
+
+def test_refresh_token_rotates(client, login):
+    tokens = login()
+
+    response = client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+
+    assert response.status_code == 200
+    assert response.json()['refresh_token'] != tokens['refresh_token']
+
+def test_refresh_token_replay_is_rejected(client, login):
+    tokens = login()
+    rotated = client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert rotated.status_code == 200
+
+    replay = client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+
+    assert replay.status_code == 401
+
+def test_logout_revokes_access_token_in_every_worker(client, login):
+    from auth import auth
+
+    tokens = login()
+    headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+    assert client.get('/api/student/info?student_id=12345', headers=headers).status_code == 200
+
+    response = client.post('/api/auth/logout', json={'refresh_token': tokens['refresh_token']}, headers=headers)
+    assert response.status_code == 200
+
+    # Another worker only has the verified payload in its token cache, and
+    # its revocation list is due for a poll
+    auth.revoked_tokens.invalidate()
+    auth.verify_token(tokens['access_token'])
+    for revocations in auth.revocation_lists.values():
+        revocations.checked_at = float('-inf')
+    assert client.get('/api/student/info?student_id=12345', headers=headers).status_code == 401
+
+@pytest.mark.asyncio
+async def test_revocation_list_polls_instead_of_querying_per_request(db):
+    from auth.auth import RevocationList
+    from models.async_database import AsyncDatabase
+
+    adb = AsyncDatabase(db)
+    revocations = RevocationList(interval=60)
+    assert not await revocations.contains(adb, 'token-1')
+
+    # Revoked by another worker: unseen until the next poll, then one reload
+    await adb.revoke_access_token('token-1', FAR_FUTURE)
+    for _ in range(100):
+        assert not await revocations.contains(adb, 'token-1')
+    assert revocations.polls == 1
+
+    revocations.checked_at = float('-inf')
+    assert await revocations.contains(adb, 'token-1')
+    revocations.checked_at = float('-inf')
+    assert await revocations.contains(adb, 'token-1')
+    assert (revocations.polls, revocations.reloads) == (3, 2)
+    adb.close()
+
+def test_access_tokens_are_unique_per_login():
+    from auth.auth import create_access_token
+
+    claims = {'sub': 'john.johnson@email.com', 'student_ids': '12345'}
+    assert create_access_token(claims) != create_access_token(claims)
+
+def test_metrics_require_authentication(client, auth_headers):
+    assert client.get('/api/metrics').status_code == 403
+    assert client.get('/api/metrics', headers=auth_headers).status_code == 200
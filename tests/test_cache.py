@@ -0,0 +1,50 @@
+from models.cache import TTLCache
+from models.database import Database
+
+TEACHER = {
+    'teacher_id': 'T001', 'name': 'Mrs. Sarah Johnson', 'subject': 'Mathematics',
+    'email': 'sarah.johnson@school.edu', 'phone': '555-0101',
+}
+PERIOD = {
+    'class': '10', 'section': 'A', 'subject': 'Mathematics', 'teacher_id': 'T001',
+    'day_of_week': 'Monday', 'start_time': '09:00', 'end_time': '09:45', 'room': '101',
+}
+
+def test_version_mismatch_is_a_miss():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set('key', 'old', version=1)
+
+    assert cache.get('key', version=1) == 'old'
+    assert cache.get('key', version=2) is None
+    assert cache.get('key') is None
+
+def test_invalidate_during_load_is_not_undone():
+    cache = TTLCache(maxsize=4, ttl=60)
+
+    def slow_loader():
+        # Another writer commits and invalidates while this load is running
+        cache.invalidate('key')
+        return 'stale'
+
+    assert cache.get_or_load('key', slow_loader) == 'stale'
+    assert cache.get('key') is None
+    assert cache.get_or_load('key', lambda: 'fresh') == 'fresh'
+    assert cache.get('key') == 'fresh'
+
+def test_schedule_cache_sees_writes_from_another_process(tmp_path):
+    path = str(tmp_path / 'school.db')
+    reader, writer = Database(path), Database(path)
+    try:
+        writer.add_teacher(TEACHER)
+        assert reader.get_class_schedule('10', 'A') == []
+
+        # A separate backend stands in for a script or another worker: it
+        # never touches the reader's in-process cache
+        writer.add_schedule(PERIOD)
+
+        versions, rows = reader.get_class_schedule_with_versions('10', 'A')
+        assert [row['subject'] for row in rows] == ['Mathematics']
+        assert versions['schedule:10:A']['version'] == 1
+    finally:
+        reader.close()
+        writer.close()
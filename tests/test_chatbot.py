@@ -0,0 +1,74 @@
+import pytest
+
+from chatbot.school_bot import SchoolBot
+from chatbot.sessions import STUDENT_ID_PATTERN
+from chatbot.transcripts import TranscriptWriter
+from models.sharding import ShardRouter
+
+PARENT_EMAIL = 'parent@email.com'
+
+def student(student_id: str) -> dict:
+    return {
+        'student_id': student_id, 'name': 'Sam North', 'class': '10', 'section': 'A',
+        'date_of_birth': '2008-05-15', 'parent_name': 'Pat North',
+        'parent_email': PARENT_EMAIL, 'parent_phone': '555-1001',
+    }
+
+@pytest.mark.parametrize('message, expected', [
+    ("my child's ID is 12345", '12345'),
+    ("my child's ID is north-12345", 'north-12345'),
+    ("ID north_2-0042", 'north_2-0042'),
+    ("ID 123", None),
+])
+def test_student_id_pattern(message, expected):
+    match = STUDENT_ID_PATTERN.search(message)
+    assert (match.group() if match else None) == expected
+
+@pytest.fixture
+def shards(tmp_path):
+    router = ShardRouter(shard_dir=str(tmp_path), schools=['north', 'south'])
+    router.get('north').db.add_student(student('north-12345'))
+    yield router
+    router.close()
+
+@pytest.mark.asyncio
+async def test_chat_routes_on_student_id_prefix(shards):
+    await shards.get('north').create_parent_account(PARENT_EMAIL, 'password123', ['north-12345'])
+    bot = SchoolBot(transcripts=TranscriptWriter(interval=0))
+    claims = {'sub': PARENT_EMAIL, 'student_ids': 'north-12345', 'school_id': 'north'}
+
+    async def send(message: str) -> str:
+        return await bot.process_message('s1', PARENT_EMAIL, message, db=shards.for_claims(claims),
+                                         route=lambda student_id: shards.for_claims(claims, student_id))
+
+    assert 'Student Not Found' in await send(f'I am {PARENT_EMAIL}, my child is south-12345')
+    assert 'Welcome' in await send(f'I am {PARENT_EMAIL}, my child is north-12345')
+    assert 'Attendance Report for Sam North' in await send('How is the attendance?')
+
+@pytest.mark.asyncio
+async def test_schedule_report_sees_writes_from_another_process(tmp_path):
+    from models.async_database import AsyncDatabase
+    from models.database import Database
+
+    path = str(tmp_path / 'school.db')
+    db = AsyncDatabase(Database(path))
+    await db.add_teacher({'teacher_id': 'T001', 'name': 'Mrs. Sarah Johnson', 'subject': 'Mathematics',
+                          'email': 'sarah.johnson@school.edu', 'phone': '555-0101'})
+    await db.add_student(student('12345'))
+    await db.create_parent_account(PARENT_EMAIL, 'password123', ['12345'])
+    bot = SchoolBot(transcripts=TranscriptWriter(interval=0))
+
+    async def send(message: str) -> str:
+        return await bot.process_message('s1', PARENT_EMAIL, message, db=db)
+
+    await send(f'I am {PARENT_EMAIL}, my child is 12345')
+    assert 'No schedule information' in await send('What is the class schedule?')
+
+    # Another worker's write bumps data_versions but not this process's caches
+    other = Database(path)
+    other.add_schedule({'class': '10', 'section': 'A', 'subject': 'Mathematics', 'teacher_id': 'T001',
+                        'day_of_week': 'Monday', 'start_time': '09:00', 'end_time': '09:45', 'room': '101'})
+    other.close()
+
+    assert 'Mathematics | Mrs. Sarah Johnson' in await send('What is the class schedule?')
+    db.close()
@@ -0,0 +1,26 @@
+from conftest import STUDENT_ID
+from models.database import Database
+
+SCHEDULE_URL = f'/api/student/schedule?student_id={STUDENT_ID}'
+
+def test_schedule_etag_matches_body_after_external_write(client, auth_headers, database_path):
+    first = client.get(SCHEDULE_URL, headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert client.get(SCHEDULE_URL, headers={**auth_headers, 'If-None-Match': etag}).status_code == 304
+
+    # A script or another worker: its write never reaches this process's schedule cache
+    other = Database(database_path)
+    try:
+        other.add_schedule({
+            'class': '10', 'section': 'A', 'subject': 'Robotics', 'teacher_id': 'T001',
+            'day_of_week': 'Saturday', 'start_time': '10:00', 'end_time': '11:00', 'room': 'Lab 2',
+        })
+    finally:
+        other.close()
+
+    second = client.get(SCHEDULE_URL, headers={**auth_headers, 'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != etag
+    assert 'Robotics' in [item['subject'] for item in second.json()['schedule']]
+    assert client.get(SCHEDULE_URL, headers={**auth_headers, 'If-None-Match': second.headers['ETag']}).status_code == 304
@@ -0,0 +1,59 @@
+import sqlite3
+import threading
+
+import pytest
+
+from auth.rate_limit import RateLimiterUnavailable, TokenBucketLimiter
+
+@pytest.mark.asyncio
+async def test_check_runs_off_the_event_loop(tmp_path):
+    limiter = TokenBucketLimiter(str(tmp_path / 'limits.db'))
+    threads = []
+    hit = limiter.hit
+
+    def record(*args):
+        threads.append(threading.current_thread())
+        return hit(*args)
+
+    limiter.hit = record
+    try:
+        assert await limiter.check('login:ip:1.2.3.4', 1, 60) == (True, 0.0)
+        allowed, retry_after = await limiter.check('login:ip:1.2.3.4', 1, 60)
+        assert not allowed and retry_after > 0
+        assert threads and threading.main_thread() not in threads
+    finally:
+        limiter.close()
+
+def hold_write_lock(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("BEGIN IMMEDIATE")
+    return conn
+
+def test_contention_is_counted_and_fails_closed(tmp_path):
+    path = str(tmp_path / 'limits.db')
+    limiter = TokenBucketLimiter(path, busy_timeout=0.01)
+    limiter.hit('warmup', 5, 60)
+    blocker = hold_write_lock(path)
+    try:
+        with pytest.raises(RateLimiterUnavailable):
+            limiter.hit('login:ip:1.2.3.4', 5, 60)
+        assert limiter.stats()['errors'] == 1
+        assert limiter.stats()['failed_open'] == 0
+    finally:
+        blocker.rollback()
+        blocker.close()
+        limiter.close()
+
+def test_fail_open_still_counts_errors(tmp_path):
+    path = str(tmp_path / 'limits.db')
+    limiter = TokenBucketLimiter(path, busy_timeout=0.01, fail_open=True)
+    limiter.hit('warmup', 5, 60)
+    blocker = hold_write_lock(path)
+    try:
+        assert limiter.hit('login:ip:1.2.3.4', 5, 60) == (True, 0.0)
+        assert limiter.stats()['errors'] == 1
+        assert limiter.stats()['failed_open'] == 1
+    finally:
+        blocker.rollback()
+        blocker.close()
+        limiter.close()
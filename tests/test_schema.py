@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+from models.database import Database
+from models.sqlalchemy_database import SQLAlchemyDatabase, metadata
+
+ALL_INDEXES = {index.name for table in metadata.sorted_tables for index in table.indexes}
+LATER_INDEXES = ['idx_attendance_student_date', 'idx_grades_student_subject',
+                 'idx_attendance_student_keyset', 'idx_grades_student_keyset']
+
+def indexes(path) -> set:
+    with sqlite3.connect(path) as conn:
+        return {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")}
+
+def older_database(path: str) -> None:
+    """A file whose tables predate the later indexes."""
+    Database(path).close()
+    with sqlite3.connect(path) as conn:
+        for name in LATER_INDEXES:
+            conn.execute(f"DROP INDEX {name}")
+        conn.execute("PRAGMA user_version = 0")
+
+def test_sqlalchemy_creates_indexes_on_existing_tables(tmp_path):
+    path = str(tmp_path / 'school.db')
+    older_database(path)
+
+    SQLAlchemyDatabase(f'sqlite:///{path}').close()
+
+    assert indexes(path) == ALL_INDEXES
+
+def test_failed_migration_leaves_schema_version_unstamped(tmp_path, monkeypatch):
+    path = str(tmp_path / 'school.db')
+    older_database(path)
+
+    def fail(self, conn):
+        raise RuntimeError('migration interrupted')
+    monkeypatch.setattr(SQLAlchemyDatabase, '_migrate_chat_messages', fail)
+    with pytest.raises(RuntimeError):
+        SQLAlchemyDatabase(f'sqlite:///{path}')
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+
+    # The sqlite3 backend therefore still runs its DDL instead of taking the warm start
+    database = Database(path)
+    assert database.schema_initialized
+    database.close()
+    assert indexes(path) == ALL_INDEXES
+
+@pytest.mark.parametrize('open_database', [
+    lambda path: Database(path),
+    lambda path: SQLAlchemyDatabase(f'sqlite:///{path}'),
+], ids=['sqlite3', 'sqlalchemy'])
+def test_keyset_indexes_are_added_to_files_stamped_without_them(tmp_path, open_database):
+    path = str(tmp_path / 'school.db')
+    older_database(path)
+    with sqlite3.connect(path) as conn:
+        # What SQLAlchemyDatabase used to leave behind on an existing file
+        conn.execute("PRAGMA user_version = 4")
+
+    open_database(path).close()
+
+    assert indexes(path) == ALL_INDEXES
+    with sqlite3.connect(path) as conn:
+        plan = ' '.join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM attendance WHERE student_id = ? AND date <= ? "
+            "ORDER BY date DESC, id DESC LIMIT 50", ('12345', '2024-09-30')))
+    assert 'idx_attendance_student_keyset' in plan
+    assert 'TEMP B-TREE' not in plan
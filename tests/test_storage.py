@@ -0,0 +1,37 @@
+import threading
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from models.sqlalchemy_database import SQLAlchemyDatabase
+
+def test_concurrent_first_writes_to_a_scope_all_count(db):
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def write(day):
+        barrier.wait()
+        try:
+            db.add_attendance('12345', f'2024-09-{day:02d}', 'present')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(day,)) for day in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert db.get_data_versions(['attendance:12345'])['attendance:12345']['version'] == 8
+
+def upsert_sql(dialect) -> str:
+    # Statements are built from the engine's dialect alone, so no server is needed
+    database = object.__new__(SQLAlchemyDatabase)
+    database.engine = SimpleNamespace(dialect=dialect)
+    return str(database._upsert_version().compile(dialect=dialect))
+
+def test_version_bump_is_a_single_upsert_on_every_server():
+    assert 'ON CONFLICT (scope) DO UPDATE' in upsert_sql(postgresql.dialect())
+    assert 'ON CONFLICT (scope) DO UPDATE' in upsert_sql(sqlite.dialect())
+    assert 'ON DUPLICATE KEY UPDATE' in upsert_sql(mysql.dialect())
@@ -0,0 +1,31 @@
+def add_attendance(db, days: int):
+    db.add_attendance_bulk([
+        {'student_id': '12345', 'date': f'2024-09-{day:02d}', 'status': 'present', 'reason': None}
+        for day in range(1, days + 1)
+    ])
+
+def checked_out(db) -> int:
+    stats = db.pool_stats()
+    return stats['checked_out'] if 'checked_out' in stats else stats['created'] - stats['idle']
+
+def test_stream_releases_connection_between_batches(db):
+    add_attendance(db, 7)
+
+    rows = db.iter_attendance('12345', '2024-09-01', '2024-09-30', batch_size=3)
+    first = next(rows)
+
+    # A client that stops reading mid-stream holds no pooled connection
+    assert checked_out(db) == 0
+    assert first['date'] == '2024-09-07'
+    assert [row['date'] for row in rows] == [f'2024-09-{day:02d}' for day in range(6, 0, -1)]
+
+def test_stream_pages_do_not_repeat_rows(db):
+    add_attendance(db, 6)
+
+    rows = db.iter_attendance('12345', '2024-09-01', '2024-09-30', batch_size=3)
+    head = [next(rows) for _ in range(3)]
+    # Committed between two batches, ahead of the keyset position
+    db.add_attendance('12345', '2024-09-10', 'absent')
+    tail = list(rows)
+
+    assert [row['date'] for row in head + tail] == [f'2024-09-{day:02d}' for day in range(6, 0, -1)]
@@ -0,0 +1,62 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from chatbot.transcripts import TranscriptWriter
+from models.async_database import AsyncDatabase
+
+def turn(session_id: str, number: int):
+    return [
+        {'role': 'user', 'content': f'{session_id} question {number}', 'timestamp': None},
+        {'role': 'assistant', 'content': f'{session_id} answer {number}', 'timestamp': None},
+    ]
+
+def stored_seqs(path, session_id: str):
+    with sqlite3.connect(path) as conn:
+        return [row[0] for row in conn.execute(
+            "SELECT seq FROM chat_messages WHERE session_id = ? ORDER BY id", (session_id,))]
+
+@pytest.mark.asyncio
+async def test_write_behind_keeps_turn_order(db, tmp_path):
+    adb = AsyncDatabase(db)
+    sessions = [f's{i}' for i in range(5)]
+    for session_id in sessions:
+        await adb.create_chat_session(session_id, 'parent@email.com', '12345')
+    # Small batches so turns of one session land in several flushes
+    writer = TranscriptWriter(interval=0.01, flush_size=3)
+
+    async def chat(session_id):
+        for number in range(10):
+            await writer.append(adb, session_id, turn(session_id, number))
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(chat(s) for s in sessions))
+    await writer.close()
+
+    assert writer.batches > 1
+    for session_id in sessions:
+        expected = [m['content'] for number in range(10) for m in turn(session_id, number)]
+        assert [m['content'] for m in await adb.get_chat_messages(session_id)] == expected
+        assert stored_seqs(tmp_path / 'test.db', session_id) == list(range(1, 21))
+
+@pytest.mark.asyncio
+async def test_failing_session_does_not_hold_back_its_shard(db):
+    adb = AsyncDatabase(db)
+    for session_id in ('good', 'bad'):
+        await adb.create_chat_session(session_id, 'parent@email.com', '12345')
+    writer = TranscriptWriter(interval=60, max_pending=10**6, max_attempts=3)
+
+    # content is NOT NULL, so every commit of this session fails
+    await writer.append(adb, 'bad', [{'role': 'user', 'content': None, 'timestamp': None}])
+    for number in range(3):
+        await writer.append(adb, 'good', turn('good', number))
+        await writer.flush()
+        assert len(await adb.get_chat_messages('good')) == 2 * (number + 1)
+
+    stats = writer.stats()
+    assert stats['pending'] == 0
+    assert stats['dead_lettered'] == 1
+    assert stats['retrying'] == 0
+    assert await adb.get_chat_messages('bad') == []
+    await writer.close()